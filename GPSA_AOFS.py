@@ -4,7 +4,6 @@ from gdshelpers.geometry.chip import Cell
 from gdshelpers.parts.waveguide import Waveguide
 from gdshelpers.parts.coupler import GratingCoupler
 from gdshelpers.parts.resonator import RingResonator
-from gdshelpers.layout import GridLayout
 from gdshelpers.parts.marker import CrossMarker
 from gdshelpers.parts.marker import SquareMarker
 from gdshelpers.helpers.positive_resist import convert_to_positive_resist
@@ -12,6 +11,9 @@ from gdshelpers.parts.port import Port
 from shapely.geometry import Polygon
 
 from gdshelpers.geometry.ebl_frame_generators import raith_marker_frame
+from glyph_text import GlyphGridLayout
+from idt_fingers import finger_bundle
+from gds_rectangles import save_gds
 
 
 
@@ -98,25 +100,21 @@ def generate_device_cell(IDT_aperature, prop_length,periods_num, origin=(50, -25
 
     # IDT ON THE "right" GRATING COUPLER
     # Finger_lower is lower idt fingers, Finger_upper is upper IDT finger (on the horn on the right)
-    Finger_lower = Waveguide.make_at_port(
-        Port(origin=(Finger_origin_x + pad_length/4 , Finger_origin_y - 5), angle=np.pi / 2, width=Idt_finger_arm2))
-    Finger_lower.add_straight_segment(length=Finger_length)
+    Finger_lower = finger_bundle(
+        Port(origin=(Finger_origin_x + pad_length/4 , Finger_origin_y - 5), angle=np.pi / 2, width=Idt_finger_arm2), length=Finger_length)
 
-    Finger_upper = Waveguide.make_at_port(
-        Port(origin=(Finger_origin_x + Figer_gap_offset + pad_length/4, Finger_origin_y), angle=np.pi / 2, width=Idt_finger_arm2))
-    Finger_upper.add_straight_segment(length=Finger_length)
+    Finger_upper = finger_bundle(
+        Port(origin=(Finger_origin_x + Figer_gap_offset + pad_length/4, Finger_origin_y), angle=np.pi / 2, width=Idt_finger_arm2), length=Finger_length)
 
     # SAME IDT ON THE "left" GRATING COUPLER ---------------------------------------------------------------------------------------------------
     # Finger_lower_other_side is left IDT finger, wg_2 is right IDT finger
-    Finger_lower_other_side = Waveguide.make_at_port(
+    Finger_lower_other_side = finger_bundle(
         Port(origin=(Finger_origin_x - Finger_left_offset - pad_length/4, Finger_origin_y - 5), angle=np.pi / 2,
-             width=Idt_finger_arm2))
-    Finger_lower_other_side.add_straight_segment(length=Finger_length)
+             width=Idt_finger_arm2), length=Finger_length)
 
-    Finger_upper_other_side = Waveguide.make_at_port(
+    Finger_upper_other_side = finger_bundle(
         Port(origin=(Finger_origin_x - Finger_left_offset + Figer_gap_offset - pad_length/4, Finger_origin_y), angle=np.pi / 2,
-             width=Idt_finger_arm2))
-    Finger_upper_other_side.add_straight_segment(length=Finger_length)
+             width=Idt_finger_arm2), length=Finger_length)
 
     #Make Small metal pad
     outer_corners_arm2_1 = [
@@ -185,7 +183,7 @@ def generate_device_cell(IDT_aperature, prop_length,periods_num, origin=(50, -25
 
 
 
-layout = GridLayout(title='GaP on Sapphire', frame_layer=0, text_layer=2, region_layer_type=None, horizontal_spacing=100, vertical_spacing=0)
+layout = GlyphGridLayout(title='GaP on Sapphire', frame_layer=0, text_layer=2, region_layer_type=None, horizontal_spacing=100, vertical_spacing=0)
 IDT_aperatureS = np.linspace(20, 200, 7)
 prop_length = 100
 periods_nums = np.linspace(15,60,10)
@@ -249,5 +247,5 @@ if show == True:
 # Create the GDS file, un-comment if want to save!
 if show == False:
     print('saving........')
-    layout_cell.save('ZnO-TEST2.gds')
+    save_gds('ZnO-TEST2.gds', layout_cell)
     print('saved!!!')
\ No newline at end of file
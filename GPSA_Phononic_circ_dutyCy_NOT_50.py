@@ -12,6 +12,10 @@ from gdshelpers.parts.port import Port
 from shapely.geometry import Polygon
 
 from gdshelpers.geometry.ebl_frame_generators import raith_marker_frame
+from idt_fingers import finger_bundle
+from gds_rectangles import save_gds
+from grating_couplers import grating_coupler, grating_coupler_at_port
+from waveguide_path import bend_points
 
 
 
@@ -34,19 +38,22 @@ coupler_params = {
 }
 def generate_device_cell(resonator_radius, resonator_gap, prop_length,IDT_aperature, origin=(0, 0)):
     #Creat the Acoustic waveguide
-    left_coupler = GratingCoupler.make_traditional_coupler(origin, angle=0, **coupler_params)
-    wg1 = Waveguide.make_at_port(left_coupler.port)
+    left_coupler = grating_coupler(origin, angle=0, **coupler_params)
+    # the port of the coupler points back from its origin
+    wg1 = Waveguide.make_at_port(Port(origin, 0, coupler_params['width']).inverted_direction)
     wg1.add_straight_segment(length=50)
     #wg1.add_bend(-pi/2, radius=50)
     wg1.add_straight_segment(length=50)
 
-    ring_res = RingResonator.make_at_port(wg1.current_port, gap=resonator_gap, radius=resonator_radius)
+    # the ring is sampled to the bend tolerance like the waveguides (see waveguide_path)
+    ring_res = RingResonator.make_at_port(wg1.current_port, gap=resonator_gap, radius=resonator_radius,
+                                          n_points=bend_points(np.pi / 2, resonator_radius, coupler_params['width']))
 
     wg2 = Waveguide.make_at_port(ring_res.port)
     wg2.add_straight_segment(length=50)
     #wg2.add_bend(-pi/2, radius=50)
     wg2.add_straight_segment(length=50)
-    right_coupler = GratingCoupler.make_traditional_coupler_at_port(wg2.current_port, **coupler_params)
+    right_coupler = grating_coupler_at_port(wg2.current_port, **coupler_params)
 
     #Creat the IDT
 
@@ -89,20 +96,16 @@ def generate_device_cell(resonator_radius, resonator_gap, prop_length,IDT_aperat
 
     #IDT ON THE "right" GRATING COUPLER
     #Finger_lower is lower idt fingers, Finger_upper is upper IDT finger (on the horn on the right)
-    Finger_lower = Waveguide.make_at_port(Port(origin=(Finger_origin_x , Finger_origin_y-5), angle=np.pi/2, width=Idt_finger_arm2))
-    Finger_lower.add_straight_segment(length=Finger_length)
+    Finger_lower = finger_bundle(Port(origin=(Finger_origin_x , Finger_origin_y-5), angle=np.pi/2, width=Idt_finger_arm2), length=Finger_length)
 
-    Finger_upper = Waveguide.make_at_port(Port(origin=(Finger_origin_x + Figer_gap_offset , Finger_origin_y), angle=np.pi/2, width=Idt_finger_arm2))
-    Finger_upper.add_straight_segment(length=Finger_length)
+    Finger_upper = finger_bundle(Port(origin=(Finger_origin_x + Figer_gap_offset , Finger_origin_y), angle=np.pi/2, width=Idt_finger_arm2), length=Finger_length)
 
 
     #SAME IDT ON THE "left" GRATING COUPLER ---------------------------------------------------------------------------------------------------
     #Finger_lower_other_side is left IDT finger, wg_2 is right IDT finger
-    Finger_lower_other_side = Waveguide.make_at_port(Port(origin=(Finger_origin_x - Finger_left_offset , Finger_origin_y-5), angle=np.pi/2, width=Idt_finger_arm2))
-    Finger_lower_other_side.add_straight_segment(length = Finger_length)
+    Finger_lower_other_side = finger_bundle(Port(origin=(Finger_origin_x - Finger_left_offset , Finger_origin_y-5), angle=np.pi/2, width=Idt_finger_arm2), length=Finger_length)
 
-    Finger_upper_other_side = Waveguide.make_at_port(Port(origin=(Finger_origin_x - Finger_left_offset + Figer_gap_offset, Finger_origin_y ), angle=np.pi / 2, width=Idt_finger_arm2))
-    Finger_upper_other_side.add_straight_segment(length=Finger_length)
+    Finger_upper_other_side = finger_bundle(Port(origin=(Finger_origin_x - Finger_left_offset + Figer_gap_offset, Finger_origin_y ), angle=np.pi / 2, width=Idt_finger_arm2), length=Finger_length)
 
     #Make Small metal pad
     outer_corners_arm2_1 = [
@@ -232,5 +235,5 @@ if show == True:
 # Create the GDS file, un-comment if want to save!
 if show == False:
     print('saving........')
-    layout_cell.save('IDT_DC40_PHON_circ.gds')
+    save_gds('IDT_DC40_PHON_circ.gds', layout_cell)
     print('saved!!!')
\ No newline at end of file
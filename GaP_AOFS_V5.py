@@ -4,16 +4,23 @@ from gdshelpers.geometry.chip import Cell
 from gdshelpers.parts.waveguide import Waveguide
 from gdshelpers.parts.coupler import GratingCoupler
 from gdshelpers.parts.resonator import RingResonator
-from gdshelpers.layout import GridLayout
 from gdshelpers.parts.marker import CrossMarker
 from gdshelpers.parts.marker import SquareMarker
 from gdshelpers.helpers.positive_resist import convert_to_positive_resist
 from gdshelpers.parts.port import Port
 from shapely.geometry import Polygon
+import shapely.affinity
 from gdshelpers.geometry import geometric_union
 from gdshelpers.helpers.under_etching import create_holes_for_under_etching
 from gdshelpers.geometry.ebl_frame_generators import raith_marker_frame
-from gdshelpers.parts.text import Text
+from glyph_text import add_text, GlyphGridLayout
+from chirp_schedule import chirp_steps, group_widths, chirp_arms
+from idt_fingers import finger_bundle
+from builder_cache import memoized_builder, cache as builder_cache
+from shared_cells import add_reflected_cell, shared_cell
+from grating_couplers import grating_coupler_at_port
+from waveguide_path import WaveguidePath
+from disk_cache import disk_cached
 
 #The grating ff is the maximum duty cycle of the grating coupler
 #ap_max_ff is the minimum duty cycle of the grating coupler
@@ -52,11 +59,123 @@ chang_min_coupler_params = {
     'n_ap_gratings':20, #20
 }
 
-def make_frequency_shifter_waveguide(GC_param, input_angle):
-    # Create the Optical waveguide and GCs
+# The frequency shifter is close to mirror symmetric about the vertical line between its two input ports
+SHIFTER_AXIS = 10 + 180 / 2
 
-    # Optical GC on the left---------------------------------------------------------------------------
+
+def make_shifter_arm(arm, GC_param):
+    # one waveguide of the frequency shifter with its grating coupler, arm describes the waveguide as
+    #   {'origin': (x, y), 'angle': a, 'width': w, 'path': [('straight', length, final_width), ('bend', angle, radius)],
+    #    'stub_width': w, 'stub': length, 'tail': length}
+    # with the lengths of the stub cut out in front of the coupler ('stub') and of the waveguide up to the coupler ('tail')
+    # returns the waveguide with its coupler and stub, the coupler and the outline of the waveguide
+    wg = WaveguidePath.make_at_port(Port(arm['origin'], angle=arm['angle'], width=arm['width']))
+    for step in arm['path']:
+        if step[0] == 'bend':
+            wg.add_bend(step[1], radius=step[2])
+        else:
+            wg.add_straight_segment(length=step[1], final_width=step[2])
+    wg_to_GC = WaveguidePath.make_at_port(wg.current_port, width=arm['stub_width'])
+    wg_to_GC.add_straight_segment(length=arm['stub'])
+    wg.add_straight_segment(length=arm['tail'])
+    GC_shapely = grating_coupler_at_port(wg.current_port, positive_resist=5, **GC_param)
+
+    Input = wg.get_shapely_object().union(GC_shapely)
+    Input = Input.difference(wg_to_GC.get_shapely_object())
+    # the under-etching holes are placed along the outline from its first point, the segment union starts it where a
+    # Waveguide does
+    return Input, GC_shapely, wg.get_shapely_object(segment_union=True)
+
+
+def _mirrored_width(width):
+    # multi-width waveguides list their parts from left to right, the mirror image has them the other way round
+    if width is None or np.isscalar(width):
+        return width
+    return list(width)[::-1]
+
+
+def mirrored_arm(arm, axis_x):
+    # description of the mirror image of an arm (see make_shifter_arm) about the line x = axis_x
+    path = []
+    for step in arm['path']:
+        if step[0] == 'bend':
+            path.append(('bend', -step[1], step[2]))
+        else:
+            path.append(('straight', step[1], _mirrored_width(step[2])))
+    return dict(arm, origin=(2 * axis_x - arm['origin'][0], arm['origin'][1]), angle=np.pi - arm['angle'],
+                width=_mirrored_width(arm['width']), path=path)
+
+
+def _close(value, other):
+    # equal up to floating point rounding, for numbers, strings, None and nested lists, tuples, arrays and dicts
+    if isinstance(value, dict) or isinstance(other, dict):
+        return (isinstance(value, dict) and isinstance(other, dict) and value.keys() == other.keys()
+                and all(_close(value[key], other[key]) for key in value))
+    if isinstance(value, (list, tuple, np.ndarray)) or isinstance(other, (list, tuple, np.ndarray)):
+        return (not np.isscalar(value) and not np.isscalar(other) and value is not None and other is not None
+                and len(value) == len(other) and all(_close(v, o) for v, o in zip(value, other)))
+    if isinstance(value, str) or isinstance(other, str) or value is None or other is None:
+        return value == other
+    return bool(np.isclose(value, other, rtol=0, atol=1e-9))
+
+
+def is_mirror_image(arm, other, axis_x):
+    # True if the arm other is the mirror image of arm about the line x = axis_x, angles are compared modulo 2 pi
+    mirror = mirrored_arm(arm, axis_x)
+    turn = (mirror['angle'] - other['angle']) / (2 * np.pi)
+    return _close(turn, round(turn)) and _close(dict(mirror, angle=0), dict(other, angle=0))
+
+
+def reflected(geometry, axis_x):
+    # shapely geometry reflected about the line x = axis_x
+    return shapely.affinity.scale(geometry, xfact=-1, yfact=1, origin=(axis_x, 0))
+
+
+def make_shifter_arms(arms, GC_param, axis_x=SHIFTER_AXIS):
+    # builds the arms (wg1, wg2, wg3, wg4) of the frequency shifter with make_shifter_arm, wg1 and wg3 are left of
+    # axis_x and wg2 and wg4 right of it
+    # if wg2 and wg4 are the mirror images of wg1 and wg3, only the left arms are built and the right ones are their
+    # reflections (mirrored is then True, see add_shifter_arms), axis_x=None always builds all four
+    # returns (Inputs, GCs, outlines, mirrored), with the Inputs, GCs and outlines in the order of the arms
+    wg1_arm, wg2_arm, wg3_arm, wg4_arm = arms
+    left = [make_shifter_arm(arm, GC_param) for arm in (wg1_arm, wg3_arm)]
+    mirrored = axis_x is not None and is_mirror_image(wg1_arm, wg2_arm, axis_x) and \
+        is_mirror_image(wg3_arm, wg4_arm, axis_x)
+    if mirrored:
+        right = [[reflected(part, axis_x) for part in built] for built in left]
+    else:
+        right = [make_shifter_arm(arm, GC_param) for arm in (wg2_arm, wg4_arm)]
+    built = [left[0], right[0], left[1], right[1]]
+    Inputs, GCs, outlines = [[arm[i] for arm in built] for i in range(3)]
+    return Inputs, GCs, outlines, mirrored
+
+
+def add_shifter_arms(cell, half, Inputs, GCs, outlines, mirrored, axis_x=SHIFTER_AXIS):
+    # draws the arms of make_shifter_arms into cell (layer 1) with the under-etching holes around their grating
+    # couplers (layer 5)
+    # a mirrored shifter is drawn as its left half into the empty cell half, which cell refers to as it is and
+    # reflected about axis_x (see shared_cells.add_reflected_cell), with the holes of both halves: the ones around the
+    # left couplers are placed clear of all four arms, so their reflections are clear of them as well
+    holes_GC = create_holes_for_under_etching(underetch_parts=geometric_union(GCs[::2] if mirrored else GCs),
+                                              complete_structure=geometric_union(outlines),
+                                              hole_radius=8,
+                                              hole_distance=20,
+                                              hole_spacing=67,  # org 58
+                                              hole_length=0,
+                                              cap_style='square')
+    if mirrored:
+        half.add_to_layer(1, *Inputs[::2])
+        half.add_to_layer(5, holes_GC)
+        cell.add_cell(half, origin=(0, 0))
+        add_reflected_cell(cell, half, axis_x)
+    else:
+        cell.add_to_layer(1, *Inputs)
+        cell.add_to_layer(5, holes_GC)
+
+
+def shifter_arms(input_angle):
     # The waveguide number from left to right "wg3-wg1-wg2-wg4"
+    # returns the arms (wg1, wg2, wg3, wg4) and the extended waveguides wg1_extend, wg2_extend, wg1_ext_2
 
     incident_waveguide_expand_width = 1
     incident_waveguide_width = 0.3
@@ -65,92 +184,68 @@ def make_frequency_shifter_waveguide(GC_param, input_angle):
     incident_angle = input_angle * np.pi / 180
     Initial_angle = np.pi - incident_angle
 
+    # Optical GC on the left---------------------------------------------------------------------------
+    wg1_arm = {'origin': (10, 150), 'angle': Initial_angle, 'width': [3, 5, 3],
+               'path': [('straight', 125, [3, incident_waveguide_expand_width, 3]),
+                        ('straight', 100, [3, incident_waveguide_width, 3]),
+                        ('bend', -pi, 50),
+                        ('straight', 64, None),  # Straight wg before bending up
+                        ('bend', pi / 2 + incident_angle, 50)],
+               'stub_width': incident_waveguide_width, 'stub': 20, 'tail': 10}
 
-    wg1 = Waveguide.make_at_port(Port((10, 150), angle=Initial_angle, width=[3, 5, 3]))
-    wg1.add_straight_segment(length=125, final_width=[3, incident_waveguide_expand_width, 3])
-    wg1.add_straight_segment(length=100, final_width=[3, incident_waveguide_width, 3])
-    wg1.add_bend(-pi, radius=50)
-    wg1.add_straight_segment(length=64) #Straight wg before bending up
-    wg1.add_bend(pi / 2 + incident_angle, radius=50)
-    wg1_to_GC = Waveguide.make_at_port(wg1.current_port, width=incident_waveguide_width)
-    wg1_to_GC.add_straight_segment(length=20)
-    wg1.add_straight_segment(length=10)
-    GC2 = GratingCoupler.make_traditional_coupler_at_port(wg1.current_port, **GC_param)
-
-    wg1_shapely = wg1.get_shapely_object()
-    GC2_shapely = convert_to_positive_resist(GC2.get_shapely_object(), 5)
-    wg1_to_GC = wg1_to_GC.get_shapely_object()
-    Input_2 = wg1_shapely.union(GC2_shapely)
-    Input_2 = Input_2.difference(wg1_to_GC)
-
-    # -----------------------------------------------------------------------------------------------
     # Optical GC on the right-----------------------------------------------------------------------
-    # left_coupler = GratingCoupler.make_traditional_coupler(origin, angle=0, **coupler_params)
-    wg2 = Waveguide.make_at_port(Port((10 + 180, 150), angle=incident_angle, width=[3, 50, 3]))
-    wg2.add_straight_segment(length=130, final_width=[3, incident_waveguide_expand_width, 3])
-    wg2.add_straight_segment(length=100, final_width=[3, incident_waveguide_width, 3])
-    wg2.add_bend(pi, radius=50)
-    wg2.add_straight_segment(length=58) #Straight wg before bending up
-    wg2.add_bend(-pi / 2 - incident_angle, radius=49)
-    wg2_to_GC = Waveguide.make_at_port(wg2.current_port, width=incident_waveguide_width)
-    wg2_to_GC.add_straight_segment(length=10)
-    wg2.add_straight_segment(length=10)
-    GC3 = GratingCoupler.make_traditional_coupler_at_port(wg2.current_port, **GC_param)
-    #
-    wg2_shapely = wg2.get_shapely_object()
-    GC3_shapely = convert_to_positive_resist(GC3.get_shapely_object(), 5)
-    wg2_to_GC = wg2_to_GC.get_shapely_object()
-    Input_3 = wg2_shapely.union(GC3_shapely)
-    Input_3 = Input_3.difference(wg2_to_GC)
+    wg2_arm = {'origin': (10 + 180, 150), 'angle': incident_angle, 'width': [3, 50, 3],
+               'path': [('straight', 130, [3, incident_waveguide_expand_width, 3]),
+                        ('straight', 100, [3, incident_waveguide_width, 3]),
+                        ('bend', pi, 50),
+                        ('straight', 58, None),  # Straight wg before bending up
+                        ('bend', -pi / 2 - incident_angle, 49)],
+               'stub_width': incident_waveguide_width, 'stub': 10, 'tail': 10}
 
     # Extended waveguide for the other side's waveguide
-    wg1_extend = Waveguide.make_at_port(Port((10, 150), angle=-incident_angle, width=[3, 3, 3]))
+    wg1_extend = WaveguidePath.make_at_port(Port((10, 150), angle=-incident_angle, width=[3, 3, 3]))
     wg1_extend.add_straight_segment(length=190, final_width=[3, 50, 3])
-    wg1_ext_2 = Waveguide.make_at_port(Port((10, 150), angle=-incident_angle, width=[3, 3, 3]))
+    wg1_ext_2 = WaveguidePath.make_at_port(Port((10, 150), angle=-incident_angle, width=[3, 3, 3]))
     wg1_ext_2.add_straight_segment(length=190, final_width=[3, 20, 3])
 
-    wg2_extend = Waveguide.make_at_port(Port((10 + 180, 150), angle=np.pi + incident_angle, width=[3, 40, 3]))
+    wg2_extend = WaveguidePath.make_at_port(Port((10 + 180, 150), angle=np.pi + incident_angle, width=[3, 40, 3]))
     wg2_extend.add_straight_segment(length=195, final_width=[3, 10, 3])
 
     # WG on the bottom left
-    wg3 = Waveguide.make_at_port(wg2_extend.current_port)
-    wg3.add_straight_segment(length=215, final_width=[3, output_waveguide_fin_width, 3])
-    wg3.add_bend(-pi / 2 - incident_angle, radius=63.5)
-    wg3.add_straight_segment(length=307, final_width=[3, output_waveguide_fin_width, 3]) # LAST Straight to GC
-    wg3_to_GC = Waveguide.make_at_port(wg3.current_port, width=output_waveguide_fin_width)
-    wg3_to_GC.add_straight_segment(length=30)
-    wg3.add_straight_segment(length=30)
-    GC1 = GratingCoupler.make_traditional_coupler_at_port(wg3.current_port, **GC_param)
-
-    wg3_shapely = wg3.get_shapely_object()
-    GC1_shapely = convert_to_positive_resist(GC1.get_shapely_object(), 5)
-    wg3_to_GC = wg3_to_GC.get_shapely_object()
-    Input_1 = wg3_shapely.union(GC1_shapely)
-    Input_1 = Input_1.difference(wg3_to_GC)
+    wg3_arm = {'origin': wg2_extend.current_port.origin, 'angle': wg2_extend.current_port.angle,
+               'width': wg2_extend.current_port.width,
+               'path': [('straight', 215, [3, output_waveguide_fin_width, 3]),
+                        ('bend', -pi / 2 - incident_angle, 63.5),
+                        ('straight', 307, [3, output_waveguide_fin_width, 3])],  # LAST Straight to GC
+               'stub_width': output_waveguide_fin_width, 'stub': 30, 'tail': 30}
 
     # Driect transmission without deflection
-    wg4 = Waveguide.make_at_port(wg1_extend.current_port)
-    wg4.add_straight_segment(length=230, final_width=[3, output_waveguide_fin_width, 3])
-    wg4.add_bend(pi / 2 + incident_angle, radius=63.5)
-    wg4.add_straight_segment(length=338, final_width=[3, output_waveguide_fin_width, 3])
-    wg4_to_GC = Waveguide.make_at_port(wg4.current_port, width=output_waveguide_fin_width)
-    wg4_to_GC.add_straight_segment(length=5)
-    wg4.add_straight_segment(length=5)
-    GC4 = GratingCoupler.make_traditional_coupler_at_port(wg4.current_port, **GC_param)
-
-    wg4_shapely = wg4.get_shapely_object()
-    GC4_shapely = convert_to_positive_resist(GC4.get_shapely_object(), 5)
-    wg4_to_GC = wg4_to_GC.get_shapely_object()
-    Input_4 = wg4_shapely.union(GC4_shapely)
-    Input_4 = Input_4.difference(wg4_to_GC)
+    wg4_arm = {'origin': wg1_extend.current_port.origin, 'angle': wg1_extend.current_port.angle,
+               'width': wg1_extend.current_port.width,
+               'path': [('straight', 230, [3, output_waveguide_fin_width, 3]),
+                        ('bend', pi / 2 + incident_angle, 63.5),
+                        ('straight', 338, [3, output_waveguide_fin_width, 3])],
+               'stub_width': output_waveguide_fin_width, 'stub': 5, 'tail': 5}
+
+    return (wg1_arm, wg2_arm, wg3_arm, wg4_arm), (wg1_extend, wg2_extend, wg1_ext_2)
+
+
+@memoized_builder()
+def make_frequency_shifter_waveguide(GC_param, input_angle):
+    # Create the Optical waveguide and GCs, a mirror symmetric shifter only builds its left arms (see make_shifter_arms)
+    # wg1..wg4 are the outlines of the waveguides
+    arms, (wg1_extend, wg2_extend, wg1_ext_2) = shifter_arms(input_angle)
+    (Input_2, Input_3, Input_1, Input_4), (GC2_shapely, GC3_shapely, GC1_shapely, GC4_shapely), \
+        (wg1, wg2, wg3, wg4), mirrored = make_shifter_arms(arms, GC_param)
 
     return Input_1, Input_2, Input_3, Input_4, wg1_extend, wg2_extend, wg1_ext_2, \
            GC1_shapely, wg1, \
            GC2_shapely, wg2, \
            GC3_shapely, wg3, \
-           GC4_shapely, wg4
+           GC4_shapely, wg4, mirrored
 
 
+@memoized_builder(offsets={'ZnO_Top_left': 'x'})
 def make_IDT_Fingers(figer_widths, number_of_period, IDT_Aperature, ZnO_Top_left):
     # Creat the IDT
     # Change parameter here:
@@ -192,14 +287,12 @@ def make_IDT_Fingers(figer_widths, number_of_period, IDT_Aperature, ZnO_Top_left
 
     # IDT ON THE "right" GRATING COUPLER
     # Finger_lower is lower idt fingers, Finger_upper is upper IDT finger (on the horn on the right)
-    Finger_lower = Waveguide.make_at_port(
-        Port(origin=(Finger_origin_x - 5 + Finger_length, Finger_origin_y), angle=np.pi, width=Idt_finger_arm2))
-    Finger_lower.add_straight_segment(length=Finger_length)
+    Finger_lower = finger_bundle(
+        Port(origin=(Finger_origin_x - 5 + Finger_length, Finger_origin_y), angle=np.pi, width=Idt_finger_arm2), length=Finger_length)
 
-    Finger_upper = Waveguide.make_at_port(
+    Finger_upper = finger_bundle(
         Port(origin=(Finger_origin_x + Finger_length, Finger_origin_y + Figer_gap_offset), angle=np.pi,
-             width=Idt_finger_arm2))
-    Finger_upper.add_straight_segment(length=Finger_length)
+             width=Idt_finger_arm2), length=Finger_length)
 
     # SAME IDT ON THE "left" GRATING COUPLER ---------------------------------------------------------------------------------------------------
     # Finger_lower_other_side is left IDT finger, wg_2 is right IDT finger
@@ -255,6 +348,7 @@ def make_IDT_Fingers(figer_widths, number_of_period, IDT_Aperature, ZnO_Top_left
 
     return Finger_lower,  Finger_upper ,small_pad_arm1_1 ,small_pad_arm1_2
 
+@memoized_builder(offsets={'ZnO_Top_left': 'x'})
 def make_Chirp_IDT_Fingers(number_of_pairs, IDT_Aperature, ZnO_Top_left):
     # Creat the IDT
     # Change parameter here:
@@ -277,44 +371,16 @@ def make_Chirp_IDT_Fingers(number_of_pairs, IDT_Aperature, ZnO_Top_left):
     # Below DO NOT CHANGE ------------------------------------------------------------------------------
     #one_period_arm2 = [finger_width, finger_width + pitch]
 
-    Idt_finger_arm1 = []
-    Idt_finger_arm2 = []
     number_of_widths = 5
 
     start_width =0.16
     end_width = 0.18
     litho_corrected_width = 0.005
-    chirp_widths = np.linspace(start_width, end_width, num= number_of_widths )
-    chirp_widths = chirp_widths[::-1]
-
-    for index, width in enumerate(chirp_widths):
-        pitch = 3 * width
-
-        one_period_arm1 = [width - litho_corrected_width, pitch + litho_corrected_width]
-        one_period_arm2 = one_period_arm1
-
-        # Make sure the number of pairs can be equally devided into number of widths
-        if (number_of_pairs/number_of_widths).is_integer() == True:
-            devided_pairs = int(number_of_pairs/number_of_widths)
-            for i in range(devided_pairs):
+    chirp_widths = chirp_steps(start_width, end_width, number_of_widths)[::-1]
 
-                #Change the period of the last pair in this pair group to the next pair's period
-                if i == devided_pairs-1 and index != len(chirp_widths)-1 :
-                    pitch1 = chirp_widths[index+1] * 3 #pitch for the last ending finger
-                    pitch2 = width * 2 + chirp_widths[index+1] * 1 #pitch for the second last finger
-
-                    one_period_arm1 = [width - litho_corrected_width, pitch1 + litho_corrected_width]
-                    one_period_arm2 = [width - litho_corrected_width, pitch2 + litho_corrected_width]
-
-                    Idt_finger_arm1.extend(one_period_arm1)
-                    Idt_finger_arm2.extend(one_period_arm2)
-
-                else:
-                    Idt_finger_arm1.extend(one_period_arm1)
-                    Idt_finger_arm2.extend(one_period_arm2)
-        else:
-            print("%0.1f pairs can not be evenly devided into %0.1f different widths" %(number_of_pairs ,number_of_widths) )
-            break
+    # one finger width per pair (the pairs are split into number_of_widths groups, as evenly as possible) and the
+    # [finger, gap, ...] width lists of both arms, see chirp_schedule
+    Idt_finger_arm1, Idt_finger_arm2 = chirp_arms(group_widths(chirp_widths, number_of_pairs), litho_corrected_width)
 
     average_chirp_finger_width = (start_width + end_width)/2
     average_chirp_finger_pitch = average_chirp_finger_width* 4
@@ -324,15 +390,12 @@ def make_Chirp_IDT_Fingers(number_of_pairs, IDT_Aperature, ZnO_Top_left):
     # IDT ON THE "right" GRATING COUPLER
     # Finger_lower is lower idt fingers, Finger_upper is upper IDT finger (on the horn on the right)
 
-    Finger_lower = Waveguide.make_at_port(
-        Port(origin=(Finger_origin_x - 5 + Finger_length, Finger_origin_y), angle=np.pi, width=Idt_finger_arm1))
-    Finger_lower.add_straight_segment(length=Finger_length)
+    Finger_lower = finger_bundle(
+        Port(origin=(Finger_origin_x - 5 + Finger_length, Finger_origin_y), angle=np.pi, width=Idt_finger_arm1), length=Finger_length)
 
-    Finger_upper = Waveguide.make_at_port(
+    Finger_upper = finger_bundle(
         Port(origin=(Finger_origin_x + Finger_length, Finger_origin_y - 2*chirp_widths[0]+0.02 ), angle=np.pi,
-             width=Idt_finger_arm2))
-
-    Finger_upper.add_straight_segment(length=Finger_length)
+             width=Idt_finger_arm2), length=Finger_length)
 
 
     # Left small pad------------------------------------------------------------------------------------------------
@@ -427,6 +490,7 @@ def make_Chirp_IDT_Fingers(number_of_pairs, IDT_Aperature, ZnO_Top_left):
 
     return Finger_lower, Finger_upper, small_pad_arm1_1, small_pad_arm1_2, Big_pad1_1, Big_pad1_2
 
+@memoized_builder(offsets={'ZnO_Top_left': 'x'})
 def make_IDT_Fingers_pairs(figer_widths, number_of_period, IDT_Aperature, ZnO_Top_left):
     # Creat the IDT
     # Change parameter here:
@@ -468,22 +532,18 @@ def make_IDT_Fingers_pairs(figer_widths, number_of_period, IDT_Aperature, ZnO_To
 
     # IDT ON THE "right" GRATING COUPLER
     # Finger_lower is lower idt fingers, Finger_upper is upper IDT finger (on the horn on the right)
-    Finger_lower = Waveguide.make_at_port(
-        Port(origin=(Finger_origin_x - 5 + Finger_length, Finger_origin_y), angle=np.pi, width=Idt_finger_arm2))
-    Finger_lower.add_straight_segment(length=Finger_length)
+    Finger_lower = finger_bundle(
+        Port(origin=(Finger_origin_x - 5 + Finger_length, Finger_origin_y), angle=np.pi, width=Idt_finger_arm2), length=Finger_length)
 
-    Finger_upper = Waveguide.make_at_port(
+    Finger_upper = finger_bundle(
         Port(origin=(Finger_origin_x + Finger_length, Finger_origin_y + Figer_gap_offset), angle=np.pi,
-             width=Idt_finger_arm2))
-    Finger_upper.add_straight_segment(length=Finger_length)
+             width=Idt_finger_arm2), length=Finger_length)
 
     # SAME IDT ON THE "left" GRATING COUPLER ---------------------------------------------------------------------------------------------------
     #Finger_lower_other_side is left IDT finger, wg_2 is right IDT finger
-    Finger_lower_other_side = Waveguide.make_at_port(Port(origin=(Finger_origin_x - Finger_left_offset , Finger_origin_y-5), angle=np.pi/2, width=Idt_finger_arm2))
-    Finger_lower_other_side.add_straight_segment(length = Finger_length)
+    Finger_lower_other_side = finger_bundle(Port(origin=(Finger_origin_x - Finger_left_offset , Finger_origin_y-5), angle=np.pi/2, width=Idt_finger_arm2), length=Finger_length)
 
-    Finger_upper_other_side = Waveguide.make_at_port(Port(origin=(Finger_origin_x - Finger_left_offset + Figer_gap_offset, Finger_origin_y ), angle=np.pi / 2, width=Idt_finger_arm2))
-    Finger_upper_other_side.add_straight_segment(length=Finger_length)
+    Finger_upper_other_side = finger_bundle(Port(origin=(Finger_origin_x - Finger_left_offset + Figer_gap_offset, Finger_origin_y ), angle=np.pi / 2, width=Idt_finger_arm2), length=Finger_length)
 
     # Make Small metal pad
     outer_corners_arm2_1 = [
@@ -543,6 +603,7 @@ def make_IDT_Fingers_pairs(figer_widths, number_of_period, IDT_Aperature, ZnO_To
 
     return Finger_lower, Finger_upper, small_pad_arm1_1, small_pad_arm1_2 ,small_pad_arm2_1, small_pad_arm2_2
 
+@memoized_builder()
 def make_ZnO_pad(Finger_length, number_of_pairs):
     # Create ZnO
     start_f_w = 0.19
@@ -722,11 +783,12 @@ def generate_device_cell( sweep1, sweep2, cell_name):
     }
 
     #Make the frequency shifter
+    input_angle = 26
     Input_1, Input_2, Input_3, Input_4, wg1_extended, wg2_extended, wg1_ext_2, \
     GC1_shapely, wg1, \
     GC2_shapely, wg2, \
     GC3_shapely, wg3, \
-    GC4_shapely, wg4  = make_frequency_shifter_waveguide( GC_param= fifteenfifty_coup_param , input_angle=26)
+    GC4_shapely, wg4, mirrored = make_frequency_shifter_waveguide( GC_param= fifteenfifty_coup_param , input_angle=input_angle)
 
     # Make ZnO pads
     ZnO_pad_R, ZnO_extended, \
@@ -744,10 +806,6 @@ def generate_device_cell( sweep1, sweep2, cell_name):
     complete_structure = geometric_union([ ZnO_extended, Big_pad1_1, Big_pad1_2, wg1_ext_2,
                                            GC1_shapely, GC2_shapely, GC3_shapely, GC4_shapely ])
 
-    underetching_parts_GC = geometric_union([GC1_shapely, GC2_shapely, GC3_shapely, GC4_shapely])
-    complete_structure_GC = geometric_union([wg1, wg2, wg3, wg4])
-
-
     holes = create_holes_for_under_etching(underetch_parts=underetching_parts,
                                            complete_structure=complete_structure,
                                            hole_radius=5,
@@ -756,26 +814,28 @@ def generate_device_cell( sweep1, sweep2, cell_name):
                                            hole_length=29.7,
                                            cap_style='square')
 
-    holes_GC = create_holes_for_under_etching(underetch_parts=underetching_parts_GC,
-                                           complete_structure=complete_structure_GC,
-                                           hole_radius=8,
-                                           hole_distance=20,
-                                           hole_spacing=67,  # org 58
-                                           hole_length=0,
-                                           cap_style='square')
+    # The frequency shifter and the holes around its grating couplers do not depend on the swept parameters, they are
+    # drawn once into a shared cell (see shared_cells) that every device refers to. A mirror symmetric shifter is drawn
+    # as its left half and a reflected reference to it (see add_shifter_arms)
+    shifter_key = (tuple(sorted(fifteenfifty_coup_param.items())), input_angle)
+    frequency_shifter, new = shared_cell('freq_shifter', shifter_key)
+    if new:
+        half, _ = shared_cell('freq_shifter_half', shifter_key) if mirrored else (None, False)
+        add_shifter_arms(frequency_shifter, half, [Input_2, Input_3, Input_1, Input_4],
+                         [GC2_shapely, GC3_shapely, GC1_shapely, GC4_shapely], [wg1, wg2, wg3, wg4], mirrored)
 
 
-        # Add name to cell
-    text = Text(origin=[-500, -300], height=50, text=str(cell_name), alignment='left-bottom')
 
     #Add Cell
     cell = Cell('SIMPLE_RES_DEVICE r={:.4f} g={:.4f}'.format(sweep1, sweep2))
 
-    cell.add_to_layer(1, Input_1, Input_2, Input_3,Input_4, text)
+    cell.add_cell(frequency_shifter, origin=(0, 0))
+    # Add name to cell, drawn from shared glyph cells
+    add_text(cell, 1, origin=[-500, -300], height=50, text=str(cell_name), alignment='left-bottom')
     cell.add_to_layer(2, ZnO_pad_R)
     cell.add_to_layer(3, Finger_lower,  Finger_upper ,small_pad_arm1_1 ,small_pad_arm1_2)
     cell.add_to_layer(4, Big_pad1_1, Big_pad1_2)
-    cell.add_to_layer(5, holes, holes_GC, IDT_window, left_IDT_window, right_IDT_window, IDT_window_top_1, IDT_window_top_2)
+    cell.add_to_layer(5, holes, IDT_window, left_IDT_window, right_IDT_window, IDT_window_top_1, IDT_window_top_2)
 
     #cell.add_to_layer(5, left_coupler)
 
@@ -785,7 +845,10 @@ def generate_device_cell( sweep1, sweep2, cell_name):
 
 if __name__ == "__main__":
 
-    layout = GridLayout(title='AOFS5', frame_layer=0, text_layer=1, region_layer_type=None, horizontal_spacing=100, vertical_spacing=0)
+    layout = GlyphGridLayout(title='AOFS5', frame_layer=0, text_layer=1, region_layer_type=None, horizontal_spacing=100, vertical_spacing=0)
+
+    # device cells are kept in a disk cache, a rerun only builds the cells whose parameters or code changed
+    device_cell = disk_cached(generate_device_cell, 'AOFS_V5_cache')
 
     #Parameters wanted to scan-------------------------------------------
     #1550nm (best performance max_duty=0.80 grating_pitch=0.76)
@@ -821,7 +884,7 @@ if __name__ == "__main__":
 
         # Add column labels
         layout.add_column_label_row(('G_P= %0.2f' % 0.7 ), row_label='')
-        layout.add_to_row(generate_device_cell(  sweep1=90, sweep2=150, cell_name=7 ))
+        layout.add_to_row(device_cell(  sweep1=90, sweep2=150, cell_name=7 ))
         layout_cell, mapping = layout.generate_layout()
         layout_cell.show()
 
@@ -836,10 +899,14 @@ if __name__ == "__main__":
                 count =  count + 1
                 complete = count/total
                 print("Number of cell generated / Total cell = %0.1f/%0.1f (%0.2f%% complete) " %(count ,total,complete*100) )
-                layout.add_to_row(generate_device_cell( sweep1= param_1, sweep2=param_2, cell_name=count), alignment='center-center' , realign=True)
+                layout.add_to_row(device_cell( sweep1= param_1, sweep2=param_2, cell_name=count), alignment='center-center' , realign=True)
 
         layout_cell, mapping = layout.generate_layout()
 
+        # builder cache hits and misses of the sweep
+        print(builder_cache.report())
+        print(device_cell.report())
+
         # Show and then save the layout!
         make_EBL_markers(layout_cell)
         layout_cell.add_ebl_frame(layer=1,size=40, frame_generator=raith_marker_frame, n=2)
@@ -4,7 +4,6 @@ from gdshelpers.geometry.chip import Cell
 from gdshelpers.parts.waveguide import Waveguide
 from gdshelpers.parts.coupler import GratingCoupler
 from gdshelpers.parts.resonator import RingResonator
-from gdshelpers.layout import GridLayout
 from gdshelpers.parts.marker import CrossMarker
 from gdshelpers.parts.marker import SquareMarker
 from gdshelpers.helpers.positive_resist import convert_to_positive_resist
@@ -13,7 +12,14 @@ from shapely.geometry import Polygon
 from gdshelpers.geometry import geometric_union
 from gdshelpers.helpers.under_etching import create_holes_for_under_etching
 from gdshelpers.geometry.ebl_frame_generators import raith_marker_frame
-from gdshelpers.parts.text import Text
+from glyph_text import add_text, GlyphGridLayout
+from chirp_schedule import chirp_steps, group_widths, chirp_arms
+from idt_fingers import finger_bundle
+from builder_cache import memoized_builder, cache as builder_cache
+from shared_cells import shared_cell
+from grating_couplers import grating_coupler_at_port
+from waveguide_path import WaveguidePath
+from disk_cache import disk_cached
 #The grating ff is the maximum duty cycle of the grating coupler
 #ap_max_ff is the minimum duty cycle of the grating coupler
 
@@ -51,6 +57,7 @@ chang_min_coupler_params = {
     'n_ap_gratings':20, #20
 }
 
+@memoized_builder()
 def make_frequency_shifter_waveguide(GC_param, input_angle):
     # Create the Optical waveguide and GCs
 
@@ -65,19 +72,18 @@ def make_frequency_shifter_waveguide(GC_param, input_angle):
     Initial_angle = np.pi - incident_angle
 
 
-    wg1 = Waveguide.make_at_port(Port((-30, 150), angle=Initial_angle, width=[3, 5, 3]))
+    wg1 = WaveguidePath.make_at_port(Port((-30, 150), angle=Initial_angle, width=[3, 5, 3]))
     wg1.add_straight_segment(length=100, final_width=[3, incident_waveguide_expand_width, 3])
     wg1.add_straight_segment(length=50, final_width=[3, incident_waveguide_width, 3])
     wg1.add_bend(-pi, radius=50)
     wg1.add_straight_segment(length=49) #Straight wg before bending up
     wg1.add_bend(pi / 2 + incident_angle, radius=50)
-    wg1_to_GC = Waveguide.make_at_port(wg1.current_port, width=incident_waveguide_width)
+    wg1_to_GC = WaveguidePath.make_at_port(wg1.current_port, width=incident_waveguide_width)
     wg1_to_GC.add_straight_segment(length=5)
     wg1.add_straight_segment(length=5)
-    GC2 = GratingCoupler.make_traditional_coupler_at_port(wg1.current_port, **GC_param)
+    GC2_shapely = grating_coupler_at_port(wg1.current_port, positive_resist=5, **GC_param)
 
     wg1_shapely = wg1.get_shapely_object()
-    GC2_shapely = convert_to_positive_resist(GC2.get_shapely_object(), 5)
     wg1_to_GC = wg1_to_GC.get_shapely_object()
     Input_2 = wg1_shapely.union(GC2_shapely)
     Input_2 = Input_2.difference(wg1_to_GC)
@@ -85,63 +91,61 @@ def make_frequency_shifter_waveguide(GC_param, input_angle):
     # -----------------------------------------------------------------------------------------------
     # Optical GC on the right-----------------------------------------------------------------------
     # left_coupler = GratingCoupler.make_traditional_coupler(origin, angle=0, **coupler_params)
-    wg2 = Waveguide.make_at_port(Port((-30 + 250, 150), angle=incident_angle, width=[3, 15, 3]))
+    wg2 = WaveguidePath.make_at_port(Port((-30 + 250, 150), angle=incident_angle, width=[3, 15, 3]))
     wg2.add_straight_segment(length=100, final_width=[3, incident_waveguide_expand_width, 3])
     wg2.add_straight_segment(length=50, final_width=[3, incident_waveguide_width, 3])
     wg2.add_bend(pi, radius=50)
     wg2.add_straight_segment(length=50) #Straight wg before bending up
     wg2.add_bend(-pi / 2 - incident_angle, radius=49)
-    wg2_to_GC = Waveguide.make_at_port(wg2.current_port, width=incident_waveguide_width)
+    wg2_to_GC = WaveguidePath.make_at_port(wg2.current_port, width=incident_waveguide_width)
     wg2_to_GC.add_straight_segment(length=5)
     wg2.add_straight_segment(length=5)
-    GC3 = GratingCoupler.make_traditional_coupler_at_port(wg2.current_port, **GC_param)
+    GC3_shapely = grating_coupler_at_port(wg2.current_port, positive_resist=5, **GC_param)
     #
     wg2_shapely = wg2.get_shapely_object()
-    GC3_shapely = convert_to_positive_resist(GC3.get_shapely_object(), 5)
     wg2_to_GC = wg2_to_GC.get_shapely_object()
     Input_3 = wg2_shapely.union(GC3_shapely)
     Input_3 = Input_3.difference(wg2_to_GC)
 
     # Extended waveguide for the other side's waveguide
-    wg1_extend = Waveguide.make_at_port(Port((-30, 150), angle=-incident_angle, width=[3, 1.5, 3]))
+    wg1_extend = WaveguidePath.make_at_port(Port((-30, 150), angle=-incident_angle, width=[3, 1.5, 3]))
     wg1_extend.add_straight_segment(length=250, final_width=[3, 15, 3])
-    wg2_extend = Waveguide.make_at_port(Port((-30 + 250, 150), angle=np.pi + incident_angle, width=[3, 3, 3]))
+    wg2_extend = WaveguidePath.make_at_port(Port((-30 + 250, 150), angle=np.pi + incident_angle, width=[3, 3, 3]))
     wg2_extend.add_straight_segment(length=250, final_width=[3, 5, 3])
 
     # WG on the bottom left
-    wg3 = Waveguide.make_at_port(wg2_extend.current_port)
+    wg3 = WaveguidePath.make_at_port(wg2_extend.current_port)
     wg3.add_straight_segment(length=188, final_width=[3, output_waveguide_fin_width, 3])
     wg3.add_bend(-pi / 2 - incident_angle, radius=63.5)
     wg3.add_straight_segment(length=248, final_width=[3, output_waveguide_fin_width, 3]) # LAST Straight to GC
-    wg3_to_GC = Waveguide.make_at_port(wg3.current_port, width=output_waveguide_fin_width)
+    wg3_to_GC = WaveguidePath.make_at_port(wg3.current_port, width=output_waveguide_fin_width)
     wg3_to_GC.add_straight_segment(length=5)
     wg3.add_straight_segment(length=5)
-    GC1 = GratingCoupler.make_traditional_coupler_at_port(wg3.current_port, **GC_param)
+    GC1_shapely = grating_coupler_at_port(wg3.current_port, positive_resist=5, **GC_param)
 
     wg3_shapely = wg3.get_shapely_object()
-    GC1_shapely = convert_to_positive_resist(GC1.get_shapely_object(), 5)
     wg3_to_GC = wg3_to_GC.get_shapely_object()
     Input_1 = wg3_shapely.union(GC1_shapely)
     Input_1 = Input_1.difference(wg3_to_GC)
 
     # Driect transmission without deflection
-    wg4 = Waveguide.make_at_port(wg1_extend.current_port)
+    wg4 = WaveguidePath.make_at_port(wg1_extend.current_port)
     wg4.add_straight_segment(length=188, final_width=[3, output_waveguide_fin_width, 3])
     wg4.add_bend(pi / 2 + incident_angle, radius=63.5)
     wg4.add_straight_segment(length=248, final_width=[3, output_waveguide_fin_width, 3])
-    wg4_to_GC = Waveguide.make_at_port(wg4.current_port, width=output_waveguide_fin_width)
+    wg4_to_GC = WaveguidePath.make_at_port(wg4.current_port, width=output_waveguide_fin_width)
     wg4_to_GC.add_straight_segment(length=5)
     wg4.add_straight_segment(length=5)
-    GC4 = GratingCoupler.make_traditional_coupler_at_port(wg4.current_port, **GC_param)
+    GC4_shapely = grating_coupler_at_port(wg4.current_port, positive_resist=5, **GC_param)
 
     wg4_shapely = wg4.get_shapely_object()
-    GC4_shapely = convert_to_positive_resist(GC4.get_shapely_object(), 5)
     wg4_to_GC = wg4_to_GC.get_shapely_object()
     Input_4 = wg4_shapely.union(GC4_shapely)
     Input_4 = Input_4.difference(wg4_to_GC)
 
     return Input_1, Input_2, Input_3, Input_4, wg1_extend, wg2_extend
 
+@memoized_builder(offsets={'ZnO_Top_left': 'x'})
 def make_IDT_Fingers(figer_widths, number_of_period, IDT_Aperature, ZnO_Top_left):
     # Creat the IDT
     # Change parameter here:
@@ -183,14 +187,12 @@ def make_IDT_Fingers(figer_widths, number_of_period, IDT_Aperature, ZnO_Top_left
 
     # IDT ON THE "right" GRATING COUPLER
     # Finger_lower is lower idt fingers, Finger_upper is upper IDT finger (on the horn on the right)
-    Finger_lower = Waveguide.make_at_port(
-        Port(origin=(Finger_origin_x - 5 + Finger_length, Finger_origin_y), angle=np.pi, width=Idt_finger_arm2))
-    Finger_lower.add_straight_segment(length=Finger_length)
+    Finger_lower = finger_bundle(
+        Port(origin=(Finger_origin_x - 5 + Finger_length, Finger_origin_y), angle=np.pi, width=Idt_finger_arm2), length=Finger_length)
 
-    Finger_upper = Waveguide.make_at_port(
+    Finger_upper = finger_bundle(
         Port(origin=(Finger_origin_x + Finger_length, Finger_origin_y + Figer_gap_offset), angle=np.pi,
-             width=Idt_finger_arm2))
-    Finger_upper.add_straight_segment(length=Finger_length)
+             width=Idt_finger_arm2), length=Finger_length)
 
     # SAME IDT ON THE "left" GRATING COUPLER ---------------------------------------------------------------------------------------------------
     # Finger_lower_other_side is left IDT finger, wg_2 is right IDT finger
@@ -246,6 +248,7 @@ def make_IDT_Fingers(figer_widths, number_of_period, IDT_Aperature, ZnO_Top_left
 
     return Finger_lower,  Finger_upper ,small_pad_arm1_1 ,small_pad_arm1_2
 
+@memoized_builder(offsets={'ZnO_Top_left': 'x'})
 def make_IDT_Fingers_v2(figer_widths, number_of_pairs, IDT_Aperature, ZnO_Top_left):
     # Creat the IDT
     # Change parameter here:
@@ -292,14 +295,12 @@ def make_IDT_Fingers_v2(figer_widths, number_of_pairs, IDT_Aperature, ZnO_Top_le
     # IDT ON THE "right" GRATING COUPLER
     # Finger_lower is lower idt fingers, Finger_upper is upper IDT finger (on the horn on the right)
 
-    Finger_lower = Waveguide.make_at_port(
-        Port(origin=(Finger_origin_x - 5 + Finger_length, Finger_origin_y), angle=np.pi, width=Idt_finger_arm2))
-    Finger_lower.add_straight_segment(length=Finger_length)
+    Finger_lower = finger_bundle(
+        Port(origin=(Finger_origin_x - 5 + Finger_length, Finger_origin_y), angle=np.pi, width=Idt_finger_arm2), length=Finger_length)
 
-    Finger_upper = Waveguide.make_at_port(
+    Finger_upper = finger_bundle(
         Port(origin=(Finger_origin_x + Finger_length, Finger_origin_y + Chirped_finger_gap_offsets), angle=np.pi,
-             width=Idt_finger_arm2))
-    Finger_upper.add_straight_segment(length=Finger_length)
+             width=Idt_finger_arm2), length=Finger_length)
 
 
     # Left small pad------------------------------------------------------------------------------------------------
@@ -377,6 +378,7 @@ def make_IDT_Fingers_v2(figer_widths, number_of_pairs, IDT_Aperature, ZnO_Top_le
 
     return Finger_lower, Finger_upper, small_pad_arm1_1, small_pad_arm1_2, Big_pad1_1, Big_pad1_2
 
+@memoized_builder(offsets={'ZnO_Top_left': 'x'})
 def make_IDT_Fingers_pairs(figer_widths, number_of_pairs, IDT_Aperature, ZnO_Top_left, prop_length):
     # Creat the IDT
     # Change parameter here:
@@ -429,22 +431,18 @@ def make_IDT_Fingers_pairs(figer_widths, number_of_pairs, IDT_Aperature, ZnO_Top
 
     # IDT ON THE "right" GRATING COUPLER
     # Finger_lower is lower idt fingers, Finger_upper is upper IDT finger (on the horn on the right)
-    Finger_lower = Waveguide.make_at_port(
-        Port(origin=(Finger_origin_x , Finger_origin_y - 5), angle=np.pi/2, width=Idt_finger_arm2))
-    Finger_lower.add_straight_segment(length=Finger_length)
+    Finger_lower = finger_bundle(
+        Port(origin=(Finger_origin_x , Finger_origin_y - 5), angle=np.pi/2, width=Idt_finger_arm2), length=Finger_length)
 
-    Finger_upper = Waveguide.make_at_port(
+    Finger_upper = finger_bundle(
         Port(origin=(Finger_origin_x + Chirped_finger_gap_offsets, Finger_origin_y ), angle=np.pi/2,
-             width=Idt_finger_arm2))
-    Finger_upper.add_straight_segment(length=Finger_length)
+             width=Idt_finger_arm2), length=Finger_length)
 
     # SAME IDT ON THE "left" GRATING COUPLER ---------------------------------------------------------------------------------------------------
     # Finger_lower_other_side is left IDT finger, wg_2 is right IDT finger
-    Finger_lower_other_side = Waveguide.make_at_port(Port(origin=(Finger_origin_x - Finger_left_offset , Finger_origin_y-5), angle=np.pi/2, width=Idt_finger_arm2))
-    Finger_lower_other_side.add_straight_segment(length = Finger_length)
+    Finger_lower_other_side = finger_bundle(Port(origin=(Finger_origin_x - Finger_left_offset , Finger_origin_y-5), angle=np.pi/2, width=Idt_finger_arm2), length=Finger_length)
 
-    Finger_upper_other_side = Waveguide.make_at_port(Port(origin=(Finger_origin_x - Finger_left_offset + Chirped_finger_gap_offsets, Finger_origin_y ), angle=np.pi / 2, width=Idt_finger_arm2))
-    Finger_upper_other_side.add_straight_segment(length=Finger_length)
+    Finger_upper_other_side = finger_bundle(Port(origin=(Finger_origin_x - Finger_left_offset + Chirped_finger_gap_offsets, Finger_origin_y ), angle=np.pi / 2, width=Idt_finger_arm2), length=Finger_length)
 
     # Make Small metal pad
     shift_2 = 10
@@ -505,6 +503,7 @@ def make_IDT_Fingers_pairs(figer_widths, number_of_pairs, IDT_Aperature, ZnO_Top
 
     return Finger_lower, Finger_upper, Finger_lower_other_side, Finger_upper_other_side, small_pad_arm1_1, small_pad_arm1_2 ,small_pad_arm2_1, small_pad_arm2_2
 
+@memoized_builder(offsets={'ZnO_Top_left': 'x'})
 def make_Split_IDT_Fingers_pairs(figer_widths, number_of_pairs, IDT_Aperature, ZnO_Top_left, prop_length):
     # Creat the IDT
     # Change parameter here:
@@ -546,41 +545,33 @@ def make_Split_IDT_Fingers_pairs(figer_widths, number_of_pairs, IDT_Aperature, Z
 
     # IDT ON THE "right" GRATING COUPLER
     # Finger_lower1 is lower idt fingers, Finger_upper1 is upper IDT finger (on the horn on the right)
-    Finger_lower1 = Waveguide.make_at_port(
-        Port(origin=(Finger_origin_x , Finger_origin_y - 5), angle=np.pi/2, width=Idt_finger_arm2))
-    Finger_lower1.add_straight_segment(length=Finger_length)
+    Finger_lower1 = finger_bundle(
+        Port(origin=(Finger_origin_x , Finger_origin_y - 5), angle=np.pi/2, width=Idt_finger_arm2), length=Finger_length)
 
-    Finger_lower2 = Waveguide.make_at_port(
-        Port(origin=(Finger_origin_x + 2*figer_width, Finger_origin_y - 5), angle=np.pi/2, width=Idt_finger_arm2))
-    Finger_lower2.add_straight_segment(length=Finger_length)
+    Finger_lower2 = finger_bundle(
+        Port(origin=(Finger_origin_x + 2*figer_width, Finger_origin_y - 5), angle=np.pi/2, width=Idt_finger_arm2), length=Finger_length)
 
-    Finger_upper1 = Waveguide.make_at_port(
+    Finger_upper1 = finger_bundle(
         Port(origin=(Finger_origin_x + Figer_gap_offset, Finger_origin_y ), angle=np.pi/2,
-             width=Idt_finger_arm2))
-    Finger_upper1.add_straight_segment(length=Finger_length)
+             width=Idt_finger_arm2), length=Finger_length)
 
-    Finger_upper2 = Waveguide.make_at_port(
+    Finger_upper2 = finger_bundle(
         Port(origin=(Finger_origin_x + Figer_gap_offset + 2*figer_width, Finger_origin_y), angle=np.pi / 2,
-             width=Idt_finger_arm2))
-    Finger_upper2.add_straight_segment(length=Finger_length)
+             width=Idt_finger_arm2), length=Finger_length)
 
     # SAME IDT ON THE "left" GRATING COUPLER ---------------------------------------------------------------------------------------------------
     # Finger_lower_other_side is left IDT finger, wg_2 is right IDT finger
-    Finger_lower_other_side1 = Waveguide.make_at_port(Port(origin=(Finger_origin_x - Finger_left_offset , Finger_origin_y-5), angle=np.pi/2, width=Idt_finger_arm2))
-    Finger_lower_other_side1.add_straight_segment(length = Finger_length)
+    Finger_lower_other_side1 = finger_bundle(Port(origin=(Finger_origin_x - Finger_left_offset , Finger_origin_y-5), angle=np.pi/2, width=Idt_finger_arm2), length=Finger_length)
 
-    Finger_lower_other_side2 = Waveguide.make_at_port(
+    Finger_lower_other_side2 = finger_bundle(
         Port(origin=(Finger_origin_x + 2*figer_width - Finger_left_offset, Finger_origin_y - 5), angle=np.pi / 2,
-             width=Idt_finger_arm2))
-    Finger_lower_other_side2.add_straight_segment(length=Finger_length)
+             width=Idt_finger_arm2), length=Finger_length)
 
-    Finger_upper_other_side1 = Waveguide.make_at_port(Port(origin=(Finger_origin_x - Finger_left_offset + Figer_gap_offset, Finger_origin_y ), angle=np.pi / 2, width=Idt_finger_arm2))
-    Finger_upper_other_side1.add_straight_segment(length=Finger_length)
+    Finger_upper_other_side1 = finger_bundle(Port(origin=(Finger_origin_x - Finger_left_offset + Figer_gap_offset, Finger_origin_y ), angle=np.pi / 2, width=Idt_finger_arm2), length=Finger_length)
 
-    Finger_upper_other_side2 = Waveguide.make_at_port(
+    Finger_upper_other_side2 = finger_bundle(
         Port(origin=(Finger_origin_x + 2*figer_width - Finger_left_offset + Figer_gap_offset, Finger_origin_y), angle=np.pi / 2,
-             width=Idt_finger_arm2))
-    Finger_upper_other_side2.add_straight_segment(length=Finger_length)
+             width=Idt_finger_arm2), length=Finger_length)
 
     # Make Small metal pad
     shift_2 = number_of_pairs*(pitch)/1.5
@@ -781,6 +772,7 @@ def make_Split_IDT_Fingers_pairs(figer_widths, number_of_pairs, IDT_Aperature, Z
            small_pad_arm1_1, small_pad_arm1_2 ,small_pad_arm2_1, small_pad_arm2_2, \
            Big_pad1_1, Big_pad1_2, Big_pad2_1, Big_pad2_2
 
+@memoized_builder()
 def make_Chirp_IDT_Fingers_pairs(figer_widths, number_of_pairs, IDT_Aperature, prop_length):
     # Creat the IDT
     # Change parameter here:
@@ -803,47 +795,16 @@ def make_Chirp_IDT_Fingers_pairs(figer_widths, number_of_pairs, IDT_Aperature, p
     # Below DO NOT CHANGE ------------------------------------------------------------------------------
     # one_period_arm2 = [finger_width, finger_width + pitch]
 
-    Idt_finger_arm1 = []
-    Idt_finger_arm2 = []
     number_of_widths = 5
 
     start_width = 0.17
     end_width = 0.17
     litho_corrected_width = 0.005 #0.2 for 1um
-    chirp_widths = np.linspace(start_width,end_width,number_of_widths)
-    chirp_widths = chirp_widths[::-1]
-
-
-    for index, width in enumerate(chirp_widths):
-        pitch = 3 * width
-
-
-        one_period_arm1 = [width - litho_corrected_width, pitch + litho_corrected_width]
-        one_period_arm2 = one_period_arm1
-
-        # Make sure the number of pairs can be equally devided into number of widths
-        if (number_of_pairs / number_of_widths).is_integer() == True:
-            devided_pairs = int(number_of_pairs / number_of_widths)
-            for i in range(devided_pairs):
-
-                # Change the period of the last pair in this pair group to the next pair's period
-                if i == devided_pairs - 1 and index != len(chirp_widths) - 1:
-                    pitch1 = chirp_widths[index + 1] * 3  # pitch for the last ending finger
-                    pitch2 = width * 2 + chirp_widths[index + 1] * 1  # pitch for the second last finger
+    chirp_widths = chirp_steps(start_width, end_width, number_of_widths)[::-1]
 
-                    one_period_arm1 = [width - litho_corrected_width, pitch1 + litho_corrected_width]
-                    one_period_arm2 = [width - litho_corrected_width, pitch2 + litho_corrected_width]
-
-                    Idt_finger_arm1.extend(one_period_arm1)
-                    Idt_finger_arm2.extend(one_period_arm2)
-
-                else:
-                    Idt_finger_arm1.extend(one_period_arm1)
-                    Idt_finger_arm2.extend(one_period_arm2)
-        else:
-            print("%0.1f pairs can not be evenly devided into %0.1f different widths" % (
-            number_of_pairs, number_of_widths))
-            break
+    # one finger width per pair (the pairs are split into number_of_widths groups, as evenly as possible) and the
+    # [finger, gap, ...] width lists of both arms, see chirp_schedule
+    Idt_finger_arm1, Idt_finger_arm2 = chirp_arms(group_widths(chirp_widths, number_of_pairs), litho_corrected_width)
     # Below DO NOT CHANGE ------------------------------------------------------------------------------
 
     # IDT ON THE "right" GRATING COUPLER
@@ -851,25 +812,21 @@ def make_Chirp_IDT_Fingers_pairs(figer_widths, number_of_pairs, IDT_Aperature, p
     # If you want to make chirp fingers, add 0.02 to the finger_upper1 line e.g.  Finger_origin_x + 2*(chirp_widths[-1]) +0.02
     # Funger_upper_other_side1 = Finger_origin_x - Finger_left_offset - 2*(chirp_widths[-1]) - 0.02
 
-    Finger_lower1 = Waveguide.make_at_port(
-        Port(origin=(Finger_origin_x , Finger_origin_y - 5 + IDT_Aperature), angle=-np.pi/2, width=Idt_finger_arm1))
-    Finger_lower1.add_straight_segment(length=Finger_length)
+    Finger_lower1 = finger_bundle(
+        Port(origin=(Finger_origin_x , Finger_origin_y - 5 + IDT_Aperature), angle=-np.pi/2, width=Idt_finger_arm1), length=Finger_length)
 
 
-    Finger_upper1 = Waveguide.make_at_port(
+    Finger_upper1 = finger_bundle(
         Port(origin=(Finger_origin_x + 2*(chirp_widths[-1]) , Finger_origin_y + IDT_Aperature), angle=-np.pi/2,
-             width=Idt_finger_arm2))
-    Finger_upper1.add_straight_segment(length=Finger_length)
+             width=Idt_finger_arm2), length=Finger_length)
 
 
     # SAME IDT ON THE "left" side ---------------------------------------------------------------------------------------------------
     # Finger_lower_other_side is left IDT finger, wg_2 is right IDT finger
-    Finger_lower_other_side1 = Waveguide.make_at_port(Port(origin=(Finger_origin_x - Finger_left_offset , Finger_origin_y-5), angle=np.pi/2, width=Idt_finger_arm1))
-    Finger_lower_other_side1.add_straight_segment(length = Finger_length)
+    Finger_lower_other_side1 = finger_bundle(Port(origin=(Finger_origin_x - Finger_left_offset , Finger_origin_y-5), angle=np.pi/2, width=Idt_finger_arm1), length=Finger_length)
 
 
-    Finger_upper_other_side1 = Waveguide.make_at_port(Port(origin=(Finger_origin_x - Finger_left_offset - 2*(chirp_widths[-1]), Finger_origin_y ), angle=np.pi / 2, width=Idt_finger_arm2))
-    Finger_upper_other_side1.add_straight_segment(length=Finger_length) #+ - 0.4 for 1um finger
+    Finger_upper_other_side1 = finger_bundle(Port(origin=(Finger_origin_x - Finger_left_offset - 2*(chirp_widths[-1]), Finger_origin_y ), angle=np.pi / 2, width=Idt_finger_arm2), length=Finger_length) #+ - 0.4 for 1um finger
 
 
     # Make Small metal pad
@@ -1091,6 +1048,7 @@ def make_Chirp_IDT_Fingers_pairs(figer_widths, number_of_pairs, IDT_Aperature, p
            top_right_x, y_mid_IDT, shift_2, \
            right_top_small_pad_TL_X, right_top_small_pad_TL_Y
 
+@memoized_builder(offsets={'top_right_x': 'x', 'y_mid_IDT': 'y'})
 def make_Acoustic_waveguides(init_width, fin_width, prop_length, top_right_x, y_mid_IDT, L_IDT_area ):
     phononicWG_initial_width = init_width
     phononicWG_fin_width = fin_width
@@ -1098,7 +1056,7 @@ def make_Acoustic_waveguides(init_width, fin_width, prop_length, top_right_x, y_
     L_initial_width = L_IDT_area * 1.8
     # Create the Acoustic waveguide
     # left_coupler = GratingCoupler.make_traditional_coupler(origin, angle=0, **coupler_params)
-    Aco_wg = Waveguide.make_at_port(Port((top_right_x - Wg_x_offset, y_mid_IDT - 5 ), angle=-np.pi, width=phononicWG_initial_width))
+    Aco_wg = WaveguidePath.make_at_port(Port((top_right_x - Wg_x_offset, y_mid_IDT - 5 ), angle=-np.pi, width=phononicWG_initial_width))
     Aco_wg.add_straight_segment(length=L_initial_width)
     Aco_wg.add_straight_segment(length=20, final_width=phononicWG_fin_width) # Ini to trans _90um
     # wg1.add_bend(-pi/2, radius=50)
@@ -1110,6 +1068,7 @@ def make_Acoustic_waveguides(init_width, fin_width, prop_length, top_right_x, y_
     # right_coupler = GratingCoupler.make_traditional_coupler_at_port(wg2.current_port, **coupler_params)
     return Aco_wg
 
+@memoized_builder(offsets={'right_top_small_pad_TL_X': 'x', 'right_top_small_pad_TL_Y': 'y'})
 def make_ZnO_pad(Finger_length, right_top_small_pad_TL_X, right_top_small_pad_TL_Y):
     # Create ZnO
 
@@ -1182,6 +1141,10 @@ def generate_device_cell( sweep1, sweep2, cell_name):
 
 
 
+    # IDT and ZnO pad parameters, the same for every device of the sweep
+    figer_widths, number_of_pairs, IDT_Aperature, prop_length = 1, 55, 50, 200
+    ZnO_length = 50
+
     #Make the IDT fingers
     Finger_lower1, Finger_upper1, \
     Finger_lower_other_side1, Finger_upper_other_side1,\
@@ -1189,13 +1152,13 @@ def generate_device_cell( sweep1, sweep2, cell_name):
     small_pad_arm2_1, small_pad_arm2_2,\
     Big_pad1_1, Big_pad1_2, Big_pad2_1, Big_pad2_2, \
     top_right_x, y_mid_IDT, shift_2, \
-    right_top_small_pad_TL_X, right_top_small_pad_TL_Y  = make_Chirp_IDT_Fingers_pairs(figer_widths=1,
-                                                                number_of_pairs=55,
-                                                                IDT_Aperature=50,
-                                                                prop_length = 200
+    right_top_small_pad_TL_X, right_top_small_pad_TL_Y  = make_Chirp_IDT_Fingers_pairs(figer_widths=figer_widths,
+                                                                number_of_pairs=number_of_pairs,
+                                                                IDT_Aperature=IDT_Aperature,
+                                                                prop_length = prop_length
                                                                  )
     # Make ZnO pads
-    ZnO_pad_R, ZnO_pad_L = make_ZnO_pad(Finger_length=50,
+    ZnO_pad_R, ZnO_pad_L = make_ZnO_pad(Finger_length=ZnO_length,
                             right_top_small_pad_TL_X = right_top_small_pad_TL_X,
                             right_top_small_pad_TL_Y= right_top_small_pad_TL_Y)
 
@@ -1206,29 +1169,37 @@ def generate_device_cell( sweep1, sweep2, cell_name):
                                       top_right_x= top_right_x,
                                       y_mid_IDT= y_mid_IDT, L_IDT_area= shift_2 )
 
-    Fingers = geometric_union([Finger_lower1, Finger_upper1,
-                               Finger_lower_other_side1, Finger_upper_other_side1,
-                               small_pad_arm1_1, small_pad_arm1_2,
-                               small_pad_arm2_1, small_pad_arm2_2
-                               ])
+    # The IDTs and their pads do not depend on the swept waveguide widths, they are drawn once into a shared cell
+    # (see shared_cells) that every device refers to
+    transducers, new = shared_cell('phononic_idts', (figer_widths, number_of_pairs, IDT_Aperature, prop_length,
+                                                      ZnO_length))
+    if new:
+        Fingers = geometric_union([Finger_lower1, Finger_upper1,
+                                   Finger_lower_other_side1, Finger_upper_other_side1,
+                                   small_pad_arm1_1, small_pad_arm1_2,
+                                   small_pad_arm2_1, small_pad_arm2_2
+                                   ])
 
-    Pads = geometric_union([Big_pad1_1, Big_pad1_2, Big_pad2_1, Big_pad2_2])
+        Pads = geometric_union([Big_pad1_1, Big_pad1_2, Big_pad2_1, Big_pad2_2])
 
-    pads = geometric_union([ZnO_pad_R, ZnO_pad_L, Big_pad1_1, Big_pad1_2, Big_pad2_1, Big_pad2_2])
+        pads = geometric_union([ZnO_pad_R, ZnO_pad_L, Big_pad1_1, Big_pad1_2, Big_pad2_1, Big_pad2_2])
 
-    ZnO_under_pad_and_fingers = pads.buffer(1)
+        ZnO_under_pad_and_fingers = pads.buffer(1)
+
+        transducers.add_to_layer(2, ZnO_under_pad_and_fingers)
+        transducers.add_to_layer(3, Fingers)
+        transducers.add_to_layer(4, Pads)
 
-    # Add name to cell
-    text = Text(origin=[-500, -300], height=50, text=str(cell_name), alignment='left-bottom')
 
 
     #Add Cell
     cell = Cell('SIMPLE_RES_DEVICE r={:.4f} g={:.4f}'.format(sweep1, sweep2))
 
-    cell.add_to_layer(1, convert_to_positive_resist([Aco_wg],30), text)
-    cell.add_to_layer(2, ZnO_under_pad_and_fingers)
-    cell.add_to_layer(3, Fingers)
-    cell.add_to_layer(4, Pads)
+    # the trench is the outline of the waveguide offset by 30 um, the same as convert_to_positive_resist([Aco_wg], 30)
+    cell.add_to_layer(1, Aco_wg.get_positive_resist_object(30))
+    # Add name to cell, drawn from shared glyph cells
+    add_text(cell, 1, origin=[-500, -300], height=50, text=str(cell_name), alignment='left-bottom')
+    cell.add_cell(transducers, origin=(0, 0))
     #cell.add_to_layer(5, holes)
     #cell.add_to_layer(5, left_coupler)
 
@@ -1240,7 +1211,10 @@ def generate_device_cell( sweep1, sweep2, cell_name):
     return cell
 
 if __name__ == "__main__":
-    layout = GridLayout(title='Phononic Waveguides', frame_layer=0, text_layer=3, region_layer_type=None, horizontal_spacing=100, vertical_spacing=0)
+    layout = GlyphGridLayout(title='Phononic Waveguides', frame_layer=0, text_layer=3, region_layer_type=None, horizontal_spacing=100, vertical_spacing=0)
+
+    # device cells are kept in a disk cache, a rerun only builds the cells whose parameters or code changed
+    device_cell = disk_cached(generate_device_cell, 'Phononic_v0_cache')
 
     #Parameters wanted to scan-------------------------------------------
     #1550nm (best performance max_duty=0.80 grating_pitch=0.76)
@@ -1282,7 +1256,7 @@ if __name__ == "__main__":
 
         # Add column labels
         layout.add_column_label_row(('G_P= %0.2f' % 0.7 ), row_label='')
-        layout.add_to_row(generate_device_cell(  sweep1=55, sweep2=50, cell_name = '1' ))
+        layout.add_to_row(device_cell(  sweep1=55, sweep2=50, cell_name = '1' ))
         layout_cell, mapping = layout.generate_layout()
         layout_cell.show()
 
@@ -1297,9 +1271,13 @@ if __name__ == "__main__":
                 count =  count + 1
                 complete = count/total
                 print("Number of cell generated / Total cell = %0.1f/%0.1f (%0.2f%% complete) " %(count ,total,complete*100) )
-                layout.add_to_row(generate_device_cell( sweep1= param_1, sweep2=param_2, cell_name=count), alignment='center-center' , realign=True)
+                layout.add_to_row(device_cell( sweep1= param_1, sweep2=param_2, cell_name=count), alignment='center-center' , realign=True)
 
         layout_cell, mapping = layout.generate_layout()
+
+        # builder cache hits and misses of the sweep
+        print(builder_cache.report())
+        print(device_cell.report())
         layout_cell.add_ebl_frame(layer=1, size=40, frame_generator=raith_marker_frame, n=2)
 
         # Show and then save the layout!
@@ -0,0 +1,27 @@
+# Times the focused IDT generator for a growing number of periods, to check that the runtime grows linearly with
+# the number of fingers and that long IDTs (hundreds or thousands of periods) still get a working pad region.
+# For every number of periods the time to build the cell and the time to write it as .gds are printed, together
+# with the time per period. The files are written to a temporary directory that is removed afterwards.
+
+import os
+import tempfile
+import time
+
+from focused_fingers import focused_idt
+from gds_rectangles import save_gds
+
+periods_list = [50, 100, 200, 500, 1000, 2000, 5000]
+
+if __name__ == '__main__':
+    print('periods   build (s)   save (s)   per period (ms)')
+    with tempfile.TemporaryDirectory() as directory:
+        for periods in periods_list:
+            start = time.perf_counter()
+            cell = focused_idt(fw=1, frequency=1, wavelength=4, periods=periods, angle=30, surface_velocity=1,
+                               distance_to_idt=30, finger_layer=1, pad_layer=2, align_layer=3, origin=(0, 0),
+                               label="B")
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            save_gds(os.path.join(directory, "benchmark_focused_idt.gds"), cell)
+            save = time.perf_counter() - start
+            print('{:7d} {:11.4f} {:10.4f} {:17.4f}'.format(periods, build, save, (build + save) / periods * 1000))
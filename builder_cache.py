@@ -0,0 +1,168 @@
+# In-process memoization for the component builders of the sweep scripts.
+# The make_* builders (fingers, pads, waveguides) are pure functions of their arguments, but a sweep calls them for
+# every device, often with parameters that were already built or that only move the result. memoized_builder wraps a
+# builder so that:
+#   - the arguments that only place the geometry (e.g. ZnO_Top_left, origin, coords) are taken out of the key, the
+#     builder runs once with them at zero and every call gets the cached result moved to its own position
+#   - the cached results are kept in one LRU shared by all builders, bounded by a number of entries and by a memory
+#     cap (estimated from the size of the geometry), the least recently used results are dropped first
+#   - hits and misses are counted per builder, cache.report() lists them
+# e.g.
+#   @memoized_builder(offsets={'ZnO_Top_left': 'x'})
+#   def make_IDT_Fingers(figer_widths, number_of_period, IDT_Aperature, ZnO_Top_left): ...
+# Only geometry is moved: shapely objects, gds_rectangles.Polygons/Rectangles, parts with a translated method (a
+# WaveguidePath, which stays a path) and other parts with get_shapely_object (e.g. a Waveguide, which is returned as
+# its shapely object when it is moved). Numbers and other values are returned as they are, so a builder with offsets
+# must not return coordinates that depend on them.
+# Like shared cells, cached results are shared between all calls and must not be changed by the caller.
+# A moved result is built as (geometry at zero) + offset, it can differ from a direct build in the last bits of the
+# coordinates, far below the 1 nm grid the layouts are written on
+# all measurements should be in um
+
+import functools
+import inspect
+from collections import OrderedDict
+
+import shapely.affinity
+from shapely.geometry.base import BaseGeometry
+
+from gds_rectangles import Polygons, Rectangles
+from idt_fingers import FingerArray
+from shared_cells import _normalized
+
+# offset axes: the direction a placement argument moves the geometry in, 'xy' is an (x, y) point
+_AXES = {'x': lambda v: (v, 0.), 'y': lambda v: (0., v), 'xy': lambda v: (v[0], v[1])}
+_ZERO = {'x': 0., 'y': 0., 'xy': (0., 0.)}
+
+
+class BuilderCache:
+    # LRU of builder results, keyed by (builder name, normalized arguments), with hit/miss counters per builder
+    def __init__(self, max_entries=256, max_bytes=512 * 2 ** 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.stats = OrderedDict()
+        self._entries = OrderedDict()
+
+    def get(self, name, key):
+        counts = self.stats.setdefault(name, {'hits': 0, 'misses': 0})
+        if (name, key) in self._entries:
+            self._entries.move_to_end((name, key))
+            counts['hits'] += 1
+            return True, self._entries[(name, key)][0]
+        counts['misses'] += 1
+        return False, None
+
+    def put(self, name, key, value):
+        size = geometry_bytes(value)
+        self._entries[(name, key)] = (value, size)
+        self.bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, (_, dropped) = self._entries.popitem(last=False)
+            self.bytes -= dropped
+
+    def clear(self):
+        self._entries.clear()
+        self.stats.clear()
+        self.bytes = 0
+
+    def report(self):
+        # one line per builder: hits, misses and hit rate, plus the current size of the cache
+        lines = []
+        for name, counts in self.stats.items():
+            calls = counts['hits'] + counts['misses']
+            lines.append('{:<48s} {:6d} hits {:6d} misses ({:.0%} hit rate)'.format(
+                name, counts['hits'], counts['misses'], counts['hits'] / calls if calls else 0))
+        lines.append('{} cached results, {:.1f} MB'.format(len(self._entries), self.bytes / 2 ** 20))
+        return '\n'.join(lines)
+
+
+cache = BuilderCache()
+
+
+def geometry_bytes(value):
+    # rough memory size of a builder result, used for the memory cap of the cache
+    if isinstance(value, (tuple, list)):
+        return sum(geometry_bytes(v) for v in value)
+    if isinstance(value, Polygons):
+        return value.rings.nbytes
+    if isinstance(value, Rectangles):
+        return value.xyxy.nbytes
+    if isinstance(value, FingerArray):
+        return sum(getattr(value, key).nbytes for key in ('x', 'width', 'y0', 'y1', 'matrix'))
+    if isinstance(value, BaseGeometry):
+        return len(value.wkb)
+    if hasattr(value, 'get_shapely_object'):
+        return len(value.get_shapely_object().wkb)
+    return 8
+
+
+def translated(value, dx, dy):
+    # the geometry of a builder result moved by (dx, dy), values that are not geometry are returned unchanged
+    if dx == 0 and dy == 0:
+        return value
+    if isinstance(value, tuple):
+        return tuple(translated(v, dx, dy) for v in value)
+    if isinstance(value, list):
+        return [translated(v, dx, dy) for v in value]
+    if isinstance(value, Polygons):
+        return Polygons(value.rings + (dx, dy))
+    if isinstance(value, Rectangles):
+        return Rectangles(value.xyxy + (dx, dy, dx, dy))
+    if isinstance(value, BaseGeometry):
+        return shapely.affinity.translate(value, dx, dy)
+    if hasattr(value, 'translated'):
+        return value.translated(dx, dy)
+    if hasattr(value, 'get_shapely_object'):
+        return shapely.affinity.translate(value.get_shapely_object(), dx, dy)
+    return value
+
+
+def _key(arguments):
+    # hashable key of the bound arguments, dicts (e.g. coupler parameters) are keyed by their sorted items
+    def normalized(value):
+        if isinstance(value, dict):
+            return tuple((k, normalized(v)) for k, v in sorted(value.items()))
+        if isinstance(value, (list, tuple)):
+            return tuple(normalized(v) for v in value)
+        return _normalized(value)
+    return normalized(tuple(sorted(arguments.items())))
+
+
+def memoized_builder(offsets=None, builder_cache=None):
+    # decorator, offsets maps the names of the placement arguments to the axis they move the geometry along
+    # ('x', 'y' or 'xy' for a point), builder_cache defaults to the module's cache
+    offsets = dict(offsets or {})
+    for axis in offsets.values():
+        if axis not in _AXES:
+            raise ValueError('unknown offset axis {!r}, use "x", "y" or "xy"'.format(axis))
+
+    def decorator(builder):
+        signature = inspect.signature(builder)
+        # builders of different scripts can have the same name, so the module is part of it
+        name = builder.__qualname__ if builder.__module__ == '__main__' else \
+            '{}.{}'.format(builder.__module__, builder.__qualname__)
+
+        @functools.wraps(builder)
+        def wrapper(*args, **kwargs):
+            store = builder_cache if builder_cache is not None else cache
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+
+            dx, dy = 0., 0.
+            for argument, axis in offsets.items():
+                x, y = _AXES[axis](arguments[argument])
+                dx, dy = dx + float(x), dy + float(y)
+                arguments[argument] = _ZERO[axis]
+
+            key = _key(arguments)
+            hit, result = store.get(name, key)
+            if not hit:
+                result = builder(**arguments)
+                store.put(name, key, result)
+            return translated(result, dx, dy)
+
+        wrapper.uncached = builder
+        return wrapper
+    return decorator
@@ -0,0 +1,61 @@
+# Chirp schedules for chirped IDTs.
+# A chirped IDT steps its finger width (and with it the pitch) from one value to another. The schedule is computed
+# with numpy for all pairs at once:
+#   chirp_steps   the finger widths of the chirp steps, for a linear, exponential or any other profile
+#   group_widths  the finger width of every pair, the pairs are split into one group per step
+#   chirp_arms    the [finger, gap, finger, gap, ...] width lists of both IDT arms, with the litho correction
+#                 applied, which the finger builders take directly
+# e.g. Idt_finger_arm1, Idt_finger_arm2 = chirp_arms(group_widths(chirp_steps(0.16, 0.18, 5), 50), 0.005)
+# all measurements should be in um
+
+import numpy as np
+
+
+def chirp_steps(start_width, end_width, number_of_widths, profile='linear'):
+    # finger widths of the chirp steps, from start_width to end_width
+    # profile can be 'linear' (equal differences), 'exponential' (equal ratios), a function that maps the positions
+    # 0..1 of the steps to 0..1 of the way from start_width to end_width (e.g. a piecewise profile made with np.interp),
+    # or an array with the widths themselves, in which case the other arguments are not used
+    if isinstance(profile, str):
+        if profile == 'linear':
+            return np.linspace(start_width, end_width, number_of_widths)
+        if profile == 'exponential':
+            return np.geomspace(start_width, end_width, number_of_widths)
+        raise ValueError('unknown chirp profile {!r}, use "linear", "exponential", a function or an array'
+                         .format(profile))
+    if callable(profile):
+        return start_width + (end_width - start_width) * np.asarray(profile(np.linspace(0, 1, number_of_widths)))
+    return np.asarray(profile, dtype=float)
+
+
+def group_widths(steps, number_of_pairs):
+    # finger width of every pair: the pairs are split into one group per step, in order
+    # if the number of pairs can not be divided evenly, the first number_of_pairs % len(steps) groups get one pair more
+    # every step needs at least one pair, with fewer pairs than steps the chirp would end early, so that is an error
+    steps = np.asarray(steps, dtype=float)
+    if not 0 < len(steps) <= int(number_of_pairs):
+        raise ValueError('{} pairs can not be split into {} chirp steps, every step needs at least one pair'
+                         .format(int(number_of_pairs), len(steps)))
+    counts = np.full(len(steps), int(number_of_pairs) // len(steps))
+    counts[:int(number_of_pairs) % len(steps)] += 1
+    return np.repeat(steps, counts)
+
+
+def chirp_arms(widths, litho_correction=0.0, pitch_factor=3):
+    # width lists [finger, gap, finger, gap, ...] of the two IDT arms for one finger width per pair
+    # the gap after a finger is (pitch_factor - 1) finger widths wide and ends where the next finger of the same arm
+    # would start at the pitch of the next pair, so the last pair of every chirp step already has the spacing of the
+    # next step: arm 1 gets pitch_factor * the next width, arm 2 (pitch_factor - 1) * this width + the next width
+    # the fingers are litho_correction narrower and the gaps as much wider
+    widths = np.asarray(widths, dtype=float)
+    following = np.append(widths[1:], widths[-1:])
+    same = following == widths
+    gap1 = np.where(same, pitch_factor * widths, pitch_factor * following)
+    gap2 = np.where(same, pitch_factor * widths, (pitch_factor - 1) * widths + following)
+
+    arm1 = np.empty(2 * len(widths))
+    arm2 = np.empty(2 * len(widths))
+    arm1[0::2] = arm2[0::2] = widths - litho_correction
+    arm1[1::2] = gap1 + litho_correction
+    arm2[1::2] = gap2 + litho_correction
+    return arm1, arm2
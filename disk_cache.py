@@ -0,0 +1,180 @@
+# Persistent on-disk cache of generated device cells.
+# A sweep calls a device function (e.g. generate_device_cell) for every point of the parameter grid. disk_cached wraps
+# such a function so that every cell it makes is also stored in a cache directory, under a key made from:
+#   - the arguments of the call
+#   - a hash of the source of the function's module and of its dependencies: the modules from the same directory it
+#     imports from (and those modules import from, and so on) plus the modules named in depends_on, which is needed
+#     for modules that are only imported inside functions. An edit to any of them invalidates the stored cells,
+#     edits to other scripts in the directory do not
+#   - the gdshelpers version
+# When a sweep is run again, the cells whose key did not change are loaded from disk and only the others are built,
+# so after a small edit only the affected devices are rebuilt.
+# Entries that were not used for max_age seconds are removed, and the least recently used ones as long as the cache
+# directory is larger than max_bytes (see prune_cache), so old versions of the builders do not pile up.
+# The cells are stored as the geometry of each layer (shapely objects, which pickle as WKB, gds_rectangles objects
+# and idt_fingers.FingerArray as they are) plus the references to their sub-cells, which are stored along with them.
+# Shared cells (see shared_cells) are registered again when they are loaded, so devices that share a cell still refer
+# to one cell.
+# e.g.
+#   device_cell = disk_cached(generate_device_cell, 'AOFS_V5_cache')
+#   layout.add_to_row(device_cell(sweep1=param_1, sweep2=param_2, cell_name=count))
+#   print(device_cell.report())
+
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import time
+import types
+
+from gds_rectangles import Polygons, Rectangles
+from idt_fingers import FingerArray
+import shared_cells
+
+
+def module_dependencies(module_name, depends_on=()):
+    # names of the modules the module depends on: itself, the modules in depends_on and the modules from the same
+    # directory it imports from (modules or names imported at module level), followed recursively
+    directory = os.path.dirname(os.path.abspath(sys.modules[module_name].__file__))
+
+    def local(module):
+        path = getattr(module, '__file__', None)
+        return path is not None and os.path.dirname(os.path.abspath(path)) == directory
+
+    names = set()
+    pending = [module_name] + list(depends_on)
+    while pending:
+        name = pending.pop()
+        if name in names:
+            continue
+        names.add(name)
+        for value in vars(sys.modules[name]).values():
+            if isinstance(value, types.ModuleType):
+                module = value
+            else:
+                defined_in = getattr(value, '__module__', None)
+                module = sys.modules.get(defined_in) if isinstance(defined_in, str) else None
+            if module is not None and local(module):
+                pending.append(module.__name__)
+    return names
+
+
+def source_hash(module_name, depends_on=()):
+    # hash of the source files of the module and its dependencies (see module_dependencies)
+    paths = set(os.path.abspath(sys.modules[name].__file__) for name in module_dependencies(module_name, depends_on))
+    digest = hashlib.md5()
+    for path in sorted(paths):
+        with open(path, 'rb') as source:
+            digest.update(os.path.basename(path).encode() + b'\0' + source.read())
+    return digest.hexdigest()
+
+
+def prune_cache(cache_dir, max_bytes=None, max_age=None):
+    # removes the entries that were not used for max_age seconds, then the least recently used entries until the
+    # cache directory holds at most max_bytes, returns the size of the entries that are left
+    # the modification time of an entry is its last use, disk_cached touches an entry whenever it is loaded
+    now = time.time()
+    entries = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in os.scandir(cache_dir)
+                     if entry.name.endswith(('.pickle', '.tmp')))
+    total = sum(size for _, size, _ in entries)
+    for used, size, path in entries:
+        if (max_age is not None and now - used > max_age) or (max_bytes is not None and total > max_bytes):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+    return total
+
+
+def _storable(geometry):
+    # layer items are stored as shapely objects, raw rectangles, polygons and finger arrays are kept as they are
+    if isinstance(geometry, (Polygons, Rectangles, FingerArray)) or not hasattr(geometry, 'get_shapely_object'):
+        return geometry
+    return geometry.get_shapely_object()
+
+
+def cell_records(cell, records=None):
+    # {cell name: record} of the cell and all its sub-cells, a record holds the layers, the sub-cell references (by
+    # name) and whether the cell is a shared cell
+    records = {} if records is None else records
+    if cell.name in records:
+        return records
+    records[cell.name] = {'layers': {layer: [_storable(geometry) for geometry in geometries]
+                                     for layer, geometries in cell.layer_dict.items()},
+                          'refs': [dict(ref, cell=ref['cell'].name) for ref in cell.cells],
+                          'desc': cell.desc,
+                          'shared': shared_cells.registered_cell(cell.name) is cell}
+    for ref in cell.cells:
+        cell_records(ref['cell'], records)
+    return records
+
+
+def cell_from_records(records, name, cells=None):
+    # rebuilds the cell with the given name from cell_records, shared cells that are already registered are reused
+    from gdshelpers.geometry.chip import Cell
+
+    cells = {} if cells is None else cells
+    if name in cells:
+        return cells[name]
+    record = records[name]
+    if record['shared'] and shared_cells.registered_cell(name) is not None:
+        cells[name] = shared_cells.registered_cell(name)
+        return cells[name]
+
+    cell = Cell(name)
+    for layer, geometries in record['layers'].items():
+        cell.add_to_layer(layer, *geometries)
+    for ref in record['refs']:
+        cell.cells.append(dict(ref, cell=cell_from_records(records, ref['cell'], cells)))
+    cell.desc = record['desc']
+    cell.dlw_data = cell.desc['dlw']
+    cells[name] = shared_cells.register_cell(cell) if record['shared'] else cell
+    return cells[name]
+
+
+def disk_cached(builder, cache_dir, depends_on=(), max_bytes=2 ** 30, max_age=30 * 24 * 3600):
+    # wraps a function that returns a Cell, the returned function has hits and misses counters and a report()
+    # depends_on names modules the builder uses that its module does not import at module level
+    # max_bytes and max_age (in seconds) limit the cache directory, None turns the limit off
+    import gdshelpers
+
+    signature = inspect.signature(builder)
+    os.makedirs(cache_dir, exist_ok=True)
+    sources = source_hash(builder.__module__, depends_on)
+    size = [prune_cache(cache_dir, max_bytes, max_age)]
+
+    @functools.wraps(builder)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = shared_cells.parameter_hash((builder.__qualname__, tuple(sorted(bound.arguments.items())),
+                                           sources, gdshelpers.__version__))
+        path = os.path.join(cache_dir, '{}_{}.pickle'.format(builder.__name__, key))
+        if os.path.exists(path):
+            with open(path, 'rb') as stored:
+                top, records = pickle.load(stored)
+            os.utime(path)
+            wrapper.hits += 1
+            return cell_from_records(records, top)
+
+        cell = builder(*args, **kwargs)
+        # written to a temporary file first, so an interrupted sweep never leaves a broken entry behind
+        with open(path + '.tmp', 'wb') as stored:
+            pickle.dump((cell.name, cell_records(cell)), stored, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+        wrapper.misses += 1
+        size[0] += os.path.getsize(path)
+        if max_bytes is not None and size[0] > max_bytes:
+            size[0] = prune_cache(cache_dir, max_bytes, max_age)
+        return cell
+
+    def report():
+        return '{}: {} cells loaded from {}, {} built'.format(builder.__name__, wrapper.hits, cache_dir, wrapper.misses)
+
+    wrapper.hits = 0
+    wrapper.misses = 0
+    wrapper.report = report
+    return wrapper
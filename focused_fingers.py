@@ -0,0 +1,308 @@
+# Analytic finger geometry for focused IDTs.
+# A focused finger is an annular sector around the focus, so instead of buffering circles and splitting them with
+# shapely, the vertices of all fingers are computed at once with numpy as (N, K, 2) arrays.
+# By default the circles are approximated by the same regular polygon as shapely's Point.buffer (64 corners, the
+# first one at angle 0), so the fingers come out the same as the ones made with buffer, split and difference.
+# With a chord error tolerance (in nm) every arc gets its own number of segments instead, chosen from its radius so
+# that the outline never deviates from the true circle by more than the tolerance: small inner fingers get few
+# corners and large outer fingers as many as they need.
+# On anisotropic substrates the wavefronts around the focus are not circles. Given a table of the surface wave
+# velocity versus propagation angle, the fingers follow the curves of constant phase instead: a point at angle a lies
+# at radius r * v(a) / v(0), so that it is the same number of wavelengths away from the focus as the point at radius r
+# on the axis. The table is interpolated once for all fingers, the contours cost the same as the circular arcs.
+# angles are in radians and measured counterclockwise from the +x axis, all measurements should be in um
+
+import numpy as np
+
+from gds_rectangles import Polygons
+
+# number of corners shapely's Point.buffer uses for a full circle (16 segments per quarter circle)
+BUFFER_SEGMENTS = 64
+
+
+def arc_points(radius, angle_start, angle_end, segments=BUFFER_SEGMENTS):
+    # points of the arcs from angle_start to angle_end (angle_start < angle_end, less than a full turn) on the
+    # regular polygons with `segments` corners that approximate circles of the given radii around (0, 0)
+    # returns an (N, K, 2) array for N radii: the two end points lie on the polygon edges where the rays at
+    # angle_start and angle_end cut them, the K - 2 points in between are the polygon corners
+    radius = np.atleast_1d(np.asarray(radius, dtype=float))
+    step = 2 * np.pi / segments
+    first = np.floor(angle_start / step) + 1
+    last = np.ceil(angle_end / step) - 1
+    corners = np.arange(first, last + 1) * step
+    angles = np.concatenate(([angle_start], corners, [angle_end]))
+
+    # distance of the points from the center relative to the radius, the end points lie on the chord between two
+    # corners which is closer to the center than the corners
+    scale = np.ones_like(angles)
+    for i, edge_angle in ((0, angle_start), (-1, angle_end)):
+        middle = (np.floor(edge_angle / step) + 0.5) * step
+        scale[i] = np.cos(step / 2) / np.cos(edge_angle - middle)
+
+    unit = np.column_stack((np.cos(angles), np.sin(angles))) * scale[:, None]
+    return radius[:, None, None] * unit[None, :, :]
+
+
+def velocity_scale(angles, velocity_table):
+    # v(angle) / v(0) for angles in radians, interpolated linearly in a table of (angles in degrees, velocities)
+    # the table is periodic in 360 degrees and does not have to be sorted
+    table_angles, velocities = (np.asarray(v, dtype=float) for v in velocity_table)
+    scale = np.interp(np.degrees(np.append(angles, 0)), table_angles, velocities, period=360)
+    return scale[:-1] / scale[-1]
+
+
+def contour_points(radius, angle_start, angle_end, velocity_table, segments=BUFFER_SEGMENTS):
+    # points of the constant phase curves through the given radii on the x axis, from angle_start to angle_end, as an
+    # (N, K, 2) array
+    # like arc_points the corners sit at multiples of 2 pi / segments and the end points on the edges between them,
+    # so fingers with different angle ranges are drawn on the same polygon and cannot cut into each other
+    radius = np.atleast_1d(np.asarray(radius, dtype=float))
+    step = 2 * np.pi / segments
+
+    def curve(angles):
+        return np.column_stack((np.cos(angles), np.sin(angles))) * velocity_scale(angles, velocity_table)[:, None]
+
+    corners = curve(np.arange(np.floor(angle_start / step) + 1, np.ceil(angle_end / step)) * step)
+    ends = []
+    for edge_angle in (angle_start, angle_end):
+        # where the ray at edge_angle cuts the edge between the corners on either side of it
+        p0, p1 = curve(np.array([np.floor(edge_angle / step), np.floor(edge_angle / step) + 1]) * step)
+        direction = np.array([np.cos(edge_angle), np.sin(edge_angle)])
+        s = ((p0[0] * direction[1] - p0[1] * direction[0]) /
+             ((p0[0] - p1[0]) * direction[1] - (p0[1] - p1[1]) * direction[0]))
+        ends.append(p0 + s * (p1 - p0))
+    unit = np.concatenate(([ends[0]], corners, [ends[1]]))
+    return radius[:, None, None] * unit[None, :, :]
+
+
+def sector(origin, radius, angle_start, angle_end, segments=BUFFER_SEGMENTS, velocity_table=None):
+    # ring of a circular sector with its tip at origin, on the same polygon as arc_points, as a (K, 2) array
+    # with a velocity table the outer edge is the constant phase curve through radius instead (see contour_points)
+    if velocity_table is None:
+        edge = arc_points(radius, angle_start, angle_end, segments)[0]
+    else:
+        edge = contour_points(radius, angle_start, angle_end, velocity_table, segments)[0]
+    return np.concatenate(([[0, 0]], edge)) + origin
+
+
+def tolerance_arc_points(radius, angle_start, angle_end, segments):
+    # points of arcs from angle_start to angle_end split into `segments` equal segments, for every radius at once,
+    # returned as an (N, segments + 1, 2) array
+    # the points sit slightly outside the circle (by as much as the middle of each segment lies inside it), so the
+    # outline deviates from the circle by the same amount to both sides and the finger width is kept on average
+    radius = np.atleast_1d(np.asarray(radius, dtype=float))
+    half = (angle_end - angle_start) / segments / 2
+    angles = np.linspace(angle_start, angle_end, segments + 1)
+    unit = np.column_stack((np.cos(angles), np.sin(angles))) * 2 / (1 + np.cos(half))
+    return radius[:, None, None] * unit[None, :, :]
+
+
+def arc_segments(radius, angle_start, angle_end, tolerance):
+    # number of segments each arc needs so that it deviates from the circle by at most tolerance (in nm)
+    # with the points placed as in tolerance_arc_points a segment of angle 2h deviates by radius * tan(h/2)**2
+    radius = np.atleast_1d(np.asarray(radius, dtype=float))
+    max_segment = 4 * np.arctan(np.sqrt(tolerance * 1e-3 / radius))
+    return np.maximum(1, np.ceil((angle_end - angle_start) / max_segment)).astype(int)
+
+
+def annular_sectors(origin, r_inner, r_outer, angle_start, angle_end, segments=BUFFER_SEGMENTS, tolerance=None,
+                    velocity_table=None):
+    # closed rings (without repeating the first point) of annular sectors between the radii r_inner and r_outer,
+    # one sector per pair of radii
+    # returns a list of (N, K, 2) arrays: without tolerance all sectors have the same number of corners and the list
+    # has a single entry, with a tolerance the sectors are grouped by their number of corners (in the given order
+    # as long as the radii grow)
+    # with a velocity table the sectors are bounded by constant phase curves (see contour_points), a tolerance then
+    # sets one number of segments for all of them, the one the largest curve needs
+    origin = np.asarray(origin, dtype=float)
+    if velocity_table is not None:
+        if tolerance is not None:
+            angles = np.linspace(angle_start, angle_end, 361)
+            largest = np.max(r_outer) * np.max(velocity_scale(angles, velocity_table))
+            segments = arc_segments(largest, 0, 2 * np.pi, tolerance)[0]
+        outer = contour_points(r_outer, angle_start, angle_end, velocity_table, segments)
+        inner = contour_points(r_inner, angle_start, angle_end, velocity_table, segments)
+        return [np.concatenate((outer, inner[:, ::-1]), axis=1) + origin]
+    if tolerance is None:
+        outer = arc_points(r_outer, angle_start, angle_end, segments)
+        inner = arc_points(r_inner, angle_start, angle_end, segments)
+        return [np.concatenate((outer, inner[:, ::-1]), axis=1) + origin]
+
+    r_inner, r_outer = np.broadcast_arrays(np.atleast_1d(np.asarray(r_inner, dtype=float)),
+                                           np.atleast_1d(np.asarray(r_outer, dtype=float)))
+    n_outer = arc_segments(r_outer, angle_start, angle_end, tolerance)
+    n_inner = arc_segments(r_inner, angle_start, angle_end, tolerance)
+    groups = []
+    keys = n_outer * (n_inner.max() + 1) + n_inner
+    for key in dict.fromkeys(keys.tolist()):
+        index = keys == key
+        outer = tolerance_arc_points(r_outer[index], angle_start, angle_end, n_outer[index][0])
+        inner = tolerance_arc_points(r_inner[index], angle_start, angle_end, n_inner[index][0])
+        groups.append(np.concatenate((outer, inner[:, ::-1]), axis=1) + origin)
+    return groups
+
+
+def focused_fingers(origin, distance_to_idt, wavelength, periods, angle, offset, overlap,
+                    segments=BUFFER_SEGMENTS, tolerance=None, velocity_table=None):
+    # all fingers of a focused single finger IDT as (lower, upper) lists of ring arrays (see annular_sectors)
+    # angle is the opening angle of the IDT, the lower fingers run from -(angle/2 - offset) to
+    # angle/2 + offset + overlap and the upper fingers from -(angle/2 + offset + overlap) to angle/2 - offset, so
+    # each finger reaches into the pad of its own electrode
+    # the fingers are wavelength/4 wide, the upper fingers sit half a wavelength further out than the lower ones
+    # (all on the x axis, with a velocity table the fingers follow the constant phase curves, see contour_points)
+    width = wavelength / 4
+    radius = distance_to_idt + wavelength * np.arange(periods)
+    lower = annular_sectors(origin, radius - width / 2, radius + width / 2,
+                            -(angle / 2 - offset), angle / 2 + offset + overlap, segments, tolerance, velocity_table)
+    upper = annular_sectors(origin, radius + 2 * width - width / 2, radius + 2 * width + width / 2,
+                            -(angle / 2 + offset + overlap), angle / 2 - offset, segments, tolerance, velocity_table)
+    return lower, upper
+
+
+def add_focused_fingers(cell, layer, origin, distance_to_idt, wavelength, periods, angle, offset, overlap,
+                        segments=BUFFER_SEGMENTS, tolerance=None, velocity_table=None):
+    # adds all fingers of a focused single finger IDT to the cell (see focused_fingers), they are written to GDS
+    # without going through shapely
+    if periods > 0:
+        lower, upper = focused_fingers(origin, distance_to_idt, wavelength, periods, angle, offset, overlap,
+                                       segments, tolerance, velocity_table)
+        cell.add_to_layer(layer, *[Polygons(rings) for rings in lower + upper])
+
+
+# Shared rings ----------------------------------------------------------------------------------------------------
+# A focused IDT with p periods is the first p rings (one lower and one upper finger at the same period index) of any
+# longer one with the same wavelength, distance, angles and resolution. Each ring is made once as its own cell drawn
+# around the focus at (0, 0), and an IDT refers to its rings, so a sweep over the number of periods stores every
+# ring only once and costs about as much as its longest IDT
+
+def focused_ring_cell(layer, distance_to_idt, wavelength, index, angle, offset, overlap,
+                      segments=BUFFER_SEGMENTS, tolerance=None, velocity_table=None):
+    # cell with the lower and upper finger of period `index` around (0, 0), made on first use and shared afterwards
+    # (see shared_cells)
+    from shared_cells import shared_cell
+
+    ring, new = shared_cell('fring', (layer, distance_to_idt, wavelength, angle, offset, overlap, segments, tolerance,
+                                      index) + ((velocity_table,) if velocity_table is not None else ()))
+    if new:
+        lower, upper = focused_fingers((0, 0), distance_to_idt + wavelength * index, wavelength, 1, angle, offset,
+                                       overlap, segments, tolerance, velocity_table)
+        ring.add_to_layer(layer, *[Polygons(rings) for rings in lower + upper])
+    return ring
+
+
+def add_focused_ring_cells(cell, layer, origin, distance_to_idt, wavelength, periods, angle, offset, overlap,
+                           segments=BUFFER_SEGMENTS, tolerance=None, velocity_table=None):
+    # adds the fingers of a focused single finger IDT (see focused_fingers) as references to shared ring cells
+    for index in range(periods):
+        cell.add_cell(focused_ring_cell(layer, distance_to_idt, wavelength, index, angle, offset, overlap,
+                                        segments, tolerance, velocity_table), origin=origin)
+
+
+# Focused IDT -----------------------------------------------------------------------------------------------------
+# the complete focused single finger IDT of focusedsinglefingerIDT and fIDT20210520: fingers, pads, alignment
+# markers and label
+
+def focused_idt(fw, frequency, wavelength, periods, angle, surface_velocity, distance_to_idt,
+                finger_layer, pad_layer, align_layer, origin, label, tolerance=None,
+                shared_rings=False, velocity_table=None, array_pads=False):
+    # fw should be entered as 0 for f or 1 for w, depending on whether you would like to specify wavelength or frequency
+    # if specifying wavelength, enter 1 for frequency and surface velocity (should be in um)
+    # origin is center of focus; origin = (x,y)
+    # periods is number of wavelengths within the IDT
+    # angle is in degrees, should be angle of the IDT (typically 30 degrees)
+    # a 2.5 degree offset will be introduced to contact fingers with electrodes
+    # this can be altered by changing oa below
+    # surface velocity is parameter of material that you are writing on
+    # distance to idt is radius from focus to first finger (typically 30um)
+    # label is written next to the IDT and is also the name of the returned cell
+    # tolerance is the largest allowed deviation of the finger arcs from true circles in nm, every arc then gets as
+    # many points as it needs for its radius; if it is None the arcs use shapely's fixed buffer resolution
+    # with shared_rings=True every finger pair is a reference to a ring cell that is shared by all IDTs with the same
+    # wavelength, distance and angles, so a sweep over periods stores each ring only once
+    # velocity_table is for anisotropic substrates, it is a pair of arrays (angles in degrees from the IDT axis,
+    # surface wave velocities), the fingers and the pad cut-out then follow the curves of constant phase instead of
+    # circles (see focused_fingers), wavelength and distance to idt are measured along the axis
+    # array_pads=True draws the pads of the fIDT20210520 arrays: the pad block ends pad_length from the focus instead
+    # of pad_length behind the first finger, and the waveguide cut-out starts at the end of the pad region instead of
+    # at the last finger
+
+    # the pad region is sized for at least min_pad_periods periods (the size all earlier devices used), for longer
+    # IDTs it grows with the fingers, so any number of periods works
+
+    from gdshelpers.geometry.chip import Cell
+    from shapely.geometry import Polygon
+    from gdshelpers.parts.marker import CrossMarker
+    from glyph_text import add_text
+    from shared_cells import shared_cell
+
+    offset = 2.5*np.pi/180
+    overlap = 2.5*np.pi/180
+    min_pad_periods = 50
+    idt = Cell(label)
+    if fw==0:
+        wavelength = (surface_velocity / frequency)*10**6
+    width = wavelength / 4
+    angle = angle*np.pi/180
+    pad_periods = max(periods, min_pad_periods)
+
+    # size of the pad region
+    pa = origin[0] + (distance_to_idt + 2 * (pad_periods+4) * wavelength) * np.cos(angle / 2)
+    pb = origin[1] - (distance_to_idt + 2 * (pad_periods+4) * wavelength) * np.sin(angle / 2)
+    pd = origin[1] + (distance_to_idt + 2 * (pad_periods+4) * wavelength) * np.sin(angle / 2)
+    pad_height = 150 + pd-pb
+    pad_length = pa + 100
+    pad_end = pad_length if array_pads else origin[0]+distance_to_idt - wavelength + pad_length
+    wg_start = origin[0]+distance_to_idt + ((pad_periods if array_pads else periods)-1)*wavelength
+
+    # the fingers and pads only depend on the parameters, so all devices with the same parameters share one cell
+    # with them (see shared_cells) and only the markers and the label are added to each device's own cell
+    geometry, new = shared_cell('focused_idt', (wavelength, periods, angle, distance_to_idt, finger_layer, pad_layer,
+                                                tuple(origin), tolerance, shared_rings, velocity_table, array_pads))
+    if new:
+        # all fingers at once as analytic annular sectors
+        if shared_rings:
+            add_focused_ring_cells(geometry, finger_layer, origin, distance_to_idt, wavelength, periods, angle, offset,
+                                   overlap, tolerance=tolerance, velocity_table=velocity_table)
+        else:
+            add_focused_fingers(geometry, finger_layer, origin, distance_to_idt, wavelength, periods, angle, offset,
+                                overlap, tolerance=tolerance, velocity_table=velocity_table)
+
+        # pad region
+        sector_p = Polygon(sector(origin, distance_to_idt + (pad_periods+4) * wavelength + width / 2,
+                                  -angle/2, angle/2, velocity_table=velocity_table))
+        block = Polygon([(origin[0]+distance_to_idt - wavelength, origin[1]+pad_height/2),
+                         (origin[0]+distance_to_idt - wavelength, origin[1]-pad_height/2),
+                         (pad_end, origin[1]-pad_height/2),
+                         (pad_end, origin[1]+pad_height/2)])
+        wg = Polygon([(wg_start, origin[1]+10),
+                      (wg_start, origin[1]-10),
+                      (wg_start + pad_length, origin[1]-10),
+                      (wg_start + pad_length, origin[1]+10)])
+        neg_region = sector_p.union(wg)
+        pad2 = block.difference(neg_region)
+        u_tri = Polygon([(origin[0]+distance_to_idt - wavelength, origin[1]+pad_height/2),
+                         (origin[0]+distance_to_idt + 10*wavelength, origin[1]+pad_height/2),
+                         (origin[0]+distance_to_idt - wavelength, (origin[1]+distance_to_idt - wavelength)*np.sin(angle/2)/np.cos(angle/2))])
+        l_tri = Polygon([(origin[0]+distance_to_idt - wavelength, origin[1]-pad_height/2),
+                         (origin[0]+distance_to_idt + 10*wavelength, origin[1]-pad_height/2),
+                         (origin[0]+distance_to_idt - wavelength, -(origin[1]+distance_to_idt - wavelength)*np.sin(angle/2)/np.cos(angle/2))])
+        pad1 = pad2.difference(u_tri)
+        pad = pad1.difference(l_tri)
+        geometry.add_to_layer(pad_layer, pad)
+    idt.add_cell(geometry, origin=(0, 0))
+
+    # markers and label sit 250um above and below the focus, or further out if the pads are taller
+    marker_y = max(250, pad_height/2 + 55)
+    cross_p = CrossMarker(origin=(origin[0]+distance_to_idt-wavelength-100, origin[1]+marker_y),
+                          cross_length=12.5, cross_width=2.5, paddle_length=12.5, paddle_width=2.5)
+    cross_q = CrossMarker(origin=(origin[0] + distance_to_idt - wavelength - 100, origin[1] - marker_y),
+                          cross_length=12.5, cross_width=2.5, paddle_length=12.5, paddle_width=2.5)
+    cross_r = CrossMarker(origin=(origin[0] + distance_to_idt - wavelength + 400, origin[1] + marker_y),
+                          cross_length=12.5, cross_width=2.5, paddle_length=12.5, paddle_width=2.5)
+    cross_s = CrossMarker(origin=(origin[0] + distance_to_idt - wavelength + 400, origin[1] - marker_y),
+                          cross_length=12.5, cross_width=2.5, paddle_length=12.5, paddle_width=2.5)
+    idt.add_to_layer(align_layer, cross_p, cross_q, cross_r, cross_s)
+    add_text(idt, align_layer, origin=[origin[0]+distance_to_idt-wavelength-60, origin[1] - marker_y], height=40,
+             text=label, alignment='left-center')
+
+    return idt
@@ -0,0 +1,238 @@
+# Shapely-free storage for axis-aligned rectangles and other simple polygons.
+# Rectangles holds many rectangles as one (N, 4) array of (x0, y0, x1, y1), Polygons holds many polygons with the
+# same number of corners as one (N, K, 2) array. Both can be added to a gdshelpers Cell like any other geometry:
+# cell.add_to_layer(layer, Rectangles(...))
+# when the cell is saved with save_gds(filename, cell) they are written by numpy as BOUNDARY records directly, no
+# shapely Polygon is created for them. Everything else (bounds, other file formats, show, positive resist conversion,
+# and a plain cell.save) gets a MultiPolygon through get_shapely_object(), which is built in one go from a WKB buffer
+# install_writer() makes cell.save (also with parallel=True) write them directly as well, for the rest of the process
+# all measurements should be in um
+
+import copy
+import datetime
+from struct import pack
+
+import numpy as np
+from shapely import wkb
+import gdshelpers.export.gdsii_export as gdsii_export
+
+
+def _gdsii_boundaries(rings, layer, grid_steps_per_unit):
+    # GDSII records of polygons from an (N, K, 2) array of open rings: BOUNDARY, LAYER, DATATYPE, XY with the ring
+    # closed by its first point and ENDEL
+    # layer can be an int or a (layer, datatype) tuple, like gdshelpers an int layer is also used as datatype
+    layer, datatype = (layer, layer) if isinstance(layer, int) else layer
+    n, k = rings.shape[:2]
+    records = np.empty(n, dtype=[('boundary', '>u2', (2,)), ('layer', '>u2', (3,)), ('datatype', '>u2', (3,)),
+                                 ('xy_header', '>u2', (2,)), ('xy', '>i4', (k + 1, 2)), ('endel', '>u2', (2,))])
+    records['boundary'] = (4, 0x0800)
+    records['layer'] = (6, 0x0D02, layer)
+    records['datatype'] = (6, 0x0E02, datatype)
+    records['xy_header'] = (4 + 8 * (k + 1), 0x1003)
+    xy = np.round(rings * grid_steps_per_unit)
+    records['xy'][:, :k] = xy
+    records['xy'][:, k] = xy[:, 0]
+    records['endel'] = (4, 0x1100)
+    return records.tobytes()
+
+
+def _wkb_polygons(rings):
+    # little endian WKB records of polygons without holes from an (N, K, 2) array of open rings: byte order,
+    # type (3 = polygon), number of rings, number of points and the ring closed with its first point
+    n, k = rings.shape[:2]
+    records = np.empty(n, dtype=[('byte_order', 'u1'), ('geometry_type', '<u4'), ('n_rings', '<u4'),
+                                 ('n_points', '<u4'), ('xy', '<f8', (k + 1, 2))])
+    records['byte_order'] = 1
+    records['geometry_type'] = 3
+    records['n_rings'] = 1
+    records['n_points'] = k + 1
+    records['xy'][:, :k] = rings
+    records['xy'][:, k] = rings[:, 0]
+    return records.tobytes()
+
+
+def polygons_to_multipolygon(rings):
+    # converts polygons to a single shapely MultiPolygon, rings is an (N, K, 2) array or a list of (K, 2) arrays
+    # with any number of points each (the rings do not have to be closed)
+    # the WKB buffer is assembled with numpy and parsed by GEOS in one call, which avoids creating a python
+    # Polygon object per polygon (works with shapely 1.x and 2.x)
+    if isinstance(rings, np.ndarray) and rings.ndim == 3:
+        groups = [np.asarray(rings, dtype=float)]
+    else:
+        by_length = {}
+        for ring in rings:
+            by_length.setdefault(len(ring), []).append(ring)
+        groups = [np.asarray(group, dtype=float) for group in by_length.values()]
+    count = sum(len(group) for group in groups)
+    header = np.array([(1, 6, count)], dtype=[('byte_order', 'u1'), ('geometry_type', '<u4'), ('n', '<u4')])
+    return wkb.loads(header.tobytes() + b''.join(_wkb_polygons(group) for group in groups if len(group)))
+
+
+def rectangles_to_multipolygon(rects):
+    # converts an (N, 4, 2) corner array to a single shapely MultiPolygon
+    return polygons_to_multipolygon(np.asarray(rects, dtype=float).reshape(-1, 4, 2))
+
+
+class Rectangles:
+    # a set of axis-aligned rectangles given as (x0, y0, x1, y1), one row per rectangle
+    # the corners can be given in any order, they are sorted so that x0 <= x1 and y0 <= y1
+    __slots__ = ('xyxy',)
+
+    def __init__(self, xyxy):
+        xyxy = np.array(xyxy, dtype=float).reshape(-1, 4)
+        self.xyxy = np.column_stack((np.minimum(xyxy[:, 0], xyxy[:, 2]), np.minimum(xyxy[:, 1], xyxy[:, 3]),
+                                     np.maximum(xyxy[:, 0], xyxy[:, 2]), np.maximum(xyxy[:, 1], xyxy[:, 3])))
+
+    @classmethod
+    def from_corners(cls, rects):
+        # takes an (N, 4, 2) corner array as returned by idt_fingers.finger_rectangles
+        rects = np.asarray(rects, dtype=float).reshape(-1, 4, 2)
+        return cls(np.column_stack((rects[:, :, 0].min(axis=1), rects[:, :, 1].min(axis=1),
+                                    rects[:, :, 0].max(axis=1), rects[:, :, 1].max(axis=1))))
+
+    def __len__(self):
+        return len(self.xyxy)
+
+    @property
+    def corners(self):
+        # (N, 4, 2) corner array in the order (x0, y0), (x0, y1), (x1, y1), (x1, y0)
+        x0, y0, x1, y1 = self.xyxy.T
+        return np.stack((np.column_stack((x0, y0)), np.column_stack((x0, y1)),
+                         np.column_stack((x1, y1)), np.column_stack((x1, y0))), axis=1)
+
+    @property
+    def bounds(self):
+        if not len(self):
+            return ()
+        return (self.xyxy[:, 0].min(), self.xyxy[:, 1].min(), self.xyxy[:, 2].max(), self.xyxy[:, 3].max())
+
+    def get_shapely_object(self):
+        return rectangles_to_multipolygon(self.corners)
+
+    def to_gdsii(self, layer, grid_steps_per_unit=1000):
+        # GDSII BOUNDARY records of all rectangles, layer can be an int or a (layer, datatype) tuple
+        return _gdsii_boundaries(self.corners, layer, grid_steps_per_unit)
+
+
+class Polygons:
+    # a set of polygons without holes that all have the same number of corners, as an (N, K, 2) array of open
+    # rings (the first point is not repeated at the end)
+    __slots__ = ('rings',)
+
+    def __init__(self, rings):
+        self.rings = np.asarray(rings, dtype=float)
+        if self.rings.ndim != 3 or self.rings.shape[2] != 2:
+            raise ValueError('rings must be an (N, K, 2) array, got shape {}'.format(self.rings.shape))
+
+    def __len__(self):
+        return len(self.rings)
+
+    @property
+    def bounds(self):
+        if not len(self):
+            return ()
+        return tuple(self.rings.min(axis=(0, 1))) + tuple(self.rings.max(axis=(0, 1)))
+
+    def get_shapely_object(self):
+        return polygons_to_multipolygon(self.rings)
+
+    def to_gdsii(self, layer, grid_steps_per_unit=1000):
+        # GDSII BOUNDARY records of all polygons, layer can be an int or a (layer, datatype) tuple
+        return _gdsii_boundaries(self.rings, layer, grid_steps_per_unit)
+
+
+def add_rectangles(cell, layer, xyxy):
+    # adds rectangles given as (x0, y0, x1, y1) rows to the cell, returns the Rectangles object
+    rectangles = Rectangles(xyxy)
+    if len(rectangles):
+        cell.add_to_layer(layer, rectangles)
+    return rectangles
+
+
+# GDSII writer --------------------------------------------------------------------------------------------------
+# gdshelpers writes every cell with gdsii_export._cell_to_gdsii_binary, which turns all geometry into shapely
+# objects first. cell_to_gdsii_binary writes the cell without its Rectangles and Polygons through that function and
+# then appends their records in front of the closing ENDSTR record
+# Polygons with more corners than max_points still go through shapely, which fractures them
+
+# the original writer, also when this module is reloaded after install_writer
+_write_shapely_cell = getattr(gdsii_export._cell_to_gdsii_binary, 'shapely_writer',
+                              gdsii_export._cell_to_gdsii_binary)
+
+
+def cell_to_gdsii_binary(cell, grid_steps_per_unit, max_points, max_line_points, timestamp):
+    shapely_layers = {}
+    raw_layers = {}
+    for layer, geometries in cell.layer_dict.items():
+        for geometry in geometries:
+            # anything with its own to_gdsii (also idt_fingers.FingerArray) is written raw
+            raw = hasattr(geometry, 'to_gdsii') and not (isinstance(geometry, Polygons) and
+                                                         geometry.rings.shape[1] >= max_points)
+            (raw_layers if raw else shapely_layers).setdefault(layer, []).append(geometry)
+    if not raw_layers:
+        return _write_shapely_cell(cell, grid_steps_per_unit, max_points, max_line_points, timestamp)
+
+    shapely_cell = copy.copy(cell)
+    shapely_cell.layer_dict = shapely_layers
+    binary = _write_shapely_cell(shapely_cell, grid_steps_per_unit, max_points, max_line_points, timestamp)
+    raw = b''.join(geometry.to_gdsii(layer, grid_steps_per_unit)
+                   for layer, geometries in raw_layers.items() for geometry in geometries)
+    return binary[:-4] + raw + binary[-4:]
+
+
+cell_to_gdsii_binary.shapely_writer = _write_shapely_cell
+
+
+def install_writer():
+    # opt in to writing Rectangles and Polygons directly from cell.save, for every cell saved by this process
+    # without it only save_gds, write_gdsii_file and idt_fingers.save_with_fingers write them directly
+    gdsii_export._cell_to_gdsii_binary = cell_to_gdsii_binary
+
+
+def write_gdsii_file(outfile, cell, rectangle_stream=(), unit=1e-6, grid_steps_per_unit=1000, max_points=4000,
+                     max_line_points=4000, timestamp=None):
+    # writes the cell and all its sub-cells to a GDS file like gdshelpers' write_cell_to_gdsii_file, plus the
+    # (layer, geometry) pairs of rectangle_stream in the structure of the top cell, the geometry can be anything with
+    # a to_gdsii method (Rectangles, Polygons, idt_fingers.FingerArray)
+    # the stream is consumed one item at a time and written right away, so it can be a generator of any length
+    timestamp = datetime.datetime.now() if timestamp is None else timestamp
+
+    cells = []
+
+    def add_cells_to_unique_list(start_cell):
+        cells.append(start_cell)
+        for c in start_cell.cells:
+            if c['cell'] not in cells:
+                if c['cell'].name in [known.name for known in cells]:
+                    raise AssertionError(
+                        'Each cell name must be unique, "{}" is used more than once'.format(c['cell'].name))
+                add_cells_to_unique_list(c['cell'])
+
+    add_cells_to_unique_list(cell)
+
+    name = 'gdshelpers_exported_library'
+    name = name + '\0' * (len(name) % 2)
+    grid_step_unit = unit / grid_steps_per_unit
+    outfile.write(pack('>3H', 6, 0x0002, 0x258))  # HEADER v6.0
+    outfile.write(pack('>14H', 28, 0x0102, *timestamp.timetuple()[:6] * 2))  # BGNLIB
+    outfile.write(pack('>2H', 4 + len(name), 0x0206) + name.encode('ascii'))  # LIBNAME
+    outfile.write(pack('>2H', 20, 0x0305) + gdsii_export._real_to_8byte(grid_step_unit / unit) +
+                  gdsii_export._real_to_8byte(grid_step_unit))  # UNITS
+
+    top = cell_to_gdsii_binary(cell, grid_steps_per_unit, max_points, max_line_points, timestamp)
+    outfile.write(top[:-4])
+    for layer, geometry in rectangle_stream:
+        outfile.write(geometry.to_gdsii(layer, grid_steps_per_unit))
+    outfile.write(top[-4:])  # ENDSTR
+    for c in cells[1:]:
+        outfile.write(cell_to_gdsii_binary(c, grid_steps_per_unit, max_points, max_line_points, timestamp))
+    outfile.write(pack('>2H', 4, 0x0400))  # ENDLIB
+
+
+def save_gds(filename, cell, rectangle_stream=(), grid_steps_per_micron=1000):
+    # saves the cell as a GDS file like cell.save(filename), with its Rectangles and Polygons written directly and
+    # the (layer, geometry) pairs of rectangle_stream streamed into the top cell (see write_gdsii_file)
+    if not filename.endswith('.gds'):
+        filename += '.gds'
+    with open(filename, 'wb') as outfile:
+        write_gdsii_file(outfile, cell, rectangle_stream, grid_steps_per_unit=grid_steps_per_micron)
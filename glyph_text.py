@@ -0,0 +1,134 @@
+# Text built from shared glyph cells.
+# gdshelpers' Text draws and merges the polygons of every character each time a label is made. Here every character
+# of a font is drawn once per layer and height as its own cell (see shared_cells) and a label is a row of references
+# to these glyph cells, placed exactly where Text would draw the characters. Large sweeps only ever store the ten
+# digits and the few letters they use, however many labels there are.
+# GlyphGridLayout at the bottom does the same for the row and column labels of a layout.
+# gdshelpers does not make its fonts public, so everything is taken from its Text part: every glyph is drawn by Text,
+# and the width of a character and the advance from one character to the next are measured once per font on texts
+# of height 1, as the shift between the left and right aligned text and as the shift of a probe character drawn
+# behind them.
+# all measurements should be in um, angles in radians
+
+import functools
+
+import numpy as np
+from gdshelpers.helpers.alignment import Alignment
+from gdshelpers.layout import GridLayout
+from gdshelpers.parts.text import Text
+
+from shared_cells import shared_cell
+
+# character drawn behind the measured texts, it has to be drawn as the rightmost part of the text
+_PROBE = 'H'
+
+
+def _text_geometry(text, height=1, alignment='left-bottom', font='stencil'):
+    try:
+        return Text((0, 0), height, text, alignment=alignment, font=font).get_shapely_object()
+    except AssertionError as error:
+        raise ValueError(str(error))
+
+
+@functools.lru_cache(maxsize=None)
+def _is_drawn(font, char):
+    # Text fails on a text that draws nothing, so the character is drawn behind the probe
+    return _text_geometry(_PROBE + char, font=font).area > _text_geometry(_PROBE, font=font).area
+
+
+@functools.lru_cache(maxsize=None)
+def _probe_shift(font, text):
+    # how far to the right Text draws the probe character when it follows the text
+    return _text_geometry(text + _PROBE, font=font).bounds[2] - _text_geometry(_PROBE, font=font).bounds[2]
+
+
+@functools.lru_cache(maxsize=None)
+def _advance(font, pair):
+    # distance from the left edge of the first character of the pair to the left edge of the second one: the width
+    # of the first character plus the kerning between the two
+    return _probe_shift(font, pair) - _probe_shift(font, pair[1])
+
+
+def _box_width(font, text):
+    # width of the box Text aligns the text by, the text has to draw something
+    return _text_geometry(text, font=font).bounds[0] - \
+        _text_geometry(text, alignment='right-bottom', font=font).bounds[0]
+
+
+@functools.lru_cache(maxsize=None)
+def _width(font, char):
+    # width of the character, the box of a drawn character is as wide as the character itself. A character that
+    # draws nothing (a space) is measured behind the probe, where the box ends at its right edge as long as it is
+    # wider than half the probe
+    if _is_drawn(font, char):
+        return _box_width(font, char)
+    return _box_width(font, _PROBE + char) - _advance(font, _PROBE + char)
+
+
+def glyph_cell(layer, char, height, font='stencil'):
+    # cell with one character of the font, centered on x = 0 with its baseline on y = 0
+    glyph, new = shared_cell('glyph', (layer, font, char, height))
+    if new:
+        glyph.add_to_layer(layer, _text_geometry(char, height, 'center-bottom', font))
+    return glyph
+
+
+def glyph_positions(text, height, font='stencil', line_spacing=1.5):
+    # positions of the characters (their centre on the baseline) as drawn by gdshelpers' Text, as a list of
+    # (char, x, y), and the box Text aligns the text by, as [[x0, y0], [x1, y1]]
+    # line breaks ("\n") start a new line line_spacing * height further down
+    # raises a ValueError for characters the font does not have
+    positions = []
+    max_x = 0
+    cursor_x, cursor_y = 0, 0
+    for i, char in enumerate(text):
+        if char == '\n':
+            cursor_x, cursor_y = 0, cursor_y - line_spacing * height
+            continue
+        width = _width(font, char) * height
+        cursor_x += width / 2
+        if _is_drawn(font, char):
+            positions.append((char, cursor_x, cursor_y))
+        if i < len(text) - 1 and text[i + 1] != '\n':
+            cursor_x += _advance(font, text[i:i + 2]) * height - width / 2
+        max_x = max(max_x, cursor_x + width / 2)
+    return positions, np.array([[0, cursor_y], [max_x, height]])
+
+
+def add_text(cell, layer, origin, height, text, alignment='left-bottom', angle=0., font='stencil', line_spacing=1.5):
+    # adds the text to the cell as references to glyph cells, with the same arguments and the same result as
+    # cell.add_to_layer(layer, Text(origin, height, text, alignment, angle, font, line_spacing))
+    # returns the box the text was aligned by, before the rotation, as [[x0, y0], [x1, y1]]
+    positions, bbox = glyph_positions(str(text), height, font, line_spacing)
+    offset = Alignment(alignment).calculate_offset(bbox)
+    rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+    for char, x, y in positions:
+        position = np.asarray(origin, dtype=float) + rotation @ (np.array((x, y)) + offset)
+        cell.add_cell(glyph_cell(layer, char, height, font), origin=tuple(position), angle=angle)
+    return bbox + offset + origin
+
+
+def text_cell(layer, height, text, font='stencil', line_spacing=1.5):
+    # shared cell with the text, placed so that the lower left corner of its outline is at (0, 0), like a Text with
+    # true_bbox_alignment=True and the default alignment
+    label, new = shared_cell('text', (layer, font, text, height, line_spacing))
+    if new:
+        positions, bbox = glyph_positions(text, height, font, line_spacing)
+        lower_left = np.min([np.array(glyph_cell(layer, char, height, font).bounds[:2]) + (x, y)
+                             for char, x, y in positions], axis=0)
+        offset = Alignment('left-bottom').calculate_offset(bbox)
+        add_text(label, layer, -lower_left - offset, height, text, font=font, line_spacing=line_spacing)
+    return label
+
+
+# GridLayout labels -------------------------------------------------------------------------------------------------
+
+class GlyphGridLayout(GridLayout):
+    # GridLayout whose row and column labels are text_cells on the text layer of the layout, begin_new_row and
+    # add_column_label_row are GridLayout's own and place their labels through add_label_to_row
+    def add_label_to_row(self, text, size=None, origin=None, alignment='left-center'):
+        if not text or origin is not None:
+            return super().add_label_to_row(text, size, origin, alignment)
+        size = size if size else self.row_text_size
+        self.add_to_row(text_cell(self.text_layer, size, text), alignment=alignment, realign=False,
+                        allow_region_layer=self.region_layer_on_labels)
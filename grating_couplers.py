@@ -0,0 +1,144 @@
+# Grating couplers built once per parameter set, and positive resist couplers once per port.
+# A sweep places the same traditional grating coupler (and its positive resist outline) at many ports, and every
+# GratingCoupler tessellates all its grating arcs again and every convert_to_positive_resist buffers them again.
+# Here the coupler of a parameter set is built once at the origin, pointing along +x, and every coupler is that
+# geometry rotated and moved onto its port. The coupler only depends on the angle through a rotation of all its
+# points, so the placed coupler is the same as one built at the port, up to floating point rounding far below the
+# 1 nm grid the layouts are written on.
+# Positive resist couplers are not moved that way: their outer outline is a buffer simplified with a tolerance of
+# buffer radius / 20, and which points the simplification keeps depends on the last bits of the coordinates, so a
+# moved outline can differ from the one of a direct build by up to that tolerance (and the under-etching holes placed
+# along it move with it). They are built at their port like GratingCoupler does and converted there, once for every
+# placement, so the same coupler at the same port (e.g. the four couplers of a frequency shifter drawn in every device
+# of a sweep) is still only built and buffered once.
+# The couplers themselves are built by traditional_coupler, which computes the apodized duty cycle profile and all
+# grating arcs as numpy arrays in one pass instead of one grating line at a time. It takes the parameters of
+# GratingCoupler.make_traditional_coupler and gives the same shapely object; with a tolerance (in nm) the arcs get as
+# many points as they need for their radius instead of a fixed number, see focused_fingers.arc_segments.
+# e.g. GC2_shapely = grating_coupler_at_port(wg1.current_port, positive_resist=5, **GC_param)
+# is the same as convert_to_positive_resist(GratingCoupler.make_traditional_coupler_at_port(wg1.current_port,
+#                                                                                            **GC_param), 5)
+# all measurements should be in um, angles in radians
+
+import math
+
+import numpy as np
+import shapely.affinity
+import shapely.geometry
+
+from focused_fingers import annular_sectors
+from gds_rectangles import polygons_to_multipolygon
+from shared_cells import parameter_hash
+
+_couplers = {}
+
+
+def grating_profile(grating_period, grating_ff, n_gratings, ap_max_ff=1.0, n_ap_gratings=0, ap_start_period=None,
+                    implement_cadence_ff_bug=True):
+    # period and fill factor of every grating line, from the taper outwards: n_ap_gratings apodized lines with the fill
+    # factor going from ap_max_ff to grating_ff (and the period from ap_start_period to grating_period), then
+    # n_gratings lines with grating_period and grating_ff
+    # with implement_cadence_ff_bug (the gdshelpers default) the apodized fill factors skip ap_max_ff itself
+    if not (0 < grating_ff < 1 and 0 < ap_max_ff <= 1):
+        raise ValueError('fill factors must be between 0 and 1, got grating_ff={} and ap_max_ff={}'
+                         .format(grating_ff, ap_max_ff))
+    if implement_cadence_ff_bug:
+        apodized_ffs = np.linspace(ap_max_ff, grating_ff, n_ap_gratings + 1)[1:]
+    else:
+        apodized_ffs = np.linspace(ap_max_ff, grating_ff, n_ap_gratings)
+    ap_periods = np.linspace(ap_start_period if ap_start_period is not None else grating_period, grating_period,
+                             n_ap_gratings)
+    periods = np.concatenate((ap_periods, np.full(n_gratings, float(grating_period))))
+    ffs = np.concatenate((apodized_ffs, np.full(n_gratings, float(grating_ff))))
+    return periods, ffs
+
+
+def grating_radii(periods, ffs, taper_length=None):
+    # taper radius and the radii of the inner and outer edges of all grating lines, as (taper, (N, 2) array)
+    # every line starts with its gap, period * (1 - ff), and then has period * ff of material; without a taper_length
+    # the taper is as long as the grating
+    steps = np.empty(2 * len(periods))
+    steps[0::2] = periods * (1 - ffs)
+    steps[1::2] = periods * ffs
+    taper = taper_length if taper_length is not None else np.cumsum(np.concatenate(([0.], steps)))[-1]
+    # added up one after another from the taper, like GratingCoupler does, so the radii are the same to the last bit
+    return taper, np.cumsum(np.concatenate(([taper], steps)))[1:].reshape(-1, 2)
+
+
+def traditional_coupler(origin, width, full_opening_angle, grating_period, grating_ff, n_gratings, ap_max_ff=1.0,
+                        n_ap_gratings=0, taper_length=None, angle=-np.pi / 2, n_points=394,
+                        implement_cadence_ff_bug=True, ap_start_period=None, tolerance=None):
+    # shapely object of GratingCoupler.make_traditional_coupler(...) (same parameters, the taper triangle is always
+    # included), with all grating lines computed at once
+    # tolerance is the largest allowed deviation of the grating arcs from true circles in nm, if it is None every
+    # arc has n_points // 2 points like in GratingCoupler
+    opening_angle = full_opening_angle / 2
+    periods, ffs = grating_profile(grating_period, grating_ff, n_gratings, ap_max_ff, n_ap_gratings, ap_start_period,
+                                   implement_cadence_ff_bug)
+    taper, radii = grating_radii(periods, ffs, taper_length)
+
+    # taper triangle: the waveguide widens along two circles to the opening angle and ends on the taper radius
+    alpha = math.pi / 2 - opening_angle
+    c_radius = -math.sin(alpha) * width / 2 / (math.sin(alpha) - 1)
+    minimum_taper = math.sqrt(c_radius ** 2 + (c_radius + width / 2) ** 2
+                              - 2 * c_radius * (c_radius + width / 2) * math.cos(opening_angle))
+    if taper < minimum_taper:
+        raise ValueError('taper_length {} is shorter than the {} the opening angle needs'.format(taper, minimum_taper))
+    phi = np.linspace(0, opening_angle, 90) - math.pi / 2
+    upper_half = [np.cos(phi) * c_radius, np.sin(phi) * c_radius + c_radius + width / 2]
+    phi = np.linspace(-opening_angle, 0, 90) + math.pi / 2
+    lower_half = [np.cos(phi) * c_radius, np.sin(phi) * c_radius - c_radius - width / 2]
+    phi = np.linspace(opening_angle, -opening_angle, n_points // 2)
+    inner_circle = [np.cos(phi) * taper, np.sin(phi) * taper]
+    triangle = shapely.geometry.Polygon(np.hstack((upper_half, inner_circle, lower_half)).T)
+    triangle = shapely.affinity.rotate(triangle, angle, origin=[0, 0], use_radians=True)
+    triangle = shapely.affinity.translate(triangle, origin[0], origin[1])
+
+    # grating lines: the inner edge followed by the outer edge backwards, for all lines at once
+    if tolerance is None or not len(radii):
+        phi = np.linspace(-opening_angle + angle, opening_angle + angle, n_points // 2)
+        arcs = np.stack((radii[..., None] * np.cos(phi) + origin[0], radii[..., None] * np.sin(phi) + origin[1]),
+                        axis=-1)
+        rings = [np.concatenate((arcs[:, 0], arcs[:, 1, ::-1]), axis=1)]
+    else:
+        rings = annular_sectors(origin, radii[:, 0], radii[:, 1], -opening_angle + angle, opening_angle + angle,
+                                tolerance=tolerance)
+    gratings = polygons_to_multipolygon([ring for group in rings for ring in group])
+    return triangle.union(gratings)
+
+
+def canonical_coupler(**coupler_params):
+    # shapely object of the coupler at (0, 0) with angle 0, built the first time these parameters are asked for
+    key = parameter_hash((tuple(sorted(coupler_params.items())),))
+    if key not in _couplers:
+        _couplers[key] = traditional_coupler(origin=(0, 0), angle=0, **coupler_params)
+    return _couplers[key]
+
+
+def positive_resist_coupler(origin, angle, positive_resist, **coupler_params):
+    # convert_to_positive_resist of the coupler built at origin with angle, with positive_resist as the buffer radius,
+    # built the first time this placement is asked for
+    from gdshelpers.helpers.positive_resist import convert_to_positive_resist
+
+    key = parameter_hash((tuple(sorted(coupler_params.items())), positive_resist, tuple(origin), angle))
+    if key not in _couplers:
+        coupler = traditional_coupler(origin=origin, angle=angle, **coupler_params)
+        _couplers[key] = convert_to_positive_resist(coupler, positive_resist)
+    return _couplers[key]
+
+
+def grating_coupler(origin, angle=-np.pi / 2, positive_resist=None, **coupler_params):
+    # same as GratingCoupler.make_traditional_coupler(origin, angle=angle, **coupler_params).get_shapely_object(),
+    # converted to positive resist with a buffer of positive_resist if it is given
+    if positive_resist:
+        return positive_resist_coupler(origin, angle, positive_resist, **coupler_params)
+    c, s = np.cos(angle), np.sin(angle)
+    return shapely.affinity.affine_transform(canonical_coupler(**coupler_params), [c, -s, s, c, origin[0], origin[1]])
+
+
+def grating_coupler_at_port(port, positive_resist=None, **coupler_params):
+    # same as GratingCoupler.make_traditional_coupler_at_port(port, **coupler_params), see grating_coupler
+    coupler_params.setdefault('width', port.width)
+    origin = coupler_params.pop('origin', port.origin)
+    angle = coupler_params.pop('angle', port.angle)
+    return grating_coupler(origin, angle, positive_resist, **coupler_params)
@@ -0,0 +1,467 @@
+# Vectorized finger geometry for straight (non-focused) IDTs.
+# Fingers are kept in numpy arrays instead of being built one by one in a python loop. FingerArray holds the left
+# edge, width and y extent of every finger, rectangle corners are only built when the fingers are exported, in the
+# same order as the hand written coordinate lists in the IDT scripts:
+# (x0, y0), (x0, y1), (x1, y1), (x1, y0)
+# all measurements should be in um
+
+import numpy as np
+
+from gds_rectangles import Polygons, Rectangles, rectangles_to_multipolygon
+
+
+def finger_rectangles(x_left, x_right, y_bottom, y_top):
+    # builds an (N, 4, 2) array of rectangle corners, all arguments are broadcast against each other
+    x_left, x_right, y_bottom, y_top = np.broadcast_arrays(*[np.asarray(v, dtype=float)
+                                                             for v in (x_left, x_right, y_bottom, y_top)])
+    rects = np.empty(x_left.shape + (4, 2))
+    rects[..., 0, 0] = x_left
+    rects[..., 0, 1] = y_bottom
+    rects[..., 1, 0] = x_left
+    rects[..., 1, 1] = y_top
+    rects[..., 2, 0] = x_right
+    rects[..., 2, 1] = y_top
+    rects[..., 3, 0] = x_right
+    rects[..., 3, 1] = y_bottom
+    return rects.reshape(-1, 4, 2)
+
+
+class FingerArray:
+    # the fingers of a transducer as flat numpy arrays: left edge x, width and bottom/top y0, y1 of every finger,
+    # described in a local frame where the fingers are vertical, plus the layer they go on
+    # y0 and y1 may also be single values shared by all fingers
+    # translate, rotate and mirror return a new FingerArray that shares the finger arrays and only has a different
+    # 3x3 placement matrix, so moving a transducer with 10^5 fingers costs nothing until it is exported
+    __slots__ = ('x', 'width', 'y0', 'y1', 'layer', 'matrix')
+
+    def __init__(self, x, width, y0, y1, layer=1, matrix=None):
+        self.x = np.atleast_1d(np.asarray(x, dtype=float))
+        self.width = np.asarray(width, dtype=float)
+        self.y0 = np.asarray(y0, dtype=float)
+        self.y1 = np.asarray(y1, dtype=float)
+        self.layer = layer
+        self.matrix = np.eye(3) if matrix is None else np.asarray(matrix, dtype=float)
+
+    @classmethod
+    def concatenate(cls, finger_arrays):
+        # joins finger arrays with the same layer and placement into one
+        finger_arrays = list(finger_arrays)
+        if not finger_arrays:
+            raise ValueError('need at least one FingerArray to concatenate')
+        if len(set(fingers.layer for fingers in finger_arrays)) > 1:
+            raise ValueError('only fingers on the same layer can be concatenated')
+        if not all(np.allclose(fingers.matrix, finger_arrays[0].matrix) for fingers in finger_arrays):
+            raise ValueError('only fingers with the same placement can be concatenated')
+        x = np.concatenate([fingers.x for fingers in finger_arrays])
+        width, y0, y1 = [np.concatenate([np.broadcast_to(getattr(fingers, key), fingers.x.shape)
+                                         for fingers in finger_arrays]) for key in ('width', 'y0', 'y1')]
+        return cls(x, width, y0, y1, finger_arrays[0].layer, finger_arrays[0].matrix)
+
+    def __len__(self):
+        return len(self.x)
+
+    def _placed(self, transformation):
+        return FingerArray(self.x, self.width, self.y0, self.y1, self.layer, np.dot(transformation, self.matrix))
+
+    def translate(self, dx=0, dy=0):
+        return self._placed([[1, 0, dx], [0, 1, dy], [0, 0, 1]])
+
+    # builder_cache moves cached results with translated
+    translated = translate
+
+    def rotate(self, angle, origin=(0, 0)):
+        # rotates counterclockwise by angle (in radians) around origin
+        c, s = np.cos(angle), np.sin(angle)
+        ox, oy = origin
+        return self._placed([[c, -s, ox - c * ox + s * oy], [s, c, oy - s * ox - c * oy], [0, 0, 1]])
+
+    def mirror(self, x=None, y=None):
+        # mirrors about the vertical line at x, or the horizontal line at y
+        if (x is None) == (y is None):
+            raise ValueError('give either x (vertical mirror axis) or y (horizontal mirror axis)')
+        if x is not None:
+            return self._placed([[-1, 0, 2 * x], [0, 1, 0], [0, 0, 1]])
+        return self._placed([[1, 0, 0], [0, -1, 2 * y], [0, 0, 1]])
+
+    @property
+    def is_axis_aligned(self):
+        m = self.matrix[:2, :2]
+        return bool(np.allclose(m[[0, 1], [1, 0]], 0) or np.allclose(m[[0, 1], [0, 1]], 0))
+
+    @property
+    def _is_exact(self):
+        # the placement only swaps and flips axes, so the global corners are exactly the moved local ones
+        return bool(np.all(np.isin(self.matrix[:2, :2], (-1, 0, 1))))
+
+    @property
+    def corners(self):
+        # (N, 4, 2) corner array in the global frame
+        corners = finger_rectangles(self.x, self.x + self.width, self.y0, self.y1)
+        if np.array_equal(self.matrix, np.eye(3)):
+            return corners
+        # summed as origin + y * (finger direction) + x * (across), the order gdshelpers builds a straight
+        # waveguide segment in, so a finger_bundle lands on the same grid points as the waveguide it replaces
+        return (self.matrix[:2, 2] + corners[..., 1:] * self.matrix[:2, 1]) + corners[..., :1] * self.matrix[:2, 0]
+
+    @property
+    def bounds(self):
+        if not len(self):
+            return ()
+        corners = self.corners
+        return tuple(corners.min(axis=(0, 1))) + tuple(corners.max(axis=(0, 1)))
+
+    def to_polygons(self):
+        # all fingers as one shapely MultiPolygon
+        return rectangles_to_multipolygon(self.corners)
+
+    get_shapely_object = to_polygons
+
+    def to_rectangles(self):
+        # all fingers as gds_rectangles.Rectangles, only possible while the fingers are axis-aligned
+        if not self.is_axis_aligned:
+            raise ValueError('fingers rotated by an angle that is not a multiple of 90 degrees are not rectangles')
+        # two opposite corners are enough, Rectangles sorts them again after a rotation or mirror
+        x0, y0, x1, y1 = np.broadcast_arrays(self.x, self.y0, self.x + self.width, self.y1)
+        xyxy = np.column_stack((x0, y0, x1, y1))
+        if not np.array_equal(self.matrix, np.eye(3)):
+            xyxy = (np.dot(xyxy.reshape(-1, 2, 2), self.matrix[:2, :2].T) + self.matrix[:2, 2]).reshape(-1, 4)
+        return Rectangles(xyxy)
+
+    def to_gdsii(self, layer, grid_steps_per_unit=1000):
+        # GDSII BOUNDARY records of all fingers, written by gds_rectangles.save_gds like Rectangles and Polygons
+        if self._is_exact:
+            return self.to_rectangles().to_gdsii(layer, grid_steps_per_unit)
+        return Polygons(self.corners).to_gdsii(layer, grid_steps_per_unit)
+
+    def add_to_cell(self, cell):
+        # adds the fingers to their layer of the cell, as raw rectangles whenever possible
+        if len(self):
+            cell.add_to_layer(self.layer, self.to_rectangles() if self.is_axis_aligned else self.to_polygons())
+
+
+def periodic_fingers(x_left, width, y_bottom, y_top, wavelength, periods, layer=1):
+    # x_left, y_bottom and y_top describe the fingers of the first period (one entry per finger),
+    # width can be a single value or one value per finger
+    # the result is ordered period by period, and within a period in the order the fingers were given,
+    # which is the order the original loops added them to the cell
+    x_left = np.atleast_1d(np.asarray(x_left, dtype=float))
+    shifts = wavelength * np.arange(periods)[:, None]
+    per_finger = [np.broadcast_to(np.asarray(v, dtype=float), x_left.shape) for v in (width, y_bottom, y_top)]
+    return FingerArray((x_left[None, :] + shifts).ravel(), *[np.tile(v, periods) for v in per_finger], layer=layer)
+
+
+def add_periodic_fingers(cell, layer, x_left, width, y_bottom, y_top, wavelength, periods, aref=False, name=None):
+    # adds `periods` periods of fingers to the cell, the arguments describe the fingers of the first period
+    # (see periodic_fingers)
+    # with aref=True one period is built as its own sub-cell and placed `periods` times with a single GDS array
+    # reference, so file size and write time stay the same however many periods there are
+    # the sub-cell is named `name`, or "<cell name>_period" if no name is given, it has to be unique in the layout
+    # note that gdshelpers only looks at the first column of an array reference when it computes cell bounds
+    if not aref:
+        periodic_fingers(x_left, width, y_bottom, y_top, wavelength, periods, layer).add_to_cell(cell)
+        return None
+
+    from gdshelpers.geometry.chip import Cell
+
+    unit = Cell(name or cell.name + '_period')
+    periodic_fingers(x_left, width, y_bottom, y_top, wavelength, 1, layer).add_to_cell(unit)
+    cell.add_cell(unit, origin=(0, 0), columns=periods, rows=1, spacing=(wavelength, 0))
+    return unit
+
+
+# Streaming ---------------------------------------------------------------------------------------------------------
+# transducers with 10^5+ fingers do not have to exist in memory at once: the iter_* generators yield FingerArrays of
+# at most chunk_size fingers, add_finger_chunks puts them into a cell and save_with_fingers writes them straight into
+# a GDS file, so memory stays flat however many fingers there are
+# only the fingers of the top cell can be streamed. The finger builders of the sweep scripts (make_*_IDT_Fingers* in
+# GaP_AOFS_V5 and Phononic_circ_design_v0) build a few hundred fingers per device into sub-cells of the layout, which
+# are memoized and shared between devices, so they keep their fingers in memory
+
+def iter_periodic_fingers(x_left, width, y_bottom, y_top, wavelength, periods, layer=1, chunk_size=65536):
+    # same fingers as periodic_fingers, in chunks of whole periods
+    fingers_per_period = len(np.atleast_1d(x_left))
+    chunk_periods = max(1, chunk_size // fingers_per_period)
+    x_left = np.atleast_1d(np.asarray(x_left, dtype=float))
+    for start in range(0, periods, chunk_periods):
+        yield periodic_fingers(x_left + start * wavelength, width, y_bottom, y_top, wavelength,
+                               min(chunk_periods, periods - start), layer)
+
+
+def add_finger_chunks(cell, chunks):
+    # adds every FingerArray of an iterable of chunks to the cell, returns the number of fingers
+    count = 0
+    for fingers in chunks:
+        fingers.add_to_cell(cell)
+        count += len(fingers)
+    return count
+
+
+def save_with_fingers(filename, cell, chunks, grid_steps_per_micron=1000):
+    # saves the cell as a GDS file with the fingers of the chunks streamed into its top structure, the chunks are
+    # written one at a time and never stored in the cell
+    # chunks can be placed anywhere, also rotated (e.g. finger_bundle results), they are written as rectangles when
+    # their placement allows it and as polygons otherwise
+    from gds_rectangles import save_gds
+
+    save_gds(filename, cell, ((fingers.layer, fingers) for fingers in chunks), grid_steps_per_micron)
+
+
+# Finger bundles ----------------------------------------------------------------------------------------------------
+# the AOFS and phononic scripts draw a whole IDT arm as one multi-width waveguide: a Port whose width is the list
+# [finger, gap, finger, gap, ...] and one straight segment, every even entry becoming a finger. finger_bundle takes
+# the same port and length and builds all fingers at once from the width array, without the waveguide's per finger
+# shapely polygons and validity checks. The corners are computed with the same arithmetic as gdshelpers (the origin
+# plus the rotated segment, then the offset across it, with every offset summed up the way numpy sums it), so they
+# round to the same grid points even where a coordinate falls on half a nanometre
+
+def finger_bundle(port, length, layer=1):
+    # fingers of Waveguide.make_at_port(port).add_straight_segment(length), port.width is the width list
+    # returns a FingerArray in the frame of the port: the fingers run along y from 0 to length and x is measured
+    # across the bundle from its centre line. It can be added to a cell layer or passed to geometric_union like the
+    # waveguide, save_gds writes it without shapely
+    widths = np.atleast_1d(np.asarray(port.width, dtype=float))
+    angle = port.angle
+    rotation = np.array(((np.cos(angle), -np.sin(angle)), (np.sin(angle), np.cos(angle))))
+    direction = rotation[:, 0] / np.sqrt(np.sum(rotation[:, 0] ** 2))
+    across = np.array((direction[1], -direction[0]))
+
+    # edges of the fingers across the bundle, measured from its centre line
+    start = np.array([np.sum(widths[:2 * i]) for i in range((len(widths) + 1) // 2)]) - np.sum(widths) / 2
+
+    matrix = np.eye(3)
+    matrix[:2, 0] = across
+    matrix[:2, 1] = rotation[:, 0]
+    matrix[:2, 2] = port.origin
+    return FingerArray(start, widths[0::2], 0., length, layer, matrix)
+
+
+# Electrode sequences ----------------------------------------------------------------------------------------------
+# an electrode sequence describes one wavelength of a transducer with one character per electrode slot:
+# '+' is a finger on the upper busbar, '-' a finger on the lower busbar and '0' an empty slot
+# every slot is wavelength / len(sequence) wide and by default the finger covers the first half of its slot
+# e.g. "-+" is a single finger IDT (lambda/4 fingers), "--++" a split finger IDT (lambda/8 fingers),
+# SPUDT cells can be described by giving their own finger widths and/or positions
+
+def electrode_pattern(sequence, wavelength, widths=None, positions=None, metallization=0.5):
+    # returns the left edges (relative to the start of the period), widths and polarity (+1 upper, -1 lower)
+    # of the fingers in one period, empty slots are dropped
+    # widths: one finger width per character (um), replaces metallization * slot width
+    # positions: one left edge per character (um from the start of the period), replaces the slot edges
+    if not sequence or set(sequence) - set('+-0'):
+        raise ValueError('electrode sequence must be a non-empty string of "+", "-" and "0", got {!r}'.format(sequence))
+    n_slots = len(sequence)
+    slot = wavelength / n_slots
+    x_left = np.arange(n_slots) * slot if positions is None else np.asarray(positions, dtype=float)
+    finger_widths = np.full(n_slots, metallization * slot) if widths is None else np.asarray(widths, dtype=float)
+    if x_left.shape != (n_slots,) or finger_widths.shape != (n_slots,):
+        raise ValueError('widths and positions need one entry per character of the electrode sequence')
+    polarity = np.array([{'+': 1, '-': -1, '0': 0}[c] for c in sequence])
+    keep = polarity != 0
+    return x_left[keep], finger_widths[keep], polarity[keep]
+
+
+def electrode_fingers(sequence, wavelength, periods, x0, upper_y, lower_y, layer=1, widths=None, positions=None,
+                      metallization=0.5):
+    # FingerArray with `periods` repetitions of the electrode sequence, starting at x0
+    # '+' fingers span upper_y = (y_bottom, y_top), '-' fingers span lower_y
+    x_left, finger_widths, polarity = electrode_pattern(sequence, wavelength, widths, positions, metallization)
+    upper = polarity > 0
+    return periodic_fingers(x0 + x_left, finger_widths,
+                            np.where(upper, upper_y[0], lower_y[0]), np.where(upper, upper_y[1], lower_y[1]),
+                            wavelength, periods, layer)
+
+
+def iter_electrode_fingers(sequence, wavelength, periods, x0, upper_y, lower_y, layer=1, widths=None,
+                           positions=None, metallization=0.5, chunk_size=65536):
+    # same fingers as electrode_fingers, in chunks of at most chunk_size fingers (see iter_periodic_fingers)
+    fingers = electrode_fingers(sequence, wavelength, 1, x0, upper_y, lower_y, layer, widths, positions,
+                                metallization)
+    return iter_periodic_fingers(fingers.x, fingers.width, fingers.y0, fingers.y1, wavelength, periods, layer,
+                                 chunk_size)
+
+
+def _last_finger_edge(sequence, wavelength, periods, x0, widths, positions, metallization):
+    # x coordinate of the right edge of the last finger
+    x_left, finger_widths, polarity = electrode_pattern(sequence, wavelength, widths, positions, metallization)
+    return x0 + np.max(x_left + finger_widths) + (periods - 1) * wavelength
+
+
+def add_electrode_fingers(cell, layer, sequence, wavelength, periods, x0, upper_y, lower_y, widths=None,
+                          positions=None, metallization=0.5, aref=False, name=None):
+    # adds `periods` repetitions of the electrode sequence to the cell (see electrode_fingers)
+    # with aref=True one period is placed with an array reference (see add_periodic_fingers)
+    # returns the x coordinate of the right edge of the last finger
+    if aref:
+        fingers = electrode_fingers(sequence, wavelength, 1, x0, upper_y, lower_y, layer, widths, positions,
+                                    metallization)
+        add_periodic_fingers(cell, layer, fingers.x, fingers.width, fingers.y0, fingers.y1, wavelength, periods,
+                             aref=True, name=name)
+    else:
+        electrode_fingers(sequence, wavelength, periods, x0, upper_y, lower_y, layer, widths, positions,
+                          metallization).add_to_cell(cell)
+    return _last_finger_edge(sequence, wavelength, periods, x0, widths, positions, metallization)
+
+
+def electrode_idt(sequence, wavelength, periods, height, offset, layer, coords, pad_height=2, widths=None,
+                  positions=None, metallization=0.5, aref=False, name='idt', stream=False, chunk_size=65536):
+    # straight IDT with two busbar pads, the fingers are given by an electrode sequence (see electrode_pattern)
+    # coords is the lower left corner, the first slot starts one slot width to the right of it
+    # pads are finger overlap (2um) into the fingers and run four finger widths past the last finger
+    # with stream=True the cell only gets the pads and the fingers are returned as a generator of chunks:
+    #   cell, fingers = electrode_idt(..., stream=True)
+    #   save_with_fingers('idt.gds', cell, fingers)
+    # all measurements should be in um
+    from gdshelpers.geometry.chip import Cell
+
+    ox = coords[0]
+    oy = coords[1]
+    finger_overlap = 2
+    shift = pad_height - finger_overlap
+    cell = Cell(name)
+    width = np.max(electrode_pattern(sequence, wavelength, widths, positions, metallization)[1])
+
+    upper_y = (oy+offset+shift+pad_height, oy+offset+height+shift+finger_overlap+pad_height)
+    lower_y = (oy+shift, oy+finger_overlap+height)
+    x0 = ox + wavelength/len(sequence)
+    if stream:
+        fingers = iter_electrode_fingers(sequence, wavelength, periods, x0, upper_y, lower_y, layer, widths,
+                                         positions, metallization, chunk_size)
+        pad_width = _last_finger_edge(sequence, wavelength, periods, x0, widths, positions, metallization)
+    else:
+        pad_width = add_electrode_fingers(cell, layer, sequence, wavelength, periods, x0, upper_y, lower_y, widths,
+                                          positions, metallization, aref=aref)
+    pu_coord = upper_y[1]
+
+    pl = (ox, oy, 4*width+pad_width, oy+pad_height)
+    pu = (ox, pu_coord - finger_overlap, 4*width+pad_width, pu_coord - finger_overlap + pad_height)
+    cell.add_to_layer(layer, Rectangles([pl, pu]))
+
+    if stream:
+        return cell, fingers
+    return cell
+
+
+def _second_sw_idt(sequence, wavelength, periods, finger_layer, pad_layer, coords, ox1, upper_y, lower_y, widths,
+                   positions, metallization, ext, aref):
+    # shared sub-cell of the second transducer of electrode_idt_sw: the fingers starting at ox1 and pads routed to
+    # the right of them
+    from shapely.geometry import Polygon
+    from shared_cells import shared_cell
+
+    oy = coords[1]
+    finger_overlap = 2
+    pad_height = finger_overlap
+    width = np.max(electrode_pattern(sequence, wavelength, widths, positions, metallization)[1])
+    slot = wavelength / len(sequence)
+
+    idt, new = shared_cell('sw_idt_second', (sequence, wavelength, periods, finger_layer, pad_layer, tuple(coords),
+                                             ox1, upper_y, lower_y, widths, positions, metallization, ext, aref))
+    if new:
+        pad_width1 = add_electrode_fingers(idt, finger_layer, sequence, wavelength, periods, ox1 + slot, upper_y,
+                                           lower_y, widths, positions, metallization, aref=aref)
+        pu_coord1 = upper_y[1]
+
+        ql = (ox1, oy-ext, 4 * width + pad_width1, oy + pad_height)
+        qu = (ox1, pu_coord1 - finger_overlap, 4 * width + pad_width1 + 50,
+              pu_coord1 - finger_overlap + pad_height+ext)
+        qu1a = [(4 * width + pad_width1 + 50, pu_coord1 - finger_overlap + pad_height),
+                (4 * width + pad_width1 + 20, pu_coord1 - finger_overlap + pad_height),
+                (4 * width + pad_width1 + 20, oy + pad_height - 75),
+                (4 * width + pad_width1 + 50, oy + pad_height - 75)]
+        qu1b = [(4 * width + pad_width1 + 20, oy + pad_height - 75),
+                (4 * width + pad_width1 + 20, oy + pad_height - 45),
+                (ox1 + 100, oy + pad_height - 45), (ox1 + 100, oy + pad_height - 75)]
+        qum = Polygon(qu1a).union(Polygon(qu1b))
+        pla10 = [(ox1, oy + pad_height), (ox1+30, oy + pad_height),
+                 (ox1+30, oy+pad_height-75), (ox1, oy+pad_height-75)]
+        bl1 = [(ox1-20, oy+pad_height-50), (ox1+80, oy+pad_height-50),
+               (ox1+80, oy+pad_height - 200), (ox1-20, oy+pad_height - 200)]
+        pad_lower1 = Polygon(pla10).union(Polygon(bl1))
+        bu1 = [(ox1 + 100, oy + pad_height - 50), (ox1 + 200, oy + pad_height - 50),
+               (ox1 + 200, oy + pad_height - 200), (ox1 + 100, oy + pad_height - 200)]
+        pad_upper1 = qum.union(Polygon(bu1))
+        idt.add_to_layer(pad_layer, Rectangles([ql, qu]), pad_lower1, pad_upper1)
+    return idt
+
+
+def electrode_idt_sw(sequence, wavelength, periods, height, offset, finger_layer, pad_layer, align_layer, coords,
+                     label, widths=None, positions=None, metallization=0.5, pad_extension=0, aref=False,
+                     mirrored=False):
+    # two straight IDTs facing each other to create a standing wave, with contact pads, align marks and a label
+    # the fingers of both transducers are given by an electrode sequence (see electrode_pattern)
+    # pad_extension makes the shorting bars wider (away from the fingers), in um
+    # coords is the lower left corner of the first transducer, all measurements should be in um
+    # the transducers (fingers and pads) are built once in sub-cells that are shared by all devices with the same
+    # parameters (see shared_cells), the label cell only adds the markers and the label
+    # the second transducer repeats the fingers of the first one 60um past its pads, with its own pads and routing
+    # (as in the original layouts); with mirrored=True it is instead the first sub-cell mirrored about a vertical axis,
+    # which is symmetric about the gap but starts with the opposite finger and has its routing bar 25um lower
+    from gdshelpers.geometry.chip import Cell
+    from shapely.geometry import Polygon
+    from gdshelpers.parts.marker import CrossMarker
+    from glyph_text import add_text
+    from shared_cells import add_reflected_cell, shared_cell
+
+    ox = coords[0]
+    oy = coords[1]
+    finger_overlap = 2
+    pad_height = finger_overlap
+    shift = pad_height - finger_overlap
+    ext = pad_extension
+    cell = Cell(label)
+    width = np.max(electrode_pattern(sequence, wavelength, widths, positions, metallization)[1])
+    slot = wavelength / len(sequence)
+
+    upper_y = (oy+offset+shift+pad_height, oy+offset+height+shift+finger_overlap+pad_height)
+    lower_y = (oy+shift, oy+finger_overlap+height)
+    pad_width = _last_finger_edge(sequence, wavelength, periods, ox + slot, widths, positions, metallization)
+    pu_coord = upper_y[1]
+
+    # the transducer only depends on the parameters, all devices with the same parameters share it
+    idt, new = shared_cell('sw_idt', (sequence, wavelength, periods, height, offset, finger_layer, pad_layer,
+                                      tuple(coords), widths, positions, metallization, pad_extension, aref))
+    if new:
+        add_electrode_fingers(idt, finger_layer, sequence, wavelength, periods, ox + slot, upper_y, lower_y, widths,
+                              positions, metallization, aref=aref)
+
+        pl00 = min(4*width+pad_width - 80, ox)
+        pl = (pl00, oy-ext, 4*width+pad_width, oy+pad_height)
+        pu = (pl00-50, pu_coord - finger_overlap, 4*width+pad_width, pu_coord - finger_overlap + pad_height+ext)
+        pu1 = [(pl00-50, pu_coord - finger_overlap + pad_height),
+               (pl00-20, pu_coord - finger_overlap + pad_height),
+               (pl00-20, oy+pad_height - 100),
+               (pl00-50, oy+pad_height - 100)]
+        pu2 = [(pl00-50, oy+pad_height - 100), (pl00-50, oy+pad_height - 70),
+               (4*width+pad_width - 150, oy+pad_height - 70), (4*width+pad_width - 150, oy+pad_height - 100)]
+        pud = Polygon(pu1).union(Polygon(pu2))
+        pla1 = [(4*width+pad_width, oy+pad_height), (4*width+pad_width-30, oy+pad_height),
+                (4*width+pad_width-30, oy+pad_height-75), (4*width+pad_width, oy+pad_height-75)]
+        bl = [(4*width+pad_width + 20, oy+pad_height-50), (4*width+pad_width + 20, oy+pad_height - 200),
+              (4*width+pad_width - 80, oy+pad_height - 200), (4*width+pad_width - 80, oy+pad_height-50)]
+        bu = [(4*width+pad_width - 100, oy+pad_height - 200),
+              (4*width+pad_width - 100, oy+pad_height - 50),
+              (4*width+pad_width - 200, oy+pad_height - 50),
+              (4*width+pad_width - 200, oy+pad_height - 200)]
+        pad_upper = Polygon(bu).union(pud)
+        pad_lower = Polygon(bl).union(Polygon(pla1))
+        idt.add_to_layer(pad_layer, Rectangles([pl, pu]), pad_lower, pad_upper)
+
+    ox1 = coords[0]+pad_width+60
+    cell.add_cell(idt, origin=(0, 0))
+    if mirrored:
+        # the first transducer mirrored about x = (ox1 + end of the pads) / 2, so its pads start at ox1
+        add_reflected_cell(cell, idt, (ox1 + 4*width+pad_width) / 2)
+    else:
+        cell.add_cell(_second_sw_idt(sequence, wavelength, periods, finger_layer, pad_layer, coords, ox1, upper_y,
+                                     lower_y, widths, positions, metallization, ext, aref), origin=(0, 0))
+
+    cross_p = CrossMarker(origin=(ox-100, oy+pad_height - 250),
+                          cross_length=12.5, cross_width=2.5, paddle_length=12.5, paddle_width=2.5)
+    cross_q = CrossMarker(origin=(ox-100, oy+pad_height + 250),
+                          cross_length=12.5, cross_width=2.5, paddle_length=12.5, paddle_width=2.5)
+    cross_r = CrossMarker(origin=(ox+400, oy+pad_height - 250),
+                          cross_length=12.5, cross_width=2.5, paddle_length=12.5, paddle_width=2.5)
+    cell.add_to_layer(align_layer, cross_p, cross_q, cross_r)
+    add_text(cell, align_layer, origin=(ox-50, oy+pad_height - 250), height=40, text=label, alignment='left-center')
+
+    return cell
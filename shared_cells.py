@@ -0,0 +1,68 @@
+# Cells that are shared between all devices built with the same parameters.
+# A device function asks for the cell of its parameters with shared_cell and only draws the geometry if the cell is
+# new, so arrays and sweeps build and store every distinct design once no matter how often it is placed. Anything
+# that differs between positions (labels, markers) goes into the device's own cell, which refers to the shared one.
+# The shared cell is named after a hash of the parameters, so the same design always gets the same cell name.
+# Shared cells must not be changed after they are built, every device that uses them would change as well.
+
+import hashlib
+
+import numpy as np
+
+_cells = {}
+
+
+def _normalized(value):
+    # numpy arrays and lists become tuples of python numbers, so that equal parameters always have the same repr
+    if isinstance(value, np.ndarray):
+        return tuple(_normalized(v) for v in value.tolist())
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalized(v) for v in value)
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def parameter_hash(parameters):
+    # short hex hash of a tuple of parameters
+    return hashlib.md5(repr(_normalized(parameters)).encode()).hexdigest()[:10]
+
+
+def shared_cell(prefix, parameters):
+    # returns (cell, new): the cell for the given parameters, named "<prefix>_<hash>", and whether it was just made
+    # (and is still empty), in which case the caller has to add the geometry
+    from gdshelpers.geometry.chip import Cell
+
+    name = prefix + '_' + parameter_hash(parameters)
+    if name in _cells:
+        return _cells[name], False
+    cell = Cell(name)
+    _cells[name] = cell
+    return cell, True
+
+
+def registered_cell(name):
+    # the shared cell with this name, or None if no device has made it yet
+    return _cells.get(name)
+
+
+def register_cell(cell):
+    # registers a shared cell that was not made by shared_cell (e.g. one loaded by disk_cache), returns the cell that
+    # is registered under its name from now on, which is an already registered one if there is one
+    return _cells.setdefault(cell.name, cell)
+
+
+def add_reflected_cell(cell, sub_cell, axis_x):
+    # adds sub_cell to cell mirrored about the vertical line x = axis_x, as a GDS reference with x_reflection
+    # gdshelpers computes the bounds of a reference as if it was not reflected, so sub_cell is first placed centred on
+    # y = 0 in a wrapper cell (shared by all references to sub_cell), whose bounds do not change under the reflection
+    # sub_cell must be complete, its bounds are taken when it is added
+    bounds = sub_cell.bounds
+    y_centre = 0 if bounds is None else (bounds[1] + bounds[3]) / 2
+    centred, new = shared_cell('reflected', (sub_cell.name, y_centre))
+    if new:
+        centred.add_cell(sub_cell, origin=(0, -y_centre))
+    # a reflection about the x axis turned by 180 degrees is the reflection about the y axis
+    cell.add_cell(centred, origin=(2 * axis_x, y_centre), angle=np.pi)
+    cell.cells[-1]['x_reflection'] = True
+    return centred
@@ -0,0 +1,22 @@
+# The modules of the library are flat scripts in the repository root, the tests import them from there.
+# Shared cells and memoized builder results live for the whole process, every test starts without them, so tests
+# can not pass or fail because of cells an earlier test left behind.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    import builder_cache
+    import shared_cells
+
+    shared_cells._cells.clear()
+    builder_cache.cache.clear()
+    yield
+    shared_cells._cells.clear()
+    builder_cache.cache.clear()
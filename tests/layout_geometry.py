@@ -0,0 +1,101 @@
+# Helpers to compare the geometry of two constructions of the same layout.
+# flat_layer flattens a cell with all its references (rotated, reflected and arrayed) into one shapely object per
+# layer, so a layout made from shared cells, Rectangles or FingerArrays can be compared with one drawn polygon by
+# polygon. gds_boundaries reads the BOUNDARY records of a GDS file back as grid points, to compare written files.
+# all measurements in um
+
+import struct
+
+import numpy as np
+import pytest
+import shapely.affinity
+import shapely.ops
+from shapely.geometry.base import BaseGeometry
+
+
+def _single_width_ports():
+    # gdshelpers 1.2 stores a one element width array with float(), which numpy 2 refuses, so single width
+    # waveguides (and WaveguidePath, which does the same) only work with numpy < 2
+    from gdshelpers.parts.port import Port
+
+    try:
+        Port((0, 0), 0, 1).width = np.array([1.])
+    except TypeError:
+        return False
+    return True
+
+
+requires_single_width_ports = pytest.mark.skipif(not _single_width_ports(),
+                                                 reason='gdshelpers can not build single width waveguides with numpy 2')
+
+
+def _matrix(ref):
+    # 3x3 placement of a cell reference: x reflection first, then the rotation, then the origin
+    angle = ref['angle'] or 0.
+    c, s = np.cos(angle), np.sin(angle)
+    reflection = -1. if ref['x_reflection'] else 1.
+    return np.array([[c, -s * reflection, ref['origin'][0]], [s, c * reflection, ref['origin'][1]], [0, 0, 1]])
+
+
+def flat_layer(cell, layer):
+    # union of everything on the layer of the cell and all cells it refers to, placed like in the GDS file
+    parts = []
+
+    def collect(cell, placement):
+        for geometry in cell.layer_dict.get(layer, []):
+            shape = geometry if isinstance(geometry, BaseGeometry) else geometry.get_shapely_object()
+            parts.append(shapely.affinity.affine_transform(shape, [placement[0, 0], placement[0, 1],
+                                                                   placement[1, 0], placement[1, 1],
+                                                                   placement[0, 2], placement[1, 2]]))
+        for ref in cell.cells:
+            spacing = ref['spacing'] or (0, 0)
+            for column in range(ref['columns']):
+                for row in range(ref['rows']):
+                    shift = np.eye(3)
+                    shift[:2, 2] = column * spacing[0], row * spacing[1]
+                    collect(ref['cell'], placement @ shift @ _matrix(ref))
+
+    collect(cell, np.eye(3))
+    return shapely.ops.unary_union(parts)
+
+
+def assert_same_geometry(actual, expected, tolerance=1e-6):
+    # both shapes cover the same area, up to a symmetric difference of tolerance (um^2)
+    assert expected.area > 0
+    assert actual.symmetric_difference(expected).area <= tolerance
+
+
+def _canonical(points):
+    # ring without repeated points, starting at its smallest point and running towards its smaller neighbour
+    points = [tuple(p) for i, p in enumerate(points) if p != points[i - 1]]
+    start = points.index(min(points))
+    points = points[start:] + points[:start]
+    if points[1] > points[-1]:
+        points = points[:1] + points[1:][::-1]
+    return tuple(points)
+
+
+def gds_boundaries(path):
+    # {cell name: sorted list of (layer, datatype, ring)} of all BOUNDARY records in a GDS file, the rings as grid
+    # points in a canonical order, so that the same polygons written in another order or direction compare equal
+    with open(path, 'rb') as gds:
+        data = gds.read()
+    cells, cell, element, i = {}, None, None, 0
+    while i < len(data):
+        size, record = struct.unpack('>HH', data[i:i + 4])
+        body = data[i + 4:i + size]
+        i += size
+        if record == 0x0606:  # STRNAME
+            cell = cells.setdefault(body.rstrip(b'\0').decode(), [])
+        elif record == 0x0800:  # BOUNDARY
+            element = {}
+        elif element is not None and record == 0x0D02:  # LAYER
+            element['layer'] = struct.unpack('>h', body)[0]
+        elif element is not None and record == 0x0E02:  # DATATYPE
+            element['datatype'] = struct.unpack('>h', body)[0]
+        elif element is not None and record == 0x1003:  # XY
+            element['xy'] = np.frombuffer(body, '>i4').reshape(-1, 2).tolist()
+        elif element is not None and record == 0x1100:  # ENDEL
+            cell.append((element['layer'], element['datatype'], _canonical(element['xy'])))
+            element = None
+    return {name: sorted(boundaries) for name, boundaries in cells.items()}
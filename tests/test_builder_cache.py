@@ -0,0 +1,82 @@
+# Memoized builders: a cached and moved result is the same geometry as a direct build at the position.
+
+import numpy as np
+import pytest
+from gdshelpers.parts.port import Port
+from shapely.geometry import Polygon
+
+from builder_cache import BuilderCache, geometry_bytes, memoized_builder, translated
+from gds_rectangles import Polygons, Rectangles
+from idt_fingers import finger_bundle, periodic_fingers
+from layout_geometry import assert_same_geometry
+from waveguide_path import WaveguidePath
+
+
+def build(x0, y0, widths):
+    # one result of every kind of geometry the builders of the sweep scripts return, drawn at (x0, y0)
+    path = WaveguidePath.make_at_port(Port((x0, y0), 0.3, [1, 0.5, 1]))
+    path.add_straight_segment(10)
+    path.add_bend(1, radius=20)
+    return (Polygon([(x0, y0), (x0 + 3, y0), (x0, y0 + 2)]),
+            Polygons([[(x0, y0), (x0 + 1, y0), (x0, y0 + 1)]]),
+            Rectangles([(x0, y0, x0 + 2, y0 + 5)]),
+            periodic_fingers([x0], 0.5, y0, y0 + 10, wavelength=2, periods=4),
+            finger_bundle(Port((x0, y0), np.pi / 2, list(widths)), 12),
+            path,
+            len(widths))
+
+
+def shapes(result):
+    return [part if isinstance(part, Polygon) else part.get_shapely_object() for part in result[:-1]]
+
+
+def test_moved_results_match_direct_builds():
+    store = BuilderCache()
+    builder = memoized_builder(offsets={'x0': 'x', 'y0': 'y'}, builder_cache=store)(build)
+    for x0, y0 in [(0, 0), (12.5, -3), (-7, 40.25)]:
+        result = builder(x0, y0, (0.2, 0.4, 0.2))
+        for moved, direct in zip(shapes(result), shapes(build(x0, y0, (0.2, 0.4, 0.2)))):
+            assert_same_geometry(moved, direct, tolerance=1e-9)
+        assert isinstance(result[5], WaveguidePath)
+        assert result[-1] == 3
+    (counts,) = store.stats.values()
+    assert counts == {'hits': 2, 'misses': 1}
+
+
+def test_point_offsets_and_keys():
+    store = BuilderCache()
+    builder = memoized_builder(offsets={'origin': 'xy'}, builder_cache=store)(
+        lambda origin, width: Rectangles([(origin[0], origin[1], origin[0] + width, origin[1] + 1)]))
+    np.testing.assert_array_equal(builder((3, 4), 2).xyxy, [[3, 4, 5, 5]])
+    np.testing.assert_array_equal(builder(origin=(1, 1), width=2).xyxy, [[1, 1, 3, 2]])
+    builder((0, 0), np.float64(2.))
+    builder((0, 0), 3)
+    (counts,) = store.stats.values()
+    assert counts == {'hits': 2, 'misses': 2}
+    with pytest.raises(ValueError):
+        memoized_builder(offsets={'origin': 'z'})
+
+
+def test_least_recently_used_results_are_dropped():
+    store = BuilderCache(max_entries=2)
+    builder = memoized_builder(builder_cache=store)(lambda n: Rectangles([(0, 0, n, n)]))
+    builder(1), builder(2), builder(1), builder(3)
+    builder(1)
+    builder(2)
+    (counts,) = store.stats.values()
+    assert counts == {'hits': 2, 'misses': 4}
+
+
+def test_memory_cap():
+    rectangles = Rectangles(np.zeros((1000, 4)))
+    assert geometry_bytes((rectangles, [rectangles])) == 2 * rectangles.xyxy.nbytes
+    store = BuilderCache(max_bytes=1.5 * rectangles.xyxy.nbytes)
+    store.put('b', 1, rectangles)
+    store.put('b', 2, rectangles)
+    assert store.get('b', 1) == (False, None)
+    assert store.get('b', 2)[0]
+    assert store.bytes == rectangles.xyxy.nbytes
+
+
+def test_translated_leaves_other_values():
+    assert translated((3, 'label', None), 1, 2) == (3, 'label', None)
@@ -0,0 +1,58 @@
+# The vectorized chirp schedule against the nested loops of make_Chirp_IDT_Fingers it replaced.
+
+import numpy as np
+import pytest
+
+from chirp_schedule import chirp_arms, chirp_steps, group_widths
+
+
+def loop_chirp_arms(start_width, end_width, number_of_widths, number_of_pairs, litho_corrected_width):
+    # the width lists of make_Chirp_IDT_Fingers in GaP_AOFS_V5.py before the chirp schedule
+    Idt_finger_arm1 = []
+    Idt_finger_arm2 = []
+    chirp_widths = np.linspace(start_width, end_width, num=number_of_widths)
+    chirp_widths = chirp_widths[::-1]
+
+    for index, width in enumerate(chirp_widths):
+        pitch = 3 * width
+        one_period_arm1 = [width - litho_corrected_width, pitch + litho_corrected_width]
+        one_period_arm2 = one_period_arm1
+        devided_pairs = int(number_of_pairs/number_of_widths)
+        for i in range(devided_pairs):
+            if i == devided_pairs-1 and index != len(chirp_widths)-1:
+                pitch1 = chirp_widths[index+1] * 3
+                pitch2 = width * 2 + chirp_widths[index+1] * 1
+                one_period_arm1 = [width - litho_corrected_width, pitch1 + litho_corrected_width]
+                one_period_arm2 = [width - litho_corrected_width, pitch2 + litho_corrected_width]
+            Idt_finger_arm1.extend(one_period_arm1)
+            Idt_finger_arm2.extend(one_period_arm2)
+    return Idt_finger_arm1, Idt_finger_arm2
+
+
+@pytest.mark.parametrize('number_of_widths, number_of_pairs', [(1, 10), (5, 50), (7, 21), (10, 10)])
+def test_chirp_arms_match_the_loop(number_of_widths, number_of_pairs):
+    widths = group_widths(chirp_steps(0.16, 0.18, number_of_widths)[::-1], number_of_pairs)
+    arm1, arm2 = chirp_arms(widths, 0.005)
+    expected1, expected2 = loop_chirp_arms(0.16, 0.18, number_of_widths, number_of_pairs, 0.005)
+    assert arm1.tolist() == expected1
+    assert arm2.tolist() == expected2
+
+
+def test_uneven_pairs_go_to_the_first_steps():
+    np.testing.assert_array_equal(group_widths([1, 2, 3], 8), [1, 1, 1, 2, 2, 2, 3, 3])
+
+
+@pytest.mark.parametrize('number_of_pairs', [0, 2])
+def test_every_step_needs_a_pair(number_of_pairs):
+    with pytest.raises(ValueError):
+        group_widths([1, 2, 3], number_of_pairs)
+    with pytest.raises(ValueError):
+        group_widths([], 4)
+
+
+def test_chirp_profiles():
+    np.testing.assert_allclose(chirp_steps(1, 4, 3, 'exponential'), [1, 2, 4])
+    np.testing.assert_allclose(chirp_steps(1, 3, 3, lambda t: t ** 2), [1, 1.5, 3])
+    np.testing.assert_array_equal(chirp_steps(0, 0, 0, [0.2, 0.1]), [0.2, 0.1])
+    with pytest.raises(ValueError):
+        chirp_steps(1, 2, 3, 'cubic')
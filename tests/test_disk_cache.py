@@ -0,0 +1,132 @@
+# The on-disk cell cache: stored cells load back to the same layout, keys follow the builder's sources and the cache
+# directory is pruned.
+
+import importlib
+import os
+import sys
+import time
+
+import pytest
+
+import shared_cells
+from disk_cache import disk_cached, module_dependencies, prune_cache, source_hash
+from layout_geometry import assert_same_geometry, flat_layer
+
+DEVICE = '''
+from gdshelpers.geometry.chip import Cell
+from shapely.geometry import box
+
+from gds_rectangles import Polygons, Rectangles
+from idt_fingers import periodic_fingers
+from shared_cells import shared_cell
+import {parts}
+
+
+def device(width, label):
+    cell = Cell(label)
+    pads, new = shared_cell('pads', (width,))
+    if new:
+        pads.add_to_layer(2, Rectangles([(0, 0, width, 5)]), Polygons([[(0, 0), (1, 0), (0, 1)]]))
+    cell.add_cell(pads, origin=(10, 0))
+    cell.add_to_layer(1, box(0, 0, width, 1), {parts}.stub(width))
+    periodic_fingers([0], 0.5, 2, 4, wavelength=2, periods=10).add_to_cell(cell)
+    return cell
+
+
+def late_import():
+    import {late}
+'''
+
+PARTS = '''
+from shapely.geometry import box
+
+
+def stub(width):
+    return box(width, 0, width + 1, 3)
+'''
+
+
+@pytest.fixture
+def sweep(tmp_path, monkeypatch):
+    # a device module importing a parts module at module level and another one inside a function, plus a module
+    # it does not use, all in their own directory; the module names are unique per test
+    suffix = os.path.basename(tmp_path).replace('-', '_')
+    names = {'device': 'device_' + suffix, 'parts': 'parts_' + suffix, 'late': 'late_' + suffix,
+             'other': 'other_' + suffix}
+    modules = tmp_path / 'modules'
+    modules.mkdir()
+    (modules / (names['device'] + '.py')).write_text(DEVICE.format(**names))
+    for name in ('parts', 'late', 'other'):
+        (modules / (names[name] + '.py')).write_text(PARTS)
+    monkeypatch.syspath_prepend(str(modules))
+    device = importlib.import_module(names['device'])
+    importlib.import_module(names['late'])
+    importlib.import_module(names['other'])
+    yield device, names, modules
+    for name in names.values():
+        sys.modules.pop(name, None)
+
+
+def test_loaded_cells_match_built_cells(sweep, tmp_path):
+    device, _, _ = sweep
+    cache_dir = str(tmp_path / 'cache')
+    built = disk_cached(device.device, cache_dir)(2.5, 'A1')
+    shared_cells._cells.clear()
+
+    cached = disk_cached(device.device, cache_dir)
+    loaded = cached(2.5, 'A1')
+    other = cached(width=2.5, label='A1')
+    assert (cached.hits, cached.misses) == (2, 0)
+    for layer in (1, 2):
+        assert_same_geometry(flat_layer(loaded, layer), flat_layer(built, layer), tolerance=0)
+    # the shared pad cell is registered again and both loaded devices refer to it
+    assert loaded.cells[0]['cell'] is other.cells[0]['cell']
+    assert shared_cells.registered_cell(loaded.cells[0]['cell'].name) is loaded.cells[0]['cell']
+
+
+def test_key_follows_the_arguments(sweep, tmp_path):
+    device, _, _ = sweep
+    cached = disk_cached(device.device, str(tmp_path / 'cache'))
+    cached(2.5, 'A1')
+    cached(3, 'A1')
+    cached(2.5, 'A1')
+    assert (cached.hits, cached.misses) == (1, 2)
+
+
+def test_sources_of_dependencies_are_hashed(sweep):
+    device, names, modules = sweep
+    dependencies = module_dependencies(names['device'])
+    assert {names['device'], names['parts']} <= dependencies
+    assert names['late'] not in dependencies and names['other'] not in dependencies
+    assert names['late'] in module_dependencies(names['device'], depends_on=(names['late'],))
+
+    before = source_hash(names['device'])
+    (modules / (names['other'] + '.py')).write_text(PARTS + '\n# unrelated edit\n')
+    assert source_hash(names['device']) == before
+    (modules / (names['parts'] + '.py')).write_text(PARTS + '\n# edit of a dependency\n')
+    assert source_hash(names['device']) != before
+
+
+def test_prune_removes_old_entries_first(tmp_path):
+    now = time.time()
+    for age, name in enumerate(['a', 'b', 'c', 'd']):
+        entry = tmp_path / (name + '.pickle')
+        entry.write_bytes(b'x' * 100)
+        os.utime(str(entry), (now - 100 * age, now - 100 * age))
+    (tmp_path / 'notes.txt').write_text('not an entry')
+
+    assert prune_cache(str(tmp_path), max_age=250) == 300
+    assert sorted(os.listdir(str(tmp_path))) == ['a.pickle', 'b.pickle', 'c.pickle', 'notes.txt']
+    assert prune_cache(str(tmp_path), max_bytes=150) == 100
+    assert sorted(os.listdir(str(tmp_path))) == ['a.pickle', 'notes.txt']
+
+
+def test_loading_touches_the_entry(sweep, tmp_path):
+    device, _, _ = sweep
+    cache_dir = tmp_path / 'cache'
+    cached = disk_cached(device.device, str(cache_dir))
+    cached(2.5, 'A1')
+    (entry,) = cache_dir.iterdir()
+    os.utime(str(entry), (0, 0))
+    cached(2.5, 'A1')
+    assert entry.stat().st_mtime > 0
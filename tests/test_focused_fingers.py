@@ -0,0 +1,140 @@
+# The analytic focused IDT fingers against the buffered, split circles they replaced.
+
+import numpy as np
+import pytest
+from gdshelpers.geometry.chip import Cell
+from shapely.geometry import LineString, Point, Polygon, box
+from shapely.ops import split, unary_union
+
+from focused_fingers import (BUFFER_SEGMENTS, add_focused_fingers, add_focused_ring_cells, annular_sectors,
+                             arc_segments, focused_idt, tolerance_arc_points)
+from layout_geometry import assert_same_geometry, flat_layer
+
+OFFSET = 2.5 * np.pi / 180
+OVERLAP = 2.5 * np.pi / 180
+
+
+def buffered_fingers(origin, distance_to_idt, wavelength, periods, angle):
+    # the fingers of focused_idt in focusedsinglefingerIDT.py before they were computed analytically
+    width = wavelength / 4
+    offset, overlap = OFFSET, OVERLAP
+    fingers = []
+    for i in range(periods):
+        p = Point(origin)
+        circle_lo = p.buffer(distance_to_idt + i*wavelength + width/2)
+        circle_li = p.buffer(distance_to_idt + i * wavelength - width / 2)
+        la = origin[0] + (distance_to_idt + 2*periods*wavelength) * np.cos(angle/2-offset)
+        lb = origin[1]-(distance_to_idt + 2*periods*wavelength) * np.sin(angle/2-offset)
+        lc = origin[0]+(distance_to_idt + 2*periods * wavelength) * np.cos(angle/2+offset+overlap)
+        ld = origin[1]+(distance_to_idt + 2*periods*wavelength) * np.sin(angle/2+offset+overlap)
+        lalb = LineString([origin, (la,lb)])
+        lcld = LineString([origin, (lc,ld)])
+
+        circle_uo = p.buffer(distance_to_idt + 2*width + i*wavelength + width / 2)
+        circle_ui = p.buffer(distance_to_idt + 2*width + i*wavelength - width / 2)
+        ua = origin[0] + (distance_to_idt + 2*periods * wavelength) * np.cos(angle / 2 + offset+overlap)
+        ub = origin[1] + -(distance_to_idt + 2*periods * wavelength) * np.sin(angle / 2+offset+overlap)
+        uc = origin[0] + (distance_to_idt + 2*periods * wavelength) * np.cos(angle / 2-offset)
+        ud = origin[1] + (distance_to_idt + 2*periods * wavelength) * np.sin(angle / 2-offset)
+        uaub = LineString([origin, (ua, ub)])
+        ucud = LineString([origin, (uc, ud)])
+
+        splitter_l = LineString([*lalb.coords, *lcld.coords[::-1]])
+        sector_lo = split(circle_lo, splitter_l)[0]
+        sector_li = split(circle_li, splitter_l)[0]
+        splitter_u = LineString([*uaub.coords, *ucud.coords[::-1]])
+        sector_uo = split(circle_uo, splitter_u)[0]
+        sector_ui = split(circle_ui, splitter_u)[0]
+        fingers += [sector_lo.difference(sector_li), sector_uo.difference(sector_ui)]
+    return unary_union(fingers)
+
+
+def focused_cell(origin=(10, -5), periods=12, shared_rings=False, **kwargs):
+    cell = Cell('focused')
+    add = add_focused_ring_cells if shared_rings else add_focused_fingers
+    add(cell, 1, origin, 30, 2.4, periods, np.deg2rad(30), OFFSET, OVERLAP, **kwargs)
+    return cell
+
+
+@pytest.mark.parametrize('shared_rings', [False, True])
+def test_fingers_match_buffered_circles(shared_rings):
+    expected = buffered_fingers((10, -5), 30, 2.4, 12, np.deg2rad(30))
+    assert_same_geometry(flat_layer(focused_cell(shared_rings=shared_rings), 1), expected, tolerance=1e-6)
+
+
+def test_tolerance_keeps_the_fingers_within_the_chord_error():
+    # against fingers on 4096-gons, which are within 0.02 nm of the true circles: no edge is further than the
+    # tolerance from its circle, so the difference is at most a sliver of tolerance times the outline length
+    exact = flat_layer(focused_cell(segments=4096), 1)
+    for tolerance in (1, 0.1):
+        fingers = flat_layer(focused_cell(tolerance=tolerance), 1)
+        assert fingers.symmetric_difference(exact).area <= exact.length * tolerance * 1e-3
+
+
+def test_tolerance_arcs_stay_within_the_tolerance():
+    radius = np.array([5., 50., 500.])
+    segments = arc_segments(radius, -0.3, 0.4, tolerance=1)
+    assert list(segments) == sorted(segments)
+    for r, n in zip(radius, segments):
+        points = tolerance_arc_points([r], -0.3, 0.4, n)[0]
+        middles = (points[1:] + points[:-1]) / 2
+        deviation = np.concatenate((np.hypot(*points.T) - r, r - np.hypot(*middles.T)))
+        assert np.max(np.abs(deviation)) <= 1e-3 + 1e-12
+
+
+def test_isotropic_velocity_table_gives_circular_fingers():
+    table = (np.arange(0, 360, 10), np.full(36, 3500.))
+    circular = np.concatenate(annular_sectors((1, 2), [10, 20], [11, 21], -0.4, 0.5))
+    contours = np.concatenate(annular_sectors((1, 2), [10, 20], [11, 21], -0.4, 0.5, velocity_table=table))
+    np.testing.assert_allclose(contours, circular, atol=1e-9)
+
+
+def anisotropic_table(turn=0, step=1.):
+    # v(a) = 1 + 0.2 cos 2(a - turn), angles in degrees
+    degrees = np.arange(0, 360, step)
+    return degrees, 1 + 0.2 * np.cos(2 * np.radians(degrees - turn))
+
+
+def test_anisotropic_fingers_follow_the_velocity():
+    # with the table on the polygon corners, the corners lie exactly on the constant phase curves r * v(a) / v(0)
+    table = anisotropic_table(step=360 / BUFFER_SEGMENTS)
+    (rings,) = annular_sectors((1, 2), [10, 20], [11, 21], -0.6, 0.7, velocity_table=table)
+    # every ring is the outer curve and then the inner one, each starting and ending on the edges of the sector
+    half = rings.shape[1] // 2
+    for ring, r_inner, r_outer in zip(rings - (1, 2), [10, 20], [11, 21]):
+        for corners, radius in ((ring[1:half - 1], r_outer), (ring[half + 1:-1], r_inner)):
+            angles = np.arctan2(corners[:, 1], corners[:, 0])
+            assert len(corners) >= 10
+            np.testing.assert_allclose(np.hypot(*corners.T), radius * (1 + 0.2 * np.cos(2 * angles)) / 1.2)
+            # off the axis the curves are closer to the focus than the circles
+            assert np.hypot(*corners[0]) < 0.95 * radius
+
+
+def test_anisotropic_pads_and_markers_clear_the_fingers():
+    # slowest on the axis, so the fingers widen away from it, with enough periods that they would reach into pads cut
+    # out along circles
+    arguments = dict(fw=1, frequency=1, wavelength=2.4, periods=200, angle=30, surface_velocity=1, distance_to_idt=30,
+                     finger_layer=1, pad_layer=2, align_layer=3, origin=(0, 0))
+    idt = focused_idt(label='F2', velocity_table=anisotropic_table(turn=90), **arguments)
+    circular = focused_idt(label='F1', **arguments)
+    fingers, pads, markers = flat_layer(idt, 1), flat_layer(idt, 2), flat_layer(idt, 3)
+    assert fingers.bounds[3] > flat_layer(circular, 1).bounds[3] + 5
+    # the pads only touch the finger ends beyond the angle of the IDT (where the fingers overlap the pads)
+    edge = np.radians(15 - 2.5)
+    active = fingers.intersection(Polygon([(0, 0), (1e4, -1e4 * np.tan(edge)), (1e4, 1e4 * np.tan(edge))]))
+    assert active.intersection(pads).area == 0
+    assert active.intersection(flat_layer(circular, 2)).area > 1
+    assert all(finger.intersection(pads).area > 0 for finger in fingers.geoms)
+    assert markers.disjoint(box(*fingers.bounds)) and markers.disjoint(pads)
+
+
+def test_focused_idt_fingers_reach_into_the_pads():
+    idt = focused_idt(fw=1, frequency=1, wavelength=2.4, periods=12, angle=30, surface_velocity=1,
+                      distance_to_idt=30, finger_layer=1, pad_layer=2, align_layer=3, origin=(0, 0), label='F1')
+    fingers = flat_layer(idt, 1)
+    pads = flat_layer(idt, 2)
+    assert_same_geometry(fingers, buffered_fingers((0, 0), 30, 2.4, 12, np.deg2rad(30)), tolerance=1e-6)
+    # every finger reaches into a pad, and the pads reach past the last finger
+    assert len(fingers.geoms) == 24
+    assert all(finger.intersection(pads).area > 0 for finger in fingers.geoms)
+    assert pads.bounds[2] >= fingers.bounds[2]
@@ -0,0 +1,59 @@
+# The frequency shifter of GaP_AOFS_V5, drawn as a reflected half when its arms are mirror images.
+
+import numpy as np
+from gdshelpers.geometry.chip import Cell
+from shapely.geometry import box
+
+from GaP_AOFS_V5 import (SHIFTER_AXIS, add_shifter_arms, is_mirror_image, make_shifter_arms, mirrored_arm, reflected,
+                         shifter_arms)
+from layout_geometry import assert_same_geometry, flat_layer, requires_single_width_ports
+
+# the 1550 nm couplers of the device sweep
+COUPLER = {
+    'width': 0.3,
+    'full_opening_angle': np.deg2rad(30),
+    'grating_period': 0.76,
+    'grating_ff': 0.75,
+    'ap_max_ff': 0.80,
+    'n_gratings': 20,
+    'taper_length': 16,
+    'n_ap_gratings': 20,
+}
+
+
+def test_mirrored_arm_is_a_mirror_image():
+    (wg1_arm, wg2_arm, wg3_arm, wg4_arm), _ = shifter_arms(26)
+    assert is_mirror_image(wg1_arm, mirrored_arm(wg1_arm, SHIFTER_AXIS), SHIFTER_AXIS)
+    assert is_mirror_image(mirrored_arm(wg3_arm, SHIFTER_AXIS), wg3_arm, SHIFTER_AXIS)
+    # the arms of the sweep are not symmetric, so both sides are built
+    assert not is_mirror_image(wg1_arm, wg2_arm, SHIFTER_AXIS)
+    assert not is_mirror_image(wg3_arm, wg4_arm, SHIFTER_AXIS)
+
+
+@requires_single_width_ports
+def test_symmetric_shifter_is_drawn_as_a_reflected_half():
+    (wg1_arm, _, wg3_arm, _), _ = shifter_arms(26)
+    arms = (wg1_arm, mirrored_arm(wg1_arm, SHIFTER_AXIS), wg3_arm, mirrored_arm(wg3_arm, SHIFTER_AXIS))
+    *parts, mirrored = make_shifter_arms(arms, COUPLER)
+    assert mirrored
+    shifter, half = Cell('shifter'), Cell('half')
+    add_shifter_arms(shifter, half, *parts, mirrored)
+    assert not shifter.layer_dict and [ref['x_reflection'] for ref in shifter.cells] == [False, True]
+
+    *direct_parts, direct_mirrored = make_shifter_arms(arms, COUPLER, axis_x=None)
+    assert not direct_mirrored
+    direct = Cell('direct')
+    add_shifter_arms(direct, None, *direct_parts, direct_mirrored)
+    # convert_to_positive_resist simplifies the outline of the resist around the couplers starting from the first
+    # point of its ring, so the reflected couplers only agree with the built ones up to the simplification (0.25um)
+    arms_layer, direct_arms = flat_layer(shifter, 1), flat_layer(direct, 1)
+    assert direct_arms.boundary.buffer(0.25).contains(arms_layer.symmetric_difference(direct_arms))
+
+    # holes around the couplers of both halves, the right ones are the reflections of the left ones
+    holes = flat_layer(shifter, 5)
+    left = holes.intersection(box(-1e4, -1e4, SHIFTER_AXIS, 1e4))
+    right = holes.intersection(box(SHIFTER_AXIS, -1e4, 1e4, 1e4))
+    assert_same_geometry(right, reflected(left, SHIFTER_AXIS))
+    for coupler in direct_parts[1]:
+        assert holes.intersects(coupler.buffer(20 + 2 * 8))
+    np.testing.assert_allclose(shifter.bounds, arms_layer.union(holes).bounds)
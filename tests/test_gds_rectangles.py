@@ -0,0 +1,81 @@
+# The raw Rectangles/Polygons writer against gdshelpers' shapely path.
+
+import numpy as np
+import pytest
+from gdshelpers.geometry.chip import Cell
+from shapely.geometry import MultiPolygon, Polygon
+
+from gds_rectangles import (Polygons, Rectangles, add_rectangles, polygons_to_multipolygon,
+                            rectangles_to_multipolygon, save_gds)
+from layout_geometry import assert_same_geometry, gds_boundaries
+
+RECTANGLES = [(0, 0, 1, 2), (5.5, 1.25, 3, -1), (-2.0004, 0.1, -1, 0.3)]
+TRIANGLES = [[(0, 0), (2, 0), (1, 1.5)], [(3, 3), (4.2, 3.1), (3.3, 4)]]
+
+
+def shapely_cell(name):
+    # the same geometry as raw_cell, as shapely polygons
+    cell = Cell(name)
+    cell.add_to_layer(1, *[Polygon([(x0, y0), (x0, y1), (x1, y1), (x1, y0)]) for x0, y0, x1, y1 in RECTANGLES])
+    cell.add_to_layer((2, 7), *[Polygon(triangle) for triangle in TRIANGLES])
+    return cell
+
+
+def raw_cell(name):
+    cell = Cell(name)
+    add_rectangles(cell, 1, RECTANGLES)
+    cell.add_to_layer((2, 7), Polygons(TRIANGLES))
+    return cell
+
+
+def test_save_gds_writes_the_shapely_polygons(tmp_path):
+    top = raw_cell('top')
+    top.add_cell(raw_cell('sub'), origin=(10, 0))
+    expected = shapely_cell('top')
+    expected.add_cell(shapely_cell('sub'), origin=(10, 0))
+
+    save_gds(str(tmp_path / 'raw.gds'), top)
+    expected.save(str(tmp_path / 'shapely.gds'))
+    written = gds_boundaries(str(tmp_path / 'raw.gds'))
+    assert written == gds_boundaries(str(tmp_path / 'shapely.gds'))
+    assert len(written['top']) == len(RECTANGLES) + len(TRIANGLES)
+
+
+def test_plain_cell_save_goes_through_shapely(tmp_path):
+    # without save_gds the objects are written through their shapely objects, to the same polygons
+    raw_cell('top').save(str(tmp_path / 'raw.gds'))
+    shapely_cell('top').save(str(tmp_path / 'shapely.gds'))
+    assert gds_boundaries(str(tmp_path / 'raw.gds')) == gds_boundaries(str(tmp_path / 'shapely.gds'))
+
+
+def test_stream_is_written_into_the_top_cell(tmp_path):
+    top = Cell('top')
+    top.add_cell(raw_cell('sub'))
+    save_gds(str(tmp_path / 'streamed.gds'), top,
+             ((1, Rectangles([rectangle])) for rectangle in RECTANGLES))
+    written = gds_boundaries(str(tmp_path / 'streamed.gds'))
+    assert written['top'] == [boundary for boundary in written['sub'] if boundary[0] == 1]
+
+
+def test_rectangles_sort_their_corners():
+    rectangles = Rectangles(RECTANGLES)
+    np.testing.assert_array_equal(rectangles.xyxy[1], (3, -1, 5.5, 1.25))
+    assert rectangles.bounds == (-2.0004, -1, 5.5, 2)
+    np.testing.assert_array_equal(Rectangles.from_corners(rectangles.corners).xyxy, rectangles.xyxy)
+
+
+def test_multipolygons_match_shapely_polygons():
+    expected = MultiPolygon([Polygon([(x0, y0), (x0, y1), (x1, y1), (x1, y0)]) for x0, y0, x1, y1 in RECTANGLES])
+    assert_same_geometry(Rectangles(RECTANGLES).get_shapely_object(), expected, tolerance=0)
+    assert_same_geometry(rectangles_to_multipolygon(Rectangles(RECTANGLES).corners), expected, tolerance=0)
+
+    # rings with different numbers of corners
+    rings = TRIANGLES + [[(0, 5), (0, 6), (1, 6), (1, 5)]]
+    multipolygon = polygons_to_multipolygon(rings)
+    assert len(multipolygon.geoms) == 3
+    assert_same_geometry(multipolygon, MultiPolygon([Polygon(ring) for ring in rings]), tolerance=0)
+
+
+def test_polygons_need_an_n_k_2_array():
+    with pytest.raises(ValueError):
+        Polygons([(0, 0), (1, 0), (1, 1)])
@@ -0,0 +1,62 @@
+# Labels made of shared glyph cells against gdshelpers' Text.
+
+import numpy as np
+import pytest
+from gdshelpers.geometry.chip import Cell
+from gdshelpers.layout import GridLayout
+from gdshelpers.parts.text import Text
+from shapely.geometry import box
+
+import shared_cells
+from glyph_text import GlyphGridLayout, add_text, text_cell
+from layout_geometry import assert_same_geometry, flat_layer
+
+
+@pytest.mark.parametrize('text, alignment, angle', [
+    ('ZnO-TEST2 12', 'left-bottom', 0),
+    ('A1\nbc', 'center-center', 0.4),
+    ('(30, 150) um', 'right-top', 0),
+    ('  i j  ', 'left-bottom', np.pi / 2),
+])
+def test_add_text_matches_text(text, alignment, angle):
+    cell = Cell('label')
+    add_text(cell, 2, (5, 7), 20, text, alignment=alignment, angle=angle)
+    expected = Text((5, 7), 20, text, alignment=alignment, angle=angle).get_shapely_object()
+    assert_same_geometry(flat_layer(cell, 2), expected, tolerance=1e-9)
+
+
+def test_labels_share_their_glyphs():
+    cell = Cell('labels')
+    for number in range(100):
+        add_text(cell, 2, (0, 30 * number), 20, str(number))
+    glyphs = {ref['cell'].name for ref in cell.cells}
+    assert len(glyphs) == 10
+    assert all(shared_cells.registered_cell(name) is not None for name in glyphs)
+
+
+def test_text_cell_starts_at_the_origin():
+    label = text_cell(2, 10, 'AB 3')
+    expected = Text((0, 0), 10, 'AB 3', true_bbox_alignment=True).get_shapely_object()
+    assert_same_geometry(flat_layer(label, 2), expected, tolerance=1e-9)
+    np.testing.assert_allclose(label.bounds[:2], (0, 0), atol=1e-9)
+    assert text_cell(2, 10, 'AB 3') is label
+
+
+def test_unknown_characters_raise_value_error():
+    with pytest.raises(ValueError):
+        add_text(Cell('label'), 2, (0, 0), 1, 'café')
+
+
+@pytest.mark.parametrize('layer', [1, 2])
+def test_grid_layout_matches_text_labels(layer):
+    layouts = []
+    for layout_class in (GridLayout, GlyphGridLayout):
+        layout = layout_class(title='sweep', frame_layer=0, text_layer=2, region_layer_type=None)
+        layout.add_column_label_row(['30', '50'], row_label='width')
+        layout.begin_new_row('wg 1')
+        for column in range(2):
+            device = Cell('device_{}_{}'.format(column, layout_class.__name__))
+            device.add_to_layer(1, box(0, 0, 80, 40))
+            layout.add_to_row(device)
+        layouts.append(layout.generate_layout()[0])
+    assert_same_geometry(flat_layer(layouts[1], layer), flat_layer(layouts[0], layer), tolerance=1e-9)
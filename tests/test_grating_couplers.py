@@ -0,0 +1,60 @@
+# The numpy grating couplers against gdshelpers' GratingCoupler, placed from one canonical build or, for positive
+# resist, built at their port.
+
+import numpy as np
+import pytest
+from gdshelpers.helpers.positive_resist import convert_to_positive_resist
+from gdshelpers.parts.coupler import GratingCoupler
+from gdshelpers.parts.port import Port
+
+from grating_couplers import canonical_coupler, grating_coupler_at_port, traditional_coupler
+from layout_geometry import assert_same_geometry
+
+# the 1550 nm couplers of GaP_AOFS_V5.py
+COUPLER = {
+    'width': 0.3,
+    'full_opening_angle': np.deg2rad(30),
+    'grating_period': 0.76,
+    'grating_ff': 0.75,
+    'ap_max_ff': 0.80,
+    'n_gratings': 20,
+    'taper_length': 16,
+    'n_ap_gratings': 20,
+}
+
+
+@pytest.mark.parametrize('angle', [0, -np.pi / 2, 2.1])
+def test_traditional_coupler_matches_gdshelpers(angle):
+    expected = GratingCoupler.make_traditional_coupler((3, -4), angle=angle, **COUPLER).get_shapely_object()
+    assert_same_geometry(traditional_coupler((3, -4), angle=angle, **COUPLER), expected, tolerance=1e-9)
+
+
+@pytest.mark.parametrize('angle', [0.3, np.pi / 2, -2.5])
+def test_coupler_at_port_matches_gdshelpers(angle):
+    port = Port((120.5, -40), angle, 0.3)
+    expected = GratingCoupler.make_traditional_coupler_at_port(port, **COUPLER).get_shapely_object()
+    assert_same_geometry(grating_coupler_at_port(port, **COUPLER), expected, tolerance=1e-9)
+
+
+@pytest.mark.parametrize('angle', [0.3, np.pi / 2 + np.deg2rad(26), -2.5])
+def test_positive_resist_coupler_matches_a_direct_build(angle):
+    port = Port((120.5, -40), angle, 0.3)
+    expected = convert_to_positive_resist(GratingCoupler.make_traditional_coupler_at_port(port, **COUPLER), 5)
+    placed = grating_coupler_at_port(port, positive_resist=5, **COUPLER)
+    assert_same_geometry(placed, expected, tolerance=0)
+    np.testing.assert_array_equal(placed.exterior.coords, expected.exterior.coords)
+
+
+def test_coupler_is_built_once_per_parameter_set():
+    first = canonical_coupler(**COUPLER)
+    assert canonical_coupler(**COUPLER) is first
+    port = Port((120.5, -40), 0.3, 0.3)
+    resist = grating_coupler_at_port(port, positive_resist=5, **COUPLER)
+    assert grating_coupler_at_port(port.copy(), positive_resist=5, **COUPLER) is resist
+    assert grating_coupler_at_port(port, positive_resist=4, **COUPLER) is not resist
+
+
+def test_tolerance_arcs_follow_the_grating():
+    exact = traditional_coupler((0, 0), angle=0, n_points=20000, **COUPLER)
+    coupler = traditional_coupler((0, 0), angle=0, tolerance=1, **COUPLER)
+    assert coupler.symmetric_difference(exact).area <= exact.length * 1e-3
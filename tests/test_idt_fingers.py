@@ -0,0 +1,219 @@
+# The vectorized straight IDTs of idt_fingers against the finger loops they replaced.
+
+import numpy as np
+import pytest
+from gdshelpers.geometry.chip import Cell
+from gdshelpers.parts.port import Port
+from gdshelpers.parts.waveguide import Waveguide
+from shapely import affinity
+from shapely.geometry import Polygon
+from shapely.ops import unary_union
+
+from gds_rectangles import save_gds
+from idt_fingers import (FingerArray, electrode_idt, electrode_idt_sw, electrode_pattern, finger_bundle,
+                         finger_rectangles, periodic_fingers, save_with_fingers)
+from layout_geometry import assert_same_geometry, flat_layer, gds_boundaries
+
+
+def loop_single_finger_idt(wavelength, periods, height, offset, layer, coords):
+    # single_finger_idt of singlefingerIDT.py before the fingers were vectorized
+    ox = coords[0]
+    oy = coords[1]
+    finger_overlap = 2
+    pad_height = 10
+    shift = pad_height - finger_overlap
+    cell = Cell('idt')
+    width = wavelength/4
+    upper_coord = [(ox+2*width+2*width, oy+offset+shift+pad_height), (ox+2*width+2*width, oy+offset+height+shift+finger_overlap+pad_height),
+                   (ox+3*width+2*width, oy+offset+height+shift+finger_overlap+pad_height), (ox+3*width+2*width, oy+offset+shift+pad_height)]
+    lower_coord = [(ox+2*width, oy+shift), (ox+2*width, oy+finger_overlap+height),
+                   (ox+width+2*width, oy+finger_overlap+height), (ox+width+2*width, oy+shift)]
+
+    pad_width = 0
+    pu_coord = 0
+    for i in range(periods):
+        uc = [(upper_coord[j][0] + i*wavelength, upper_coord[j][1]) for j in range(4)]
+        lc = [(lower_coord[j][0] + i*wavelength, lower_coord[j][1]) for j in range(4)]
+        pad_width = uc[2][0]
+        pu_coord = uc[2][1]
+        cell.add_to_layer(layer, Polygon(uc), Polygon(lc))
+
+    pl = [(ox, oy), (ox, oy+pad_height), (4*width+pad_width, oy+pad_height), (4*width+pad_width, oy)]
+    pu = [(ox, pu_coord - finger_overlap), (ox, pu_coord - finger_overlap + pad_height),
+          (4*width+pad_width, pu_coord - finger_overlap + pad_height), (4*width+pad_width, pu_coord - finger_overlap)]
+    cell.add_to_layer(layer, Polygon(pl), Polygon(pu))
+    return cell
+
+
+def loop_double_finger_idt(wavelength, periods, height, offset, layer, coords):
+    # double_finger_idt of doublefingerIDT.py before the fingers were vectorized
+    finger_overlap = 2
+    pad_height = finger_overlap
+    shift = pad_height - finger_overlap
+    idt = Cell('fingers')
+    width = wavelength/8
+    ox = coords[0]
+    oy = coords[1]
+
+    upper_coord = [(ox+2*width+wavelength/2, oy+offset+pad_height),
+                   (ox+2*width+wavelength/2, oy+offset+height+pad_height+finger_overlap),
+                   (ox+2*width+wavelength/2+width, oy+offset+height+pad_height+finger_overlap),
+                   (ox+2*width+wavelength/2+width, oy+offset+pad_height)]
+    lower_coord = [(ox+2*width, oy+shift), (ox+2*width, oy+height+pad_height),
+                   (ox+2*width+width, oy+height+pad_height), (ox+2*width+width, oy+shift)]
+    pad_width = 0
+    pu_coord = 0
+    for i in range(periods):
+        uc1 = [(upper_coord[j][0] + i*wavelength, upper_coord[j][1]) for j in range(4)]
+        uc2 = [(upper_coord[j][0] + 2*width + i*wavelength, upper_coord[j][1]) for j in range(4)]
+        lc1 = [(lower_coord[j][0] + i*wavelength, lower_coord[j][1]) for j in range(4)]
+        lc2 = [(lower_coord[j][0] + 2*width + i*wavelength, lower_coord[j][1]) for j in range(4)]
+        pad_width = uc2[2][0]
+        pu_coord = uc2[2][1]
+        idt.add_to_layer(layer, Polygon(uc1), Polygon(lc1), Polygon(uc2), Polygon(lc2))
+
+    pl = [(ox, oy), (ox, oy + pad_height), (4 * width + pad_width, oy + pad_height), (4 * width + pad_width, oy)]
+    pu = [(ox, pu_coord - finger_overlap), (ox, pu_coord - finger_overlap + pad_height),
+          (4 * width + pad_width, pu_coord - finger_overlap + pad_height),
+          (4 * width + pad_width, pu_coord - finger_overlap)]
+    idt.add_to_layer(layer, Polygon(pl), Polygon(pu))
+    return idt
+
+
+# the arguments single_finger_idt and double_finger_idt pass to electrode_idt, and the loop they replaced
+IDTS = {'single': (('-+',), {'pad_height': 10}, loop_single_finger_idt),
+        'double': (('--++',), {'pad_height': 2, 'name': 'fingers'}, loop_double_finger_idt)}
+
+
+@pytest.mark.parametrize('kind', sorted(IDTS))
+@pytest.mark.parametrize('periods', [1, 48])
+def test_electrode_idt_matches_finger_loop(kind, periods):
+    sequence, kwargs, loop_idt = IDTS[kind]
+    cell = electrode_idt(*sequence, wavelength=4, periods=periods, height=20, offset=1, layer=1, coords=(1, 2),
+                         **kwargs)
+    expected = loop_idt(wavelength=4, periods=periods, height=20, offset=1, layer=1, coords=(1, 2))
+    assert_same_geometry(flat_layer(cell, 1), flat_layer(expected, 1), tolerance=0)
+
+
+@pytest.mark.parametrize('kind', sorted(IDTS))
+def test_electrode_idt_writes_the_loop_polygons(kind, tmp_path):
+    # the raw rectangles land on the same grid points as the shapely polygons of the loop
+    sequence, kwargs, loop_idt = IDTS[kind]
+    cell = electrode_idt(*sequence, wavelength=4.8, periods=25, height=20, offset=1, layer=1, coords=(0.1, 0.2),
+                         **kwargs)
+    save_gds(str(tmp_path / 'vectorized.gds'), cell)
+    loop_idt(wavelength=4.8, periods=25, height=20, offset=1, layer=1, coords=(0.1, 0.2)).save(
+        str(tmp_path / 'loop.gds'))
+    assert list(gds_boundaries(str(tmp_path / 'vectorized.gds')).values()) == \
+        list(gds_boundaries(str(tmp_path / 'loop.gds')).values())
+
+
+@pytest.mark.parametrize('kind', sorted(IDTS))
+def test_array_reference_gives_the_same_fingers(kind):
+    sequence, kwargs, _ = IDTS[kind]
+    arguments = dict(wavelength=4, periods=30, height=20, offset=1, layer=1, coords=(0, 0), **kwargs)
+    aref = electrode_idt(*sequence, aref=True, **arguments)
+    assert aref.cells[0]['columns'] == 30
+    assert_same_geometry(flat_layer(aref, 1), flat_layer(electrode_idt(*sequence, **arguments), 1), tolerance=1e-9)
+
+
+@pytest.mark.parametrize('kind', sorted(IDTS))
+def test_streamed_chunks_give_the_same_fingers(kind):
+    sequence, kwargs, _ = IDTS[kind]
+    arguments = dict(wavelength=4, periods=30, height=20, offset=1, layer=1, coords=(0, 0), **kwargs)
+    cell, chunks = electrode_idt(*sequence, stream=True, chunk_size=7, **arguments)
+    streamed = Cell(cell.name)
+    streamed.add_cell(cell)
+    for fingers in chunks:
+        assert len(fingers) <= 7
+        fingers.add_to_cell(streamed)
+    assert_same_geometry(flat_layer(streamed, 1), flat_layer(electrode_idt(*sequence, **arguments), 1), tolerance=0)
+
+
+def test_save_with_fingers_writes_the_streamed_chunks(tmp_path):
+    arguments = dict(wavelength=4, periods=30, height=20, offset=1, layer=1, coords=(0, 0), pad_height=10)
+    save_gds(str(tmp_path / 'cell.gds'), electrode_idt('-+', **arguments))
+    cell, chunks = electrode_idt('-+', stream=True, chunk_size=16, **arguments)
+    save_with_fingers(str(tmp_path / 'streamed.gds'), cell, chunks)
+    assert gds_boundaries(str(tmp_path / 'streamed.gds')) == gds_boundaries(str(tmp_path / 'cell.gds'))
+
+
+@pytest.mark.parametrize('sequence', ['-+', '--++'])
+def test_mirrored_pair_is_the_first_transducer_mirrored(sequence):
+    pair = electrode_idt_sw(sequence, wavelength=4, periods=20, height=30, offset=1, finger_layer=1, pad_layer=2,
+                            align_layer=3, coords=(0, 0), label='A', mirrored=True)
+    first = pair.cells[0]['cell']
+    # the mirrored pads start 60um past the last finger and end 4 finger widths past it
+    last_finger = flat_layer(first, 1).bounds[2]
+    axis = (last_finger + 60 + last_finger + 4 * 4 / len(sequence) / 2) / 2
+    for layer in (1, 2):
+        transducer = flat_layer(first, layer)
+        assert_same_geometry(flat_layer(pair, layer),
+                             transducer.union(affinity.scale(transducer, -1, 1, origin=(axis, 0))), tolerance=1e-9)
+    np.testing.assert_allclose(pair.get_bounds([1, 2]), unary_union([flat_layer(pair, 1), flat_layer(pair, 2)]).bounds)
+
+
+def test_finger_rectangles_corner_order():
+    rects = finger_rectangles([0, 10], [1, 12], 2, [5, 6])
+    np.testing.assert_array_equal(rects, [[[0, 2], [0, 5], [1, 5], [1, 2]], [[10, 2], [10, 6], [12, 6], [12, 2]]])
+
+
+def test_periodic_fingers_are_ordered_period_by_period():
+    fingers = periodic_fingers([1, 2], [0.5, 0.25], 0, [3, 4], wavelength=10, periods=3)
+    np.testing.assert_array_equal(fingers.x, [1, 2, 11, 12, 21, 22])
+    np.testing.assert_array_equal(fingers.width, [0.5, 0.25] * 3)
+    np.testing.assert_array_equal(fingers.y1, [3, 4] * 3)
+
+
+def test_electrode_pattern_rejects_unknown_electrodes():
+    with pytest.raises(ValueError):
+        electrode_pattern('-x+', 4)
+    with pytest.raises(ValueError):
+        electrode_pattern('-+', 4, widths=[1])
+
+
+def test_placed_finger_array_matches_placed_polygons():
+    fingers = periodic_fingers([0, 2], 1, 0, [5, 6], wavelength=4, periods=5)
+    polygons = fingers.to_polygons()
+    for placed, expected in [
+            (fingers.translate(3, -2), affinity.translate(polygons, 3, -2)),
+            (fingers.rotate(np.pi / 2, origin=(1, 1)), affinity.rotate(polygons, 90, origin=(1, 1))),
+            (fingers.rotate(0.3), affinity.rotate(polygons, 0.3, origin=(0, 0), use_radians=True)),
+            (fingers.mirror(x=7), affinity.scale(polygons, -1, 1, origin=(7, 0))),
+            (fingers.mirror(y=-1), affinity.scale(polygons, 1, -1, origin=(0, -1)))]:
+        assert_same_geometry(placed.to_polygons(), expected, tolerance=1e-9)
+        if placed.is_axis_aligned:
+            assert_same_geometry(placed.to_rectangles().get_shapely_object(), expected, tolerance=1e-9)
+    with pytest.raises(ValueError):
+        fingers.rotate(0.3).to_rectangles()
+
+
+def test_concatenate_keeps_the_finger_order():
+    first = periodic_fingers([0], 1, 0, 5, wavelength=4, periods=2)
+    second = periodic_fingers([20], 2, 1, 6, wavelength=4, periods=1)
+    joined = FingerArray.concatenate([first, second])
+    np.testing.assert_array_equal(joined.x, [0, 4, 20])
+    np.testing.assert_array_equal(joined.width, [1, 1, 2])
+    with pytest.raises(ValueError):
+        FingerArray.concatenate([first, second.translate(1, 0)])
+
+
+
+@pytest.mark.parametrize('angle', [np.pi / 2, 0.3, -np.pi])
+def test_finger_bundle_matches_waveguide(angle):
+    port = Port((3, -4), angle, [0.2, 0.4, 0.2, 0.35, 0.2])
+    expected = Waveguide.make_at_port(port).add_straight_segment(12).get_shapely_object()
+    fingers = finger_bundle(port, 12)
+    assert len(fingers) == 3
+    assert_same_geometry(fingers.to_polygons(), expected, tolerance=1e-9)
+
+
+def test_finger_bundle_writes_the_waveguide_polygons(tmp_path):
+    port = Port((1.5, 2), np.pi / 2, [0.2, 0.4, 0.2, 0.4, 0.2])
+    cell = Cell('bundle')
+    finger_bundle(port, 12).add_to_cell(cell)
+    save_gds(str(tmp_path / 'bundle.gds'), cell)
+    waveguide = Cell('bundle')
+    waveguide.add_to_layer(1, Waveguide.make_at_port(port).add_straight_segment(12))
+    waveguide.save(str(tmp_path / 'waveguide.gds'))
+    assert gds_boundaries(str(tmp_path / 'bundle.gds')) == gds_boundaries(str(tmp_path / 'waveguide.gds'))
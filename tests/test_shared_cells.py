@@ -0,0 +1,45 @@
+# Cells shared between devices with equal parameters.
+
+import numpy as np
+from gdshelpers.geometry.chip import Cell
+from shapely.geometry import Polygon
+
+from layout_geometry import assert_same_geometry, flat_layer
+from shared_cells import add_reflected_cell, parameter_hash, register_cell, registered_cell, shared_cell
+
+
+def test_equal_parameters_share_one_cell():
+    cell, new = shared_cell('pad', (1, 2.5, 'a'))
+    again, new_again = shared_cell('pad', (1, 2.5, 'a'))
+    other, new_other = shared_cell('pad', (1, 2.5, 'b'))
+    assert new and not new_again and new_other
+    assert again is cell and other is not cell
+    assert registered_cell(cell.name) is cell
+    assert cell.name.startswith('pad_')
+
+
+def test_numpy_and_python_parameters_are_equal():
+    assert parameter_hash((np.array([0.5, 1.]), np.float64(2.))) == parameter_hash(([0.5, 1.], 2.))
+    assert parameter_hash(((1, 2),)) == parameter_hash(([1, 2],))
+    assert parameter_hash((1.,)) != parameter_hash((1.5,))
+
+
+def test_register_cell_keeps_the_first_cell():
+    cell, _ = shared_cell('ring', (3,))
+    loaded = Cell(cell.name)
+    assert register_cell(loaded) is cell
+    unknown = Cell('ring_loaded')
+    assert register_cell(unknown) is unknown
+    assert registered_cell('ring_loaded') is unknown
+
+
+def test_reflected_cell_has_the_bounds_of_its_geometry():
+    half, _ = shared_cell('half', ())
+    half.add_to_layer(1, Polygon([(1, 2), (4, 2), (1, 9)]))
+    cell = Cell('both')
+    add_reflected_cell(cell, half, axis_x=5)
+    wrapper = add_reflected_cell(cell, half, axis_x=-1)
+    assert cell.cells[0]['cell'] is wrapper is cell.cells[1]['cell']
+    expected = Polygon([(9, 2), (6, 2), (9, 9)]).union(Polygon([(-3, 2), (-6, 2), (-3, 9)]))
+    assert_same_geometry(flat_layer(cell, 1), expected, tolerance=1e-12)
+    np.testing.assert_allclose(cell.bounds, (-6, 2, 9, 9))
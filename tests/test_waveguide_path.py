@@ -0,0 +1,135 @@
+# WaveguidePath against the gdshelpers Waveguide it stands in for.
+
+import numpy as np
+import pytest
+import shapely.affinity
+from gdshelpers.helpers.positive_resist import convert_to_positive_resist
+from gdshelpers.helpers.under_etching import create_holes_for_under_etching
+from gdshelpers.parts.port import Port
+from gdshelpers.parts.waveguide import Waveguide
+
+from layout_geometry import assert_same_geometry, requires_single_width_ports
+from waveguide_path import WaveguidePath, bend_points
+
+
+def route(cls, width, final_width, **bend):
+    # the incident waveguide of the GaP frequency shifter, with a width step and bends both ways
+    wg = cls.make_at_port(Port((10, 150), angle=0.2, width=width))
+    wg.add_straight_segment(length=125, final_width=final_width)
+    wg.add_straight_segment(length=100)
+    wg.add_bend(-np.pi, radius=50, **bend)
+    wg.add_straight_segment(length=64)
+    wg.add_bend(np.pi / 2 + 0.3, radius=50, **bend)
+    return wg
+
+
+SLOT = ([3, 5, 3], [3, 1.2, 3])
+SINGLE = (5, 1.2)
+
+
+def assert_same_ports(path, waveguide):
+    np.testing.assert_allclose(path.current_port.origin, waveguide.current_port.origin, atol=1e-9)
+    assert path.current_port.angle == pytest.approx(waveguide.current_port.angle)
+    np.testing.assert_allclose(path.current_port.width, waveguide.current_port.width)
+    assert path.length == pytest.approx(waveguide.length)
+
+
+def test_slot_route_matches_waveguide():
+    path = route(WaveguidePath, *SLOT, n_points=128)
+    waveguide = route(Waveguide, *SLOT, n_points=128)
+    assert_same_geometry(path.get_shapely_object(), waveguide.get_shapely_object(), tolerance=1e-6)
+    assert len(path.get_shapely_object().geoms) == 2
+    assert_same_ports(path, waveguide)
+
+
+@requires_single_width_ports
+def test_single_route_matches_waveguide():
+    path = route(WaveguidePath, *SINGLE, n_points=128)
+    waveguide = route(Waveguide, *SINGLE, n_points=128)
+    assert_same_geometry(path.get_shapely_object(), waveguide.get_shapely_object(), tolerance=1e-6)
+    assert_same_ports(path, waveguide)
+
+
+def under_etching_holes(outline):
+    # the holes GaP_AOFS_V5 places around the waveguides of its frequency shifter
+    return create_holes_for_under_etching(underetch_parts=outline, complete_structure=outline, hole_radius=5,
+                                          hole_distance=15.8, hole_spacing=50, hole_length=29.7, cap_style='square')
+
+
+def hole_centres(holes):
+    return np.array(sorted(hole.centroid.coords[0] for hole in holes.geoms))
+
+
+def shifter_arm(cls, **bend):
+    # the right arm of the GaP frequency shifter, the band rings of its outline start far from where the union of the
+    # Waveguide starts it
+    incident_angle = np.deg2rad(26)
+    wg = cls.make_at_port(Port((190, 150), angle=incident_angle, width=[3, 50, 3]))
+    wg.add_straight_segment(length=130, final_width=[3, 1, 3])
+    wg.add_straight_segment(length=100, final_width=[3, 0.3, 3])
+    wg.add_bend(np.pi, radius=50, **bend)
+    wg.add_straight_segment(length=58)
+    wg.add_bend(-np.pi / 2 - incident_angle, radius=49, **bend)
+    wg.add_straight_segment(length=10)
+    return wg
+
+
+def test_under_etching_holes_match_waveguide():
+    path = shifter_arm(WaveguidePath, n_points=128)
+    expected = under_etching_holes(shifter_arm(Waveguide, n_points=128).get_shapely_object())
+    holes = under_etching_holes(path.get_shapely_object(segment_union=True))
+    assert len(holes.geoms) == len(expected.geoms)
+    np.testing.assert_allclose(hole_centres(holes), hole_centres(expected), atol=1e-9)
+    assert_same_geometry(holes, expected, tolerance=1e-9)
+    assert_same_geometry(path.get_shapely_object(segment_union=True), path.get_shapely_object(), tolerance=1e-9)
+
+    # bends sampled to the tolerance move the holes by less than a nm
+    holes = under_etching_holes(shifter_arm(WaveguidePath).get_shapely_object(segment_union=True))
+    assert len(holes.geoms) == len(expected.geoms)
+    np.testing.assert_allclose(hole_centres(holes), hole_centres(expected), atol=1e-3)
+
+
+def test_tolerance_bends_stay_close_to_the_circle():
+    exact = route(Waveguide, *SLOT, n_points=4096).get_shapely_object()
+    path = route(WaveguidePath, *SLOT, tolerance=1).get_shapely_object()
+    assert path.symmetric_difference(exact).area <= exact.length * 1e-3
+    # a wide bend needs more points than a tight one
+    assert bend_points(np.pi, 500, 1) > bend_points(np.pi, 5, 1) >= 2
+
+
+def assert_same_trench(path, waveguide, buffer_radius):
+    # both outlines are simplified by buffer_radius / 20, starting from other points, so they differ within that
+    # tolerance, the waveguide bands are cut out exactly
+    trench = path.get_positive_resist_object(buffer_radius)
+    expected = convert_to_positive_resist([waveguide], buffer_radius)
+    assert trench.exterior.hausdorff_distance(expected.exterior) <= buffer_radius / 20
+    assert trench.intersection(path.get_shapely_object()).area == pytest.approx(0, abs=1e-6)
+    assert len(trench.interiors) == len(expected.interiors)
+
+
+def test_slot_trench_matches_convert_to_positive_resist():
+    assert_same_trench(route(WaveguidePath, *SLOT, n_points=128), route(Waveguide, *SLOT, n_points=128), 5)
+
+
+@requires_single_width_ports
+def test_single_trench_matches_convert_to_positive_resist():
+    assert_same_trench(route(WaveguidePath, *SINGLE, n_points=128), route(Waveguide, *SINGLE, n_points=128), 5)
+
+
+def test_translated_path_is_moved():
+    path = route(WaveguidePath, *SLOT)
+    moved = path.translated(3, -7)
+    np.testing.assert_allclose(moved.current_port.origin, path.current_port.origin + (3, -7))
+    np.testing.assert_allclose(moved.in_port.origin, path.in_port.origin + (3, -7))
+    expected = route(WaveguidePath, *SLOT)
+    assert_same_geometry(moved.get_shapely_object(),
+                         shapely.affinity.translate(expected.get_shapely_object(), 3, -7), tolerance=1e-9)
+
+
+def test_band_count_can_not_change():
+    path = WaveguidePath.make_at_port(Port((0, 0), 0, [1, 1, 1]))
+    path.add_straight_segment(5)
+    with pytest.raises(ValueError):
+        path.add_straight_segment(5, final_width=[1, 1, 1, 1, 1])
+    with pytest.raises(ValueError):
+        path.add_straight_segment(-1)
@@ -0,0 +1,287 @@
+# Waveguide routes as vertex arrays.
+# gdshelpers' Waveguide turns every add_straight_segment/add_bend into its own shapely MultiPolygon (plus an outline
+# polygon and validity checks) and get_shapely_object unions all of them. WaveguidePath takes the same calls, computes
+# the same sample points, normals and widths with numpy, but only keeps the edges: get_shapely_object joins the edges
+# of all segments into one ring per width band (one for a plain waveguide, one per rail for [3, w, 3] trench specs)
+# and builds them in one go, without any union. The points are the ones Waveguide computes for the same number of
+# bend points, only the duplicated points where two segments meet are dropped.
+# e.g.
+#   wg = WaveguidePath.make_at_port(Port((10, 150), angle=0, width=[3, 5, 3]))
+#   wg.add_straight_segment(length=125, final_width=[3, 1, 3])
+#   wg.add_bend(-pi, radius=50)
+# wg.current_port, wg.length and get_shapely_object() work as for a Waveguide, so it can be used in its place.
+# A route that crosses itself is not a simple ring, for it the segments are unioned like Waveguide does.
+# The rings start at another point than the ones of Waveguide's union. Where that matters (under-etching holes are
+# placed along the outline from its first point) get_shapely_object(segment_union=True) gives Waveguide's polygons.
+# Bends are sampled to a chord error: with BEND_TOLERANCE (in nm, None for Waveguide's fixed 128 points per quarter
+# turn) every bend gets as many points as its outermost edge needs to stay within the tolerance of the true circle,
+# so tight bends and small rings get few points and wide sweeping bends as many as they need. bend_points gives the
+# same number for other parts, e.g. RingResonator(..., n_points=bend_points(np.pi / 2, radius, width)).
+# get_positive_resist_object(buffer_radius) gives the same trench as convert_to_positive_resist([wg], buffer_radius)
+# without buffering the waveguide: the outline of the path is offset by the buffer radius edge by edge (round corners
+# where the outline turns outwards, the crossing of the two offset edges where it turns inwards) and the waveguide
+# bands are cut out as holes. Only when that offset is not a simple ring (e.g. the inside of a bend tighter than the
+# buffer radius) the general boolean of convert_to_positive_resist is used.
+# all measurements should be in um, angles in radians
+
+import numpy as np
+import shapely.ops
+import shapely.geometry
+
+from gdshelpers.helpers import normalize_phase
+from gdshelpers.helpers.positive_resist import convert_to_positive_resist
+from gdshelpers.parts.port import Port
+
+from gds_rectangles import polygons_to_multipolygon
+
+# largest allowed deviation of bends from true circles in nm, about the e-beam grid
+BEND_TOLERANCE = 1
+
+
+def bend_points(angle, radius, width, tolerance=None):
+    # number of points a bend by angle needs so that the chords of its outermost edge (radius + width / 2, width can
+    # be a [rail, gap, rail, ...] list) deviate from the circle by at most tolerance (in nm, BEND_TOLERANCE if None)
+    tolerance = BEND_TOLERANCE if tolerance is None else tolerance
+    outer_radius = radius + np.sum(width) / 2
+    max_step = 2 * np.arccos(np.clip(1 - tolerance * 1e-3 / outer_radius, -1, 1))
+    return max(int(np.ceil(abs(angle) / max_step)) + 1, 2)
+
+
+def _same_point(point, other):
+    # equal up to floating point rounding
+    return abs(point[0] - other[0]) <= 1e-9 and abs(point[1] - other[1]) <= 1e-9
+
+
+def _offset_ring(ring, gap_ends, distance, quadrant_segments=16):
+    # clockwise ring (without repeating the first point) offset outwards by distance: every edge is moved along its
+    # normal, where the ring turns outwards the two moved edges are joined by an arc (with the angle steps of a shapely
+    # buffer), where it turns inwards they end at their crossing
+    # gap_ends marks the edges (by their first point) that close the end of a gap between two bands: the buffers of
+    # the two band corners only meet at the crossing of their arcs, a notch less deep than distance
+    ring = np.asarray(ring, dtype=float)
+    kept = np.any(np.abs(ring - np.roll(ring, 1, axis=0)) > 1e-9, axis=1)
+    ring, gap_ends = ring[kept], gap_ends[kept]
+    # edge i goes from point i to point i + 1, its outward normal is on the left of a clockwise ring
+    directions = np.roll(ring, -1, axis=0) - ring
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+    normals = np.vstack((-directions[:, 1], directions[:, 0])).T
+    before = np.roll(normals, 1, axis=0)
+    turns = np.arctan2(np.sum(normals * np.roll(directions, 1, axis=0), axis=1), np.sum(before * normals, axis=1))
+    turns[gap_ends | np.roll(gap_ends, 1)] = 0
+
+    quantum = np.pi / 2 / quadrant_segments
+    convex = turns > 0
+    steps = np.maximum((turns / quantum + 0.5).astype(int), 1)
+    # one point where the moved edges cross, steps + 1 points of the arc around every outward corner
+    counts = np.where(convex, steps + 1, 1)
+    corner = np.repeat(np.arange(len(ring)), counts)
+    index = np.arange(len(corner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    phi = np.arctan2(before[corner, 1], before[corner, 0]) - index * (turns / steps)[corner]
+    arcs = np.vstack((np.cos(phi), np.sin(phi))).T
+    arcs[index == 0] = before[corner[index == 0]]
+    arcs[index == counts[corner] - 1] = normals[corner[index == counts[corner] - 1]]
+    # the moved edges cross on the bisector of the two normals
+    miters = (before + normals) / (1 + np.sum(before * normals, axis=1))[:, None]
+    points = ring[corner] + distance * np.where(convex[corner, None], arcs, miters[corner])
+    if not np.any(gap_ends):
+        return points
+
+    parts, start = [], 0
+    for i in np.flatnonzero(gap_ends):
+        # the corner arcs run from the normal towards the other band, up to where they cross on the middle of the gap
+        end = np.cumsum(counts)[i]
+        other = ring[(i + 1) % len(ring)]
+        half_gap = np.linalg.norm(other - ring[i]) / 2
+        phi = np.arange(int(np.arcsin(half_gap / distance) / quantum) + 2) * quantum
+        arc = distance * np.vstack((np.cos(phi), np.sin(phi))).T
+        # the crossing of the last chord with the middle of the gap
+        t = (half_gap - arc[-2, 1]) / (arc[-1, 1] - arc[-2, 1])
+        arc = np.vstack((arc[:-1], arc[-2] + t * (arc[-1] - arc[-2])))
+        arc = arc[:, :1] * normals[i] + arc[:, 1:] * directions[i]
+        mirrored = arc[-2::-1] - 2 * (arc[-2::-1] @ directions[i])[:, None] * directions[i]
+        parts += [points[start:end - 1], ring[i] + arc, other + mirrored]
+        start = end + 1
+    return np.concatenate(parts + [points[start:]])
+
+
+def _outline(rings):
+    # clockwise ring around all width bands (band_rings) and flags for the edges that close the gaps between them at
+    # the two ends of the path: the first edge of the first band along the path, the end points of all bands, the
+    # second edge of the last band back and the start points of all bands. A band keeps the same number of points on
+    # both of its edges, so its ring is half first edge and half second edge
+    halves = [len(ring) // 2 for ring in rings]
+    ends = [point for ring, half in zip(rings, halves) for point in (ring[half - 1], ring[half])][1:-1]
+    starts = [point for ring in rings for point in (ring[0], ring[-1])][1:-1][::-1]
+    outline = np.concatenate((rings[0][:halves[0]], np.reshape(ends, (-1, 2)), rings[-1][halves[-1]:],
+                              np.reshape(starts, (-1, 2))))
+    gap_ends = np.zeros(len(outline), dtype=bool)
+    gap_ends[halves[0]:halves[0] + len(ends):2] = True
+    gap_ends[len(outline) - len(starts):len(outline):2] = True
+    return outline, gap_ends
+
+
+class WaveguidePath:
+    # a chain of straight segments and bends, with the edges of every width band kept as arrays per segment
+    def __init__(self, origin, angle, width):
+        self._current_port = Port(origin, angle, width)
+        self._in_port = self._current_port.inverted_direction.copy()
+        self._segments = []
+        self._length = 0.
+
+    @classmethod
+    def make_at_port(cls, port, **kwargs):
+        port_param = port.copy()
+        port_param.set_port_properties(**kwargs)
+        return cls(**port_param.get_parameters())
+
+    @property
+    def x(self):
+        return self._current_port.origin[0]
+
+    @property
+    def y(self):
+        return self._current_port.origin[1]
+
+    @property
+    def origin(self):
+        return self._current_port.origin
+
+    @property
+    def angle(self):
+        return self._current_port.angle
+
+    @property
+    def width(self):
+        return self._current_port.width
+
+    @property
+    def current_port(self):
+        return self._current_port.copy()
+
+    port = current_port
+
+    @property
+    def in_port(self):
+        return self._in_port.copy()
+
+    @property
+    def length(self):
+        return self._length
+
+    def add_straight_segment(self, length, final_width=None):
+        final_width = final_width if final_width is not None else self.width
+        # np.isclose(length, 0), like Waveguide, without its overhead
+        if abs(length) > 1e-8:
+            if length < 0:
+                raise ValueError('length of a straight segment must not be negative, got {}'.format(length))
+            t = np.linspace(0, 1, 2)
+            path = np.array([[x * length, 0] for x in t])
+            derivative = np.array([[1, 0] for _ in t])
+            widths = np.array([np.array(self.width) * (1 - x) + np.array(final_width) * x for x in t])
+            self._add_samples(path, derivative, widths)
+        return self
+
+    def add_bend(self, angle, radius, final_width=None, n_points=None, tolerance=None):
+        # n_points is the number of points per quarter turn as in Waveguide, without it the bend is sampled to
+        # tolerance (BEND_TOLERANCE if None, see bend_points)
+        final_width = final_width if final_width is not None else self.width
+        if n_points or (tolerance is None and BEND_TOLERANCE is None):
+            n_points = n_points if n_points else 128
+            sample_points = max(int(abs(angle) / (np.pi / 2) * n_points), 2)
+        else:
+            sample_points = bend_points(angle, radius, max(np.sum(self.width), np.sum(final_width)), tolerance)
+        angle = normalize_phase(angle, zero_to_two_pi=True) - (0 if angle > 0 else 2 * np.pi)
+
+        t = np.linspace(0, 1, sample_points)
+        path = np.array([radius * np.sin(abs(angle) * t), np.sign(angle) * -radius * (np.cos(angle * t) - 1)]).T
+        derivative = np.array([radius * np.cos(abs(angle) * t) * abs(angle),
+                               np.sign(angle) * radius * (np.sin(angle * t) * angle)]).T
+        widths = np.outer(1 - t, np.array(self.width)) + np.outer(t, np.array(final_width))
+        self._add_samples(path, derivative, widths)
+        return self
+
+    def _add_samples(self, path, derivative, widths):
+        # path and derivative in the frame of the current port, widths as one row per sample, the same arithmetic as
+        # Waveguide.add_parameterized_path
+        if widths.ndim == 1:
+            widths = widths[..., np.newaxis]
+        rotation = np.array(((np.cos(self._current_port.angle), -np.sin(self._current_port.angle)),
+                             (np.sin(self._current_port.angle), np.cos(self._current_port.angle))))
+        points = self._current_port.origin + np.einsum('ij,kj->ki', rotation, path)
+        derivative = np.einsum('ij,kj->ki', rotation, derivative)
+        normed = derivative / np.linalg.norm(derivative, axis=1)[:, None]
+        ortho = np.vstack((normed[:, 1], -normed[:, 0])).T
+
+        half_width = np.sum(widths, axis=-1) / 2
+        bands = []
+        for i in range((widths.shape[-1] + 1) // 2):
+            start = np.sum(widths[:, :(2 * i)], axis=-1) - half_width
+            stop = start + widths[:, 2 * i]
+            bands.append((points + start[..., None] * ortho, points + stop[..., None] * ortho))
+        if self._segments and len(bands) != len(self._segments[-1]):
+            raise ValueError('the number of width bands can not change along a path')
+        self._segments.append(bands)
+
+        self._length += np.sum(np.linalg.norm(np.diff(points, axis=0), axis=1))
+        self._current_port.origin = points[-1]
+        self._current_port.width = widths[-1]
+        self._current_port.angle = np.arctan2(derivative[-1][1], derivative[-1][0])
+
+    def band_rings(self):
+        # one closed ring (without repeating the first point) per width band: its first edge along the whole path and
+        # its second edge back
+        rings = []
+        for band in range(len(self._segments[0]) if self._segments else 0):
+            first, second = [], []
+            for segment in self._segments:
+                edge_1, edge_2 = segment[band]
+                # a segment starts where the previous one ended, its first points are only kept at a width step
+                if first and _same_point(edge_1[0], first[-1][-1]) and _same_point(edge_2[0], second[-1][-1]):
+                    edge_1, edge_2 = edge_1[1:], edge_2[1:]
+                first.append(edge_1)
+                second.append(edge_2)
+            rings.append(np.concatenate((np.concatenate(first), np.concatenate(second)[::-1])))
+        return rings
+
+    def translated(self, dx, dy):
+        # copy of the path moved by (dx, dy)
+        moved = WaveguidePath(self._current_port.origin + (dx, dy), self._current_port.angle, self._current_port.width)
+        moved._in_port.origin = self._in_port.origin + (dx, dy)
+        moved._segments = [[(edge_1 + (dx, dy), edge_2 + (dx, dy)) for edge_1, edge_2 in segment]
+                           for segment in self._segments]
+        moved._length = self._length
+        return moved
+
+    def get_positive_resist_object(self, buffer_radius):
+        # trench of width buffer_radius around the path, as convert_to_positive_resist([self], buffer_radius): the
+        # outline offset by buffer_radius, simplified with the same tolerance (buffer_radius / 20), with the bands as
+        # holes
+        rings = self.band_rings()
+        if not rings:
+            return shapely.geometry.Polygon()
+        # a gap wider than the trench is not closed by it
+        gaps = [np.linalg.norm(segment[band + 1][0] - segment[band][1], axis=1)
+                for segment in self._segments for band in range(len(segment) - 1)]
+        if not gaps or np.max(np.concatenate(gaps)) < 2 * buffer_radius:
+            outer = shapely.geometry.Polygon(_offset_ring(*_outline(rings), buffer_radius))
+            if outer.is_valid:
+                # plain Douglas-Peucker, the ring is simple and the trench is checked below, the topology preserving
+                # simplification of convert_to_positive_resist gives the same points but checks every step
+                outer = outer.simplify(buffer_radius / 20., preserve_topology=False)
+                trench = shapely.geometry.Polygon(outer.exterior, rings) if outer.geom_type == 'Polygon' else None
+                if trench is not None and trench.is_valid:
+                    return trench
+        return convert_to_positive_resist([self], buffer_radius)
+
+    def get_shapely_object(self, segment_union=False):
+        # segment_union=True unions the polygons of all segments like Waveguide.get_shapely_object does: the same
+        # polygons, but with every ring starting at the point the union starts it at, which the band rings can not
+        # know in advance. create_holes_for_under_etching places its holes along the outline from its first point, so
+        # holes around a path need it to land where they did around a Waveguide
+        if not segment_union:
+            geometry = polygons_to_multipolygon(self.band_rings())
+            if geometry.is_valid:
+                return geometry
+        return shapely.ops.unary_union([shapely.geometry.MultiPolygon([
+            shapely.geometry.Polygon(np.concatenate((edge_1, edge_2[::-1]))) for edge_1, edge_2 in segment])
+            for segment in self._segments])